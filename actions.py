@@ -10,13 +10,16 @@ from exceptions import Impossible
 from global_vars import HIT_CHANCE_BASE
 from components.equippable import Melee
 from map_gen.map_utils import set_bloody_tiles
+from utils import Slotted
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Actor, Entity, Item
 
 
-class Action:
+class Action(Slotted):
+    __slots__ = ("entity",)
+
     def __init__(self, entity: Actor) -> None:
         self.entity = entity
 
@@ -43,6 +46,8 @@ class Action:
 class EnergyAction(Action):
     """An action with an energy cost. Most actor actions will inherit from this."""
 
+    __slots__ = ("cost",)
+
     def __init__(self, entity: Actor, cost: int = 100) -> None:
         super().__init__(entity=entity)
         self.cost = cost
@@ -52,10 +57,6 @@ class EnergyAction(Action):
         """Return the engine this action belongs to."""
         return self.entity.parent.engine
 
-    @property
-    def can_perform(self) -> bool:
-        return self.entity.fighter.energy >= self.cost
-
     def perform(self) -> None:
         """Perform this action with the objects needed to determine its scope.
 
@@ -68,10 +69,13 @@ class EnergyAction(Action):
         raise NotImplementedError()
 
     def exhaust_energy(self) -> None:
-        self.entity.fighter.energy -= self.cost
+        """Spend the time this action takes, delaying the next turn of the entity."""
+        self.engine.turn_manager.end_turn(self.entity, self.cost)
 
 
 class VictoryAction(Action):
+    __slots__ = ()
+
     def perform(self) -> None:
         self.engine.victory = True
 
@@ -79,30 +83,31 @@ class VictoryAction(Action):
 class PickupAction(EnergyAction):
     """Pickup an item and add it to the inventory, if there is room for it."""
 
+    __slots__ = ()
+
     def __init__(self, entity: Actor):
         super().__init__(entity)
 
     def perform(self) -> None:
-        actor_location_x = self.entity.x
-        actor_location_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
-                if len(inventory.items) >= inventory.capacity:
-                    raise Impossible("Your inventory is full.")
+        item = self.engine.game_map.get_item_at_location(self.entity.x, self.entity.y)
+        if not item:
+            raise Impossible("There is nothing here to pick up.")
 
-                self.engine.game_map.entities.remove(item)
-                item.parent = self.entity.inventory
-                inventory.items.append(item)
+        if len(inventory.items) >= inventory.capacity:
+            raise Impossible("Your inventory is full.")
 
-                self.engine.message_log.add_message(f"You picked up the {item.name}!")
-                return
+        self.engine.game_map.remove_entity(item)
+        item.parent = self.entity.inventory
+        inventory.items.append(item)
 
-        raise Impossible("There is nothing here to pick up.")
+        self.engine.message_log.add_message(f"You picked up the {item.name}!")
 
 
 class ItemAction(EnergyAction):
+    __slots__ = ("item", "target_xy")
+
     def __init__(
         self, entity: Actor, item: Item, target_xy: Optional[Tuple[int, int]] = None
     ):
@@ -124,6 +129,8 @@ class ItemAction(EnergyAction):
 
 
 class DropItem(ItemAction):
+    __slots__ = ()
+
     def perform(self) -> None:
         if self.entity.equipment.item_is_equipped(self.item):
             self.entity.equipment.toggle_equip(self.item)
@@ -132,6 +139,8 @@ class DropItem(ItemAction):
 
 
 class EquipAction(EnergyAction):
+    __slots__ = ("item",)
+
     def __init__(self, entity: Actor, item: Item):
         super().__init__(entity)
 
@@ -142,11 +151,15 @@ class EquipAction(EnergyAction):
 
 
 class WaitAction(EnergyAction):
+    __slots__ = ()
+
     def perform(self) -> None:
         pass
 
 
 class MoveToTileAction(EnergyAction):
+    __slots__ = ("tile_x", "tile_y")
+
     def __init__(self, entity: Actor, tile_x: int, tile_y: int):
         super().__init__(entity)
         self.tile_x = tile_x
@@ -164,6 +177,8 @@ class MoveToTileAction(EnergyAction):
 
 
 class TakeStairsAction(EnergyAction):
+    __slots__ = ()
+
     def perform(self) -> None:
         """
         Take the stairs, if any exist at the entity's location.
@@ -179,6 +194,8 @@ class TakeStairsAction(EnergyAction):
 class ActionWithDirection(EnergyAction):
     """An action with a direction."""
 
+    __slots__ = ("dx", "dy")
+
     def __init__(self, entity: Actor, dx: int, dy: int):
         super().__init__(entity)
 
@@ -207,6 +224,8 @@ class ActionWithDirection(EnergyAction):
 class ActionWithRangedTarget(EnergyAction):
     """An action with a ranged targeted entity."""
 
+    __slots__ = ("target_xy",)
+
     def __init__(self, entity: Actor, target_xy: Tuple[int, int]):
         super().__init__(entity)
 
@@ -235,6 +254,8 @@ class ActionWithRangedTarget(EnergyAction):
 class MeleeAction(ActionWithDirection):
     """Perform an attack towards a direction."""
 
+    __slots__ = ()
+
     def perform(self) -> None:
         target = self.target_actor
         if not target:
@@ -283,6 +304,8 @@ class MeleeAction(ActionWithDirection):
 class RangedAttackAction(ActionWithRangedTarget):
     """Perform an attack against a ranged target."""
 
+    __slots__ = ()
+
     def perform(self) -> None:
         target = self.target_actor
 
@@ -348,6 +371,8 @@ class RangedAttackAction(ActionWithRangedTarget):
 class PounceAction(ActionWithRangedTarget):
     """Pounce towards a ranged target."""
 
+    __slots__ = ("next_to_target",)
+
     def __init__(
         self, entity: Actor, target_xy: Tuple[int, int], next_to_target: Tuple[int, int]
     ):
@@ -375,8 +400,7 @@ class PounceAction(ActionWithRangedTarget):
             attack_color = color.enemy_atk
 
         # Move the attacker next to the player
-        self.entity.x = self.next_to_target[0]
-        self.entity.y = self.next_to_target[1]
+        self.entity.place(*self.next_to_target)
 
         if hit_probability < random.random() * 100:
             self.engine.message_log.add_message(
@@ -401,6 +425,8 @@ class PounceAction(ActionWithRangedTarget):
 class MovementAction(ActionWithDirection):
     """Action for moving an entity."""
 
+    __slots__ = ()
+
     def perform(self) -> None:
         dest_x, dest_y = self.dest_xy
 
@@ -412,7 +438,7 @@ class MovementAction(ActionWithDirection):
         if not self.engine.game_map.in_bounds(dest_x, dest_y):
             # Destination is out of bounds.
             raise Impossible("That way is blocked.")
-        if not self.engine.game_map.tiles["walkable"][dest_x, dest_y]:
+        if not tile_types.WALKABLE[self.engine.game_map.tiles[dest_x, dest_y]]:
             # check if the tile is of type door
 
             if self.engine.game_map.tiles[dest_x, dest_y] == tile_types.closed_door:
@@ -433,6 +459,8 @@ class MovementAction(ActionWithDirection):
 class BumpAction(ActionWithDirection):
     """This class determines wether the entity moves or attacks."""
 
+    __slots__ = ()
+
     def perform(self) -> None:
         if self.target_actor:
             return MeleeAction(self.entity, self.dx, self.dy).perform()
@@ -443,11 +471,13 @@ class BumpAction(ActionWithDirection):
 class OpenDoorAction(ActionWithDirection):
     """This class opens a door."""
 
+    __slots__ = ()
+
     def perform(self) -> None:
-        if self.engine.game_map.tiles["walkable"][self.dx, self.dy]:
+        if tile_types.WALKABLE[self.engine.game_map.tiles[self.dx, self.dy]]:
             raise Impossible("The door is already open!")
         if self.engine.game_map.tiles[self.dx, self.dy] == tile_types.closed_door:
-            self.engine.game_map.tiles[self.dx, self.dy] = tile_types.open_door
+            self.engine.game_map.set_tile(self.dx, self.dy, tile_types.open_door)
             self.engine.message_log.add_message("You opened the door.")
         else:
             raise Impossible("The door is already open!")
@@ -456,6 +486,8 @@ class OpenDoorAction(ActionWithDirection):
 class QuickHealAction(EnergyAction):
     """Use a healing item from your inventory."""
 
+    __slots__ = ()
+
     def perform(self) -> None:
         healing_items = self.entity.inventory.healing_items
 
@@ -479,6 +511,8 @@ class QuickHealAction(EnergyAction):
 
 
 class SpawnEnemiesAction(EnergyAction):
+    __slots__ = ("enemy", "area", "number")
+
     def __init__(
         self,
         entity: Actor,
@@ -506,7 +540,7 @@ class SpawnEnemiesAction(EnergyAction):
 
                 if (
                     self.engine.game_map.in_bounds(x, y)
-                    and self.engine.game_map.tiles["walkable"][x, y]
+                    and tile_types.WALKABLE[self.engine.game_map.tiles[x, y]]
                     and not self.engine.game_map.get_blocking_entity_at_location(x, y)
                 ):
                     valid = True
@@ -514,6 +548,8 @@ class SpawnEnemiesAction(EnergyAction):
 
 
 class SpecialAbilityAction(EnergyAction):
+    __slots__ = ()
+
     def perform(self) -> None:
         player = self.entity
         if player.equipment.weapon and isinstance(player.equipment.weapon.equippable, Melee) and player.equipment.weapon.equippable.special_ability:
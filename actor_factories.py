@@ -1,4 +1,7 @@
-"""Library of different types of entities."""
+"""Library of different types of entities.
+
+The actors here are templates, the game spawns copies of them (see Actor.clone).
+"""
 
 import components.ai
 from actions import VictoryAction
@@ -0,0 +1,109 @@
+"""Numpy columns with the state of the actors on a map, to query all of them at once.
+
+GameMap keeps the table in sync with its Actor objects: their location when they are
+added, moved or removed, and the alive flag when they die. The rows of removed actors
+are reused by the next actors added.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from entity import Actor
+
+
+class ActorTable:
+    def __init__(self, capacity: int = 32):
+        self.actors: List[Optional[Actor]] = [None] * capacity
+        self.rows: Dict[Actor, int] = {}
+        self.free_rows: List[int] = list(range(capacity - 1, -1, -1))
+
+        self.id = np.full(capacity, -1, dtype=np.int64)
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        # Always False for free rows, so the queries only need to check this column.
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _grow(self) -> None:
+        capacity = len(self.actors)
+        self.actors.extend([None] * capacity)
+        self.free_rows.extend(range(2 * capacity - 1, capacity - 1, -1))
+        self.id = np.concatenate([self.id, np.full(capacity, -1, dtype=np.int64)])
+        self.x = np.concatenate([self.x, np.zeros(capacity, dtype=np.int32)])
+        self.y = np.concatenate([self.y, np.zeros(capacity, dtype=np.int32)])
+        self.alive = np.concatenate([self.alive, np.zeros(capacity, dtype=bool)])
+
+    def add(self, actor: Actor) -> None:
+        row = self.rows.get(actor)
+        if row is None:
+            if not self.free_rows:
+                self._grow()
+            row = self.free_rows.pop()
+            self.rows[actor] = row
+            self.actors[row] = actor
+        self.id[row] = actor.id
+        self.x[row] = actor.x
+        self.y[row] = actor.y
+        self.alive[row] = actor.is_alive
+
+    def move(self, actor: Actor) -> None:
+        row = self.rows[actor]
+        self.x[row] = actor.x
+        self.y[row] = actor.y
+
+    def remove(self, actor: Actor) -> None:
+        row = self.rows.pop(actor, None)
+        if row is None:
+            return
+        self.actors[row] = None
+        self.id[row] = -1
+        self.alive[row] = False
+        self.free_rows.append(row)
+
+    def set_alive(self, actor: Actor) -> None:
+        row = self.rows.get(actor)
+        if row is not None:
+            self.alive[row] = actor.is_alive
+
+    def visible_mask(self, visible: np.ndarray) -> np.ndarray:
+        """Return which rows have a living actor on a visible tile."""
+        mask = self.alive.copy()
+        mask[mask] = visible[self.x[mask], self.y[mask]]
+        return mask
+
+    def chebyshev_distances(self, x: int, y: int) -> np.ndarray:
+        return np.maximum(np.abs(self.x - x), np.abs(self.y - y))
+
+    def actors_in_rows(self, rows: np.ndarray) -> List[Actor]:
+        """Return the actors of the rows, skipping the free ones."""
+        return [actor for actor in (self.actors[row] for row in rows) if actor is not None]
+
+    def visible_actors(self, visible: np.ndarray) -> List[Actor]:
+        return self.actors_in_rows(np.flatnonzero(self.visible_mask(visible)))
+
+    def out_of_sight_actors(self, visible: np.ndarray) -> List[Actor]:
+        """Return the living actors on tiles the player can't see."""
+        mask = self.alive & ~self.visible_mask(visible)
+        return self.actors_in_rows(np.flatnonzero(mask))
+
+    def closest_visible_actor(
+        self, x: int, y: int, visible: np.ndarray, exclude: Actor, max_distance: int
+    ) -> Optional[Actor]:
+        """Return the visible actor closest to x, y, the one with the lowest id on ties."""
+        mask = self.visible_mask(visible)
+        row = self.rows.get(exclude)
+        if row is not None:
+            mask[row] = False
+        distances = self.chebyshev_distances(x, y)
+        mask &= distances < max_distance
+        if not mask.any():
+            return None
+        rows = np.flatnonzero(mask)
+        closest = rows[np.lexsort((self.id[rows], distances[rows]))[0]]
+        return self.actors[closest]
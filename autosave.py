@@ -0,0 +1,130 @@
+"""Save the game in the background when the player changes floors and every few turns.
+
+The game is pickled on the main thread, which is quick, and a worker thread compresses
+and writes it, so the game doesn't stall while saving.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import traceback
+from typing import TYPE_CHECKING, Optional
+
+import global_vars
+import savefile
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+
+class Autosaver:
+    """Write a save file in a worker thread, one save at a time."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.engine: Optional[Engine] = None
+        self.thread: Optional[threading.Thread] = None
+        self.snapshot: Optional[savefile.Snapshot] = None
+        # The compressed floors of the running save can be reused by later saves,
+        # unless the player visits one of them before the save is done.
+        self.snapshot_floors_changed = False
+        self.last_floor: Optional[int] = None
+        self.last_turn = 0
+
+        # Metrics of the last save, shown in the debug menu.
+        self.saves = 0
+        self.snapshot_seconds = 0.0
+        self.write_seconds = 0.0
+        self.size = 0
+        self.error: Optional[str] = None
+
+    @property
+    def saving(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def update(self, engine: Engine) -> None:
+        """Called after each turn, start a save when the floor changed or it's time."""
+        current_floor = engine.game_world.current_floor
+        if engine is not self.engine:
+            # A new or loaded game, its first save is after AUTOSAVE_TURNS.
+            self.engine = engine
+            self.snapshot_floors_changed = True
+            self.last_floor = current_floor
+            self.last_turn = engine.current_turn
+        elif current_floor != self.last_floor and self.saving:
+            self.snapshot_floors_changed = True
+
+        if self.thread is not None and not self.saving:
+            self.finish(engine)
+
+        if self.saving:
+            # A due save starts after the running one.
+            return
+
+        if (
+            current_floor != self.last_floor
+            or engine.current_turn - self.last_turn >= global_vars.AUTOSAVE_TURNS
+        ):
+            self.start(engine)
+
+    def start(self, engine: Engine) -> None:
+        self.last_floor = engine.game_world.current_floor
+        self.last_turn = engine.current_turn
+
+        start = time.perf_counter()
+        try:
+            self.snapshot = savefile.Snapshot(engine)
+        except Exception:
+            # Tried again after AUTOSAVE_TURNS, not on every turn.
+            traceback.print_exc()
+            self.error = traceback.format_exc(limit=1)
+            self.saves += 1
+            return
+        self.snapshot_seconds = time.perf_counter() - start
+        self.snapshot_floors_changed = False
+
+        self.thread = threading.Thread(
+            target=self.write, args=(self.snapshot,), name="autosave", daemon=True
+        )
+        self.thread.start()
+
+    def write(self, snapshot: savefile.Snapshot) -> None:
+        start = time.perf_counter()
+        try:
+            self.size = snapshot.write(self.filename)
+            self.error = None
+        except Exception:
+            traceback.print_exc()
+            self.error = traceback.format_exc(limit=1)
+        self.write_seconds = time.perf_counter() - start
+        self.saves += 1
+
+    def finish(self, engine: Engine) -> None:
+        """Keep the compressed floors of the finished save for the next saves."""
+        self.thread = None
+        snapshot = self.snapshot
+        if snapshot is not None and self.error is None and not self.snapshot_floors_changed:
+            game_world = engine.game_world
+            saved_floors = game_world.get_saved_floors()
+            for number, data in snapshot.compressed_floors().items():
+                if number != game_world.current_floor and number not in saved_floors:
+                    saved_floors[number] = data
+        self.snapshot = None
+
+    def wait(self) -> None:
+        """Wait for the running save, e.g. before saving on quit."""
+        if self.thread is not None:
+            self.thread.join()
+
+
+AUTOSAVER: Optional[Autosaver] = None
+
+
+def set_autosaver(value: Optional[Autosaver]):
+    global AUTOSAVER
+    AUTOSAVER = value
+
+
+def get_autosaver() -> Optional[Autosaver]:
+    return AUTOSAVER
@@ -22,6 +22,7 @@ from actions import (
 )
 
 from exceptions import Impossible
+from utils import shallow_copy
 
 if TYPE_CHECKING:
     from game_map import GameMap
@@ -29,9 +30,69 @@ if TYPE_CHECKING:
 
 
 class BaseAI(EnergyAction):
+    # Where the player was when it went out of sight, the actor will walk there.
+    last_seen_target: Optional[Tuple[int, int]] = None
+    # Set by the AIs that only follow their path while they can't see the player.
+    follows_path_out_of_sight = False
+
     def get_action(self) -> EnergyAction:
         raise NotImplementedError()
 
+    def idle_out_of_sight(self) -> bool:
+        """Return True if the actor would only wait this turn when it isn't visible."""
+        return (
+            self.follows_path_out_of_sight
+            and not self.path
+            and not self.last_seen_target
+        )
+
+    def clone(self, entity: Actor, rng: Optional[random.Random] = None) -> BaseAI:
+        """Return a copy of this AI for a copy of its actor, with its own random state."""
+        clone = shallow_copy(self)
+        clone.entity = entity
+        if hasattr(self, "path"):
+            clone.path = list(self.path)
+        clone.roll(rng)
+        return clone
+
+    def roll(self, rng: Optional[random.Random] = None) -> None:
+        """
+        Roll the random state of a new AI, e.g. its timings. Uses the global random
+        state unless an rng is given.
+        """
+
+    def move_towards_player(self) -> Optional[Action]:
+        """Step towards the visible player using the distance map shared by all actors."""
+        target = self.engine.player
+        self.last_seen_target = (target.x, target.y)
+        self.path = []
+
+        step = self.engine.game_map.get_step_towards_player(self.entity.x, self.entity.y)
+        if step is None:
+            return None
+
+        return MovementAction(
+            self.entity,
+            step[0] - self.entity.x,
+            step[1] - self.entity.y,
+        )
+
+    def follow_path(self) -> Optional[Action]:
+        """Keep walking the current path, or to where the player was last seen."""
+        if not self.path and self.last_seen_target:
+            self.path = self.get_path_to(*self.last_seen_target)
+            self.last_seen_target = None
+
+        if self.path:
+            dest_x, dest_y = self.path.pop(0)
+            return MovementAction(
+                self.entity,
+                dest_x - self.entity.x,
+                dest_y - self.entity.y,
+            )
+
+        return None
+
     def perform(self) -> None:
         self.get_action().perform()
 
@@ -48,7 +109,7 @@ class BaseAI(EnergyAction):
         else:
             raise Impossible("Can't get path to entity without a parent GameMap.")
         # Copy the walkable array.
-        cost = np.array(game_map.tiles["walkable"], dtype=np.int8)
+        cost = game_map.walkable.astype(np.int8)
 
         for entity in self.entity.parent.entities:
             # Check that an entity blocks movement and the cost isn't zero (blocking.)
@@ -106,6 +167,8 @@ class ConfusedEnemy(BaseAI):
 
 
 class BasicMeleeEnemyAI(BaseAI):
+    follows_path_out_of_sight = True
+
     def __init__(self, entity: Actor):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
@@ -120,20 +183,14 @@ class BasicMeleeEnemyAI(BaseAI):
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy)
 
-            self.path = self.get_path_to(target.x, target.y)
+            return self.move_towards_player() or WaitAction(self.entity)
 
-        if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
-                self.entity,
-                dest_x - self.entity.x,
-                dest_y - self.entity.y,
-            )
-
-        return WaitAction(self.entity)
+        return self.follow_path() or WaitAction(self.entity)
 
 
 class PatrollingMeleeEnemyAI(BasicMeleeEnemyAI):
+    follows_path_out_of_sight = False
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.target = None
@@ -147,17 +204,21 @@ class PatrollingMeleeEnemyAI(BasicMeleeEnemyAI):
             # Otherwise, patrol the map
             if self.target is None or (self.entity.x, self.entity.y) == self.target:
                 # If there is no current target or the current target has been reached, find a new target
-                walkable_tiles = self.engine.game_map.get_walkable_tiles_from_position(
-                    (self.entity.x, self.entity.y), self.engine.game_map
+                self.target = self.engine.game_map.get_random_tile_in_region(
+                    self.entity.x, self.entity.y
                 )
-                self.target = random.choice(walkable_tiles)
+                if self.target is None:
+                    return WaitAction(self.entity)
 
             # Move towards the target
             self.path = self.get_path_to(self.target[0], self.target[1])
 
-            if self.path:
-                dest_x, dest_y = self.path.pop(0)
+            if not self.path:
+                # The target can't be reached right now, pick another one next turn.
+                self.target = None
+                return WaitAction(self.entity)
 
+            dest_x, dest_y = self.path.pop(0)
             return MovementAction(
                 self.entity,
                 dest_x - self.entity.x,
@@ -223,6 +284,9 @@ class StaticRangedEnemy(BaseAI):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
 
+    def idle_out_of_sight(self) -> bool:
+        return True
+
     def get_action(self) -> Action:
         target = self.engine.player
 
@@ -242,7 +306,10 @@ class BatAI(BaseAI):
         self.path: List[Tuple[int, int]] = []
         self.attacking = False
         self.engage_timer = 0
-        self.engage_period = random.randint(3, 10)
+        self.roll()
+
+    def roll(self, rng: Optional[random.Random] = None) -> None:
+        self.engage_period = (rng or random).randint(3, 10)
 
     def get_action(self) -> Action:
         target = self.engine.player
@@ -255,12 +322,12 @@ class BatAI(BaseAI):
                 return MeleeAction(self.entity, dx, dy)
 
             if self.attacking:
-                self.path = self.get_path_to(target.x, target.y)
-
                 self.engage_timer += 1
                 if self.engage_timer >= self.engage_period:
                     self.engage_timer = 0
                     self.attacking = False
+
+                return self.move_towards_player() or WaitAction(self.entity)
             else:
                 # set path to a random direction, never 0, 0
                 x, y = 0, 0
@@ -275,18 +342,12 @@ class BatAI(BaseAI):
 
                 return BumpAction(self.entity, x, y)
 
-        if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
-                self.entity,
-                dest_x - self.entity.x,
-                dest_y - self.entity.y,
-            )
-
-        return WaitAction(self.entity)
+        return self.follow_path() or WaitAction(self.entity)
 
 
 class VampireAI(BaseAI):
+    follows_path_out_of_sight = True
+
     def __init__(self, entity: Actor):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
@@ -309,20 +370,14 @@ class VampireAI(BaseAI):
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy)
 
-            self.path = self.get_path_to(target.x, target.y)
-
-        if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
-                self.entity,
-                dest_x - self.entity.x,
-                dest_y - self.entity.y,
-            )
+            return self.move_towards_player() or WaitAction(self.entity)
 
-        return WaitAction(self.entity)
+        return self.follow_path() or WaitAction(self.entity)
 
 
 class WerewolfAI(BaseAI):
+    follows_path_out_of_sight = True
+
     def __init__(self, entity: Actor):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
@@ -345,17 +400,9 @@ class WerewolfAI(BaseAI):
                         self.entity, (target.x, target.y), next_to_target
                     )
 
-            self.path = self.get_path_to(target.x, target.y)
+            return self.move_towards_player() or WaitAction(self.entity)
 
-        if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
-                self.entity,
-                dest_x - self.entity.x,
-                dest_y - self.entity.y,
-            )
-
-        return WaitAction(self.entity)
+        return self.follow_path() or WaitAction(self.entity)
 
     def get_next_tile_to_target(self, target_x: int, target_y: int) -> Tuple[int, int]:
         # Calculate the direction vector from the entity to the target
@@ -371,10 +418,10 @@ class WerewolfAI(BaseAI):
     def is_tile_empty(self, tile: Tuple[int, int]) -> bool:
         x, y = tile
         # Check if the tile is walkable and there are no blocking entities on it
-        return self.engine.game_map.tiles["walkable"][x, y] and not any(
-            entity
-            for entity in self.engine.game_map.entities
-            if entity.blocks_movement and entity.x == x and entity.y == y
+        game_map = self.engine.game_map
+        return bool(
+            tile_types.WALKABLE[game_map.tiles[x, y]]
+            and not game_map.get_blocking_entity_at_location(x, y)
         )
 
 
@@ -1,16 +1,28 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, TypeVar
+
+from utils import Slotted, shallow_copy
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
     from game_map import GameMap
 
+T = TypeVar("T", bound="BaseComponent")
+
+
+class BaseComponent(Slotted):
+    __slots__ = ("parent",)
 
-class BaseComponent:
     parent: Entity  # Owning entity instance.
 
+    def clone(self: T, parent: Entity) -> T:
+        """Return a copy of this component for a copy of its entity."""
+        clone = shallow_copy(self)
+        clone.parent = parent
+        return clone
+
     @property
     def gamemap(self) -> GameMap:
         return self.parent.gamemap
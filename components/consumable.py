@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 from typing import Optional, TYPE_CHECKING
 
 from actions import ItemAction
@@ -67,14 +68,14 @@ class DefenseBoostConsumable(Consumable):
         consumer = action.entity
         if consumer.fighter:
             # Apply the defense boost
-            consumer.fighter.defense_boost += self.amount
+            consumer.fighter.add_modifier("defense", self.amount, "boost")
             self.engine.message_log.add_message(
                 f"You use the {self.parent.name}, and your defense increases by {self.amount} for {self.duration} turns!",
                 color.defense_boost,
             )
             # Schedule the removal of the boost after the duration expires
             self.engine.schedule_effect(
-                self.duration, lambda: self.remove_boost(consumer)
+                self.duration, functools.partial(self.remove_boost, consumer)
             )
             self.consume()
         else:
@@ -83,7 +84,7 @@ class DefenseBoostConsumable(Consumable):
     def remove_boost(self, consumer: Actor) -> None:
         # Assuming consumer still exists and has a fighter component
         if consumer and consumer.fighter:
-            consumer.fighter.defense_boost -= self.amount
+            consumer.fighter.remove_modifier("defense", self.amount, "boost")
             self.engine.message_log.add_message(
                 f"The effect of the {self.parent.name} wears off, and your defense returns to normal.",
                 color.boost_fade,
@@ -99,14 +100,14 @@ class PowerBoostConsumable(Consumable):
         consumer = action.entity
         if consumer.fighter:
             # Apply the power boost
-            consumer.fighter.power_boost += self.amount
+            consumer.fighter.add_modifier("power", self.amount, "boost")
             self.engine.message_log.add_message(
                 f"You use the {self.parent.name}, and your power increases by {self.amount} for {self.duration} turns!",
                 color.power_boost,
             )
             # Schedule the removal of the boost after the duration expires
             self.engine.schedule_effect(
-                self.duration, lambda: self.remove_boost(consumer)
+                self.duration, functools.partial(self.remove_boost, consumer)
             )
             self.consume()
         else:
@@ -115,7 +116,7 @@ class PowerBoostConsumable(Consumable):
     def remove_boost(self, consumer: Actor) -> None:
         # Assuming consumer still exists and has a fighter component
         if consumer and consumer.fighter:
-            consumer.fighter.power_boost -= self.amount
+            consumer.fighter.remove_modifier("power", self.amount, "boost")
             self.engine.message_log.add_message(
                 f"The effect of the {self.parent.name} wears off, and your defense returns to normal.",
                 color.boost_fade,
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional, TYPE_CHECKING
+from typing import Dict, Optional, TYPE_CHECKING
 
 from components.base_component import BaseComponent
 from equipment_types import EquipmentType
@@ -14,6 +14,8 @@ if TYPE_CHECKING:
 class Equipment(BaseComponent):
     """Component that holds the current Actors equipment."""
 
+    __slots__ = ("weapon", "ranged", "armor", "ammo", "_bonuses")
+
     parent: Actor
 
     def __init__(
@@ -27,6 +29,16 @@ class Equipment(BaseComponent):
         self.ranged = ranged
         self.armor = armor
         self.ammo = ammo
+        self._bonuses: Optional[Dict[str, int]] = None
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state["_bonuses"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        # Saves made before the bonuses were cached don't have them.
+        super().__setstate__(dict(state, _bonuses=None))
 
     @property
     def get_ammo_equippable(self) -> Optional[Ammo]:
@@ -37,19 +49,39 @@ class Equipment(BaseComponent):
         return None
 
     @property
-    def defense_bonus(self) -> int:
-        bonus = 0
+    def bonuses(self) -> Dict[str, int]:
+        """Return the sum of each bonus of the equipped items, cached until they change."""
+        if self._bonuses is None:
+            bonuses = {"power": 0, "ranged": 0, "defense": 0, "accuracy": 0}
+            for item in (self.weapon, self.ranged, self.armor):
+                if item is not None and item.equippable is not None:
+                    bonuses["power"] += item.equippable.power_bonus
+                    bonuses["ranged"] += item.equippable.ranged_bonus
+                    bonuses["defense"] += item.equippable.defense_bonus
+                    bonuses["accuracy"] += item.equippable.accuracy_bonus
+            self._bonuses = bonuses
+        return self._bonuses
+
+    def stats_changed(self) -> None:
+        """Call after changing the equipped items."""
+        self._bonuses = None
+        self.parent.fighter.stats_changed()
 
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.defense_bonus
+    @property
+    def defense_bonus(self) -> int:
+        return self.bonuses["defense"]
 
-        if self.ranged is not None and self.ranged.equippable is not None:
-            bonus += self.ranged.equippable.defense_bonus
+    @property
+    def power_bonus(self) -> int:
+        return self.bonuses["power"]
 
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.defense_bonus
+    @property
+    def ranged_bonus(self) -> int:
+        return self.bonuses["ranged"]
 
-        return bonus
+    @property
+    def accuracy_bonus(self) -> int:
+        return self.bonuses["accuracy"]
 
     @property
     def melee_damage(self) -> int:
@@ -69,51 +101,6 @@ class Equipment(BaseComponent):
 
         return damage
 
-    @property
-    def power_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.power_bonus
-
-        if self.ranged is not None and self.ranged.equippable is not None:
-            bonus += self.ranged.equippable.power_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.power_bonus
-
-        return bonus
-
-    @property
-    def ranged_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.ranged_bonus
-
-        if self.ranged is not None and self.ranged.equippable is not None:
-            bonus += self.ranged.equippable.ranged_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.ranged_bonus
-
-        return bonus
-
-    @property
-    def accuracy_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.accuracy_bonus
-
-        if self.ranged is not None and self.ranged.equippable is not None:
-            bonus += self.ranged.equippable.accuracy_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.accuracy_bonus
-
-        return bonus
-
     @property
     def has_ammo(self) -> bool:
         return self.ammo and self.ammo.equippable.amount > 0
@@ -145,6 +132,7 @@ class Equipment(BaseComponent):
             self.unequip_from_slot(slot, add_message)
 
         setattr(self, slot, item)
+        self.stats_changed()
 
         if add_message:
             self.equip_message(item.name)
@@ -156,6 +144,7 @@ class Equipment(BaseComponent):
             self.unequip_message(current_item.name)
 
         setattr(self, slot, None)
+        self.stats_changed()
 
     def toggle_equip(self, equippable_item: Item, add_message: bool = True) -> None:
         equipment_type = (
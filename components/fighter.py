@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import copy
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from actions import EnergyAction
 import color
 from render_order import RenderOrder
-from utils import triangular_dist
+from utils import Slotted, shallow_copy, triangular_dist
 
 if TYPE_CHECKING:
     from actions import Action
@@ -13,9 +14,25 @@ if TYPE_CHECKING:
     from game_map import GameMap
 
 
-class Fighter():
+class Fighter(Slotted):
     """Actor component that holds the relevant information to handle combat."""
 
+    __slots__ = (
+        "parent",
+        "max_hp",
+        "_hp",
+        "base_defense",
+        "base_power",
+        "base_damage",
+        "base_accuracy",
+        "modifiers",
+        "_stats",
+        "base_speed",
+        "bleeds",
+        "next_action",
+        "on_death",
+    )
+
     parent: Actor
 
     def __init__(
@@ -35,15 +52,43 @@ class Fighter():
         self.base_power = base_power
         self.base_damage = base_damage
         self.base_accuracy = base_accuracy
-        self.energy = 0
-        self.power_boost = 0
-        self.defense_boost = 0
+        # Temporary changes to the stats, e.g. from potions, as (stat, amount, source).
+        self.modifiers: List[Tuple[str, int, str]] = []
+        # Power, defense and accuracy with every bonus applied, see stats.
+        self._stats: Optional[Dict[str, int]] = None
         self.base_speed = base_speed
         self.bleeds = bleeds
 
         self.next_action: EnergyAction | None = None
         self.on_death = on_death
 
+    def clone(self, parent: Actor) -> Fighter:
+        """Return a copy of this component for a copy of its actor."""
+        clone = shallow_copy(self)
+        clone.parent = parent
+        clone.next_action = None
+        clone.modifiers = list(self.modifiers)
+        clone._stats = None
+        if self.on_death and self.on_death.entity is self.parent:
+            clone.on_death = copy.copy(self.on_death)
+            clone.on_death.entity = parent
+        return clone
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state["_stats"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        state = dict(state, _stats=None)
+        # Older saves kept the potion boosts in their own attributes.
+        modifiers = state.setdefault("modifiers", [])
+        for stat in ("power", "defense"):
+            boost = state.pop(f"{stat}_boost", 0)
+            if boost:
+                modifiers.append((stat, boost, "boost"))
+        super().__setstate__(state)
+
     @property
     def hp(self) -> int:
         return self._hp
@@ -62,9 +107,51 @@ class Fighter():
     def engine(self) -> Engine:
         return self.gamemap.engine
         
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Return the power, defense and accuracy with the equipment and modifiers.
+
+        They are read several times per attack, so they are only summed again after
+        stats_changed is called.
+        """
+        if self._stats is None:
+            stats = {
+                "power": self.base_power + self.power_bonus,
+                "defense": self.base_defense + self.defense_bonus,
+                "accuracy": self.base_accuracy + self.accuracy_bonus,
+            }
+            for stat, amount, _ in self.modifiers:
+                stats[stat] += amount
+            self._stats = stats
+        return self._stats
+
+    def stats_changed(self) -> None:
+        """Call after changing the base stats, the equipment or the modifiers."""
+        self._stats = None
+
+    def add_modifier(self, stat: str, amount: int, source: str) -> None:
+        self.modifiers.append((stat, amount, source))
+        self.stats_changed()
+
+    def remove_modifier(self, stat: str, amount: int, source: str) -> None:
+        if (stat, amount, source) in self.modifiers:
+            self.modifiers.remove((stat, amount, source))
+            self.stats_changed()
+
+    def modifier_total(self, stat: str) -> int:
+        return sum(amount for name, amount, _ in self.modifiers if name == stat)
+
+    @property
+    def power_boost(self) -> int:
+        return self.modifier_total("power")
+
+    @property
+    def defense_boost(self) -> int:
+        return self.modifier_total("defense")
+
     @property
     def defense(self) -> int:
-        return self.base_defense + self.defense_bonus + self.defense_boost
+        return self.stats["defense"]
 
     @property
     def melee_damage(self) -> int:
@@ -74,11 +161,11 @@ class Fighter():
 
     @property
     def power(self) -> int:
-        return self.base_power + self.power_bonus + self.power_boost
+        return self.stats["power"]
 
     @property
     def accuracy(self) -> int:
-        return self.base_accuracy + self.accuracy_bonus
+        return self.stats["accuracy"]
 
     @property
     def defense_bonus(self) -> int:
@@ -101,9 +188,6 @@ class Fighter():
         else:
             return 0
 
-    def regain_energy(self):
-        self.energy += self.base_speed
-
     def heal(self, amount: int) -> int:
         if self.hp == self.max_hp:
             return 0
@@ -135,9 +219,12 @@ class Fighter():
         self.parent.blocks_movement = False
         self.parent.ai = None
         self.parent.is_alive = False
+        self.gamemap.actor_died(self.parent)
         self.parent.name = f"remains of {self.parent.name}"
         self.parent.render_order = RenderOrder.CORPSE
 
+        self.engine.turn_manager.remove_actor(self.parent)
+
         self.engine.message_log.add_message(death_message, death_message_color)
 
         self.engine.player.level.add_xp(self.parent.level.xp_given)
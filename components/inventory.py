@@ -6,18 +6,27 @@ from components import consumable
 from components.base_component import BaseComponent
 
 if TYPE_CHECKING:
-    from entity import Actor, Item
+    from entity import Actor, Entity, Item
 
 
 class Inventory(BaseComponent):
     """Hold a list of items and sets a max capacity."""
 
+    __slots__ = ("capacity", "items")
+
     parent: Actor
 
     def __init__(self, capacity: int):
         self.capacity = capacity
         self.items: List[Item] = []
 
+    def clone(self, parent: Entity) -> Inventory:
+        clone = super().clone(parent)
+        clone.items = [item.clone() for item in self.items]
+        for item in clone.items:
+            item.parent = clone
+        return clone
+
     @property
     def healing_items(self) -> List[Item]:
         """Returns s list of healing items in the inventory."""
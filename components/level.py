@@ -9,6 +9,15 @@ if TYPE_CHECKING:
 
 
 class Level(BaseComponent):
+    __slots__ = (
+        "current_level",
+        "current_xp",
+        "total_xp",
+        "level_up_base",
+        "level_up_factor",
+        "xp_given",
+    )
+
     parent: Actor
 
     def __init__(
@@ -63,6 +72,7 @@ class Level(BaseComponent):
 
     def increase_power(self, amount: int = 1) -> None:
         self.parent.fighter.base_power += amount
+        self.parent.fighter.stats_changed()
 
         self.engine.message_log.add_message("You feel stronger!")
 
@@ -70,6 +80,7 @@ class Level(BaseComponent):
 
     def increase_defense(self, amount: int = 2) -> None:
         self.parent.fighter.base_defense += amount
+        self.parent.fighter.stats_changed()
 
         self.engine.message_log.add_message("Your movements are getting swifter!")
 
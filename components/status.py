@@ -1,17 +1,20 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING, Tuple
 from components.base_component import BaseComponent
+from utils import shallow_copy
 from status_effect import Confused, Grappled
 
 
 if TYPE_CHECKING:
-    from entity import Actor
+    from entity import Actor, Entity
     from status_effect import StatusEffect
 
 
 class Status(BaseComponent):
     """Actor component that holds the relevant information to handle combat."""
 
+    __slots__ = ("status_effects", "active_status_effects")
+
     parent: Actor
 
     def __init__(self, status_effects: list[Tuple[StatusEffect, float]] = []):
@@ -20,6 +23,14 @@ class Status(BaseComponent):
         # a list of currently active status effects of the entity
         self.active_status_effects: list[StatusEffect] = []
 
+    def clone(self, parent: Entity) -> Status:
+        # The status effects it can cause are templates, copied when applied.
+        clone = super().clone(parent)
+        clone.active_status_effects = [
+            shallow_copy(effect) for effect in self.active_status_effects
+        ]
+        return clone
+
     @property
     def grappled(self) -> bool:
         return any(
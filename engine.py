@@ -1,21 +1,19 @@
 from __future__ import annotations
 
-import lzma
-import pickle
-from typing import TYPE_CHECKING, Callable
+from typing import TYPE_CHECKING, Callable, Set
 
-from tcod import libtcodpy
 from tcod.console import Console
-from tcod.map import compute_fov
 
 import color
 import exceptions
-from global_vars import ACTION_DELAY
+import global_vars
+import profiler
 import render_functions
+import savefile
 import time
 import console
 from message_log import MessageLog
-from turn_manager import TurnManager
+from turn_manager import BASE_COST, TurnManager
 
 if TYPE_CHECKING:
     from entity import Actor
@@ -43,75 +41,96 @@ class Engine:
 
     def handle_entity_turns(self) -> None:
         """Iterate over the entities and handle their actions."""
+        # What the player sees only changes on their turn, so the actors out of sight
+        # are found all at once. The ones with nothing to do then skip their AI.
+        out_of_sight = self.get_actors_out_of_sight()
 
-        # Since the player gets the act first, when he consumes more energy than the the other actors
-        # we should give a bonus to the other actors, to simulate having more time to act.
-        # We could subtract the entity.speed from the energy used by the player to get the excess energy and add it to the entity.
-        # E.g. player uses an action of 150 energy. The entity has speed of 100: 150 - 100 = 50 extra energy to add to it.
-        # All actions cost 100 for now so theres no difference at the moment.
-
-        while self.turn_manager.has_actors:
+        while self.player.is_alive:
             entity = self.turn_manager.get_next_actor()
-            assert entity
-            can_act = True
-            entity.fighter.regain_energy()
-
-            while entity and entity.fighter.energy > 0 and can_act:
-                can_act = False
-
-                if entity is self.player and not self.player.ai:
-                    return
-
-                if entity.ai:
-                    action = entity.ai.get_action()
-                    if action and action.can_perform:
-                        try:
-                            if entity is self.player:
-                                # If the player is under a special AI behavior add a small pause
-                                # to see the player's action.
-                                time.sleep(ACTION_DELAY)
-                                # When the player AI action is handled we consider a turn complete.
-                                self.process_scheduled_effects()
-
-                                self.tick()
-
-                                self.update_fov()
-                                # Render the console
-                                root_console = console.get_root_console()
-                                if root_console:
-                                    root_console.clear()
-                                    self.render(console=root_console)
-                                    context = console.get_context()
-                                    if context:
-                                        context.present(root_console)
-                            can_act = True
-                            action.exhaust_energy()
-                            action.perform()
-                        except exceptions.Impossible:
-                            can_act = False
-
-            if entity.status:
-                try:
-                    entity.status.process_active_effects()
-                except exceptions.Impossible:
-                    pass  # Ignore impossible status exceptions from AI.
+            if entity is None:
+                return
+
+            if entity is self.player and not self.player.ai:
+                return
+
+            if entity in out_of_sight and entity.ai and entity.ai.idle_out_of_sight():
+                self.handle_actor_turn(entity, wait=True)
+                continue
+            # The actor may move, it will be checked again on its next turn.
+            out_of_sight.discard(entity)
+
+            ai_name = type(entity.ai).__name__ if entity.ai else "None"
+            with profiler.phase(ai_name, "ai", actor=entity.name, id=entity.id):
+                self.handle_actor_turn(entity)
+
+            if entity is self.player:
+                # A player controlled by an AI has updated the FOV.
+                out_of_sight = self.get_actors_out_of_sight()
+
+    def get_actors_out_of_sight(self) -> Set[Actor]:
+        actor_table = self.game_map.get_actor_table()
+        return set(actor_table.out_of_sight_actors(self.game_map.visible))
+
+    def handle_actor_turn(self, entity: Actor, wait: bool = False) -> None:
+        """Let an actor controlled by an AI take its turn, or just wait if wait is set."""
+        action = entity.ai.get_action() if entity.ai and not wait else None
+        if action:
+            try:
+                if entity is self.player:
+                    if not global_vars.HEADLESS:
+                        # If the player is under a special AI behavior add a small pause
+                        # to see the player's action.
+                        time.sleep(global_vars.ACTION_DELAY)
+                    # When the player AI action is handled we consider a turn complete.
+                    self.process_scheduled_effects()
+
+                    self.tick()
+
+                    self.update_fov()
+                    # Render the console, headless mode has nothing to present to.
+                    root_console = console.get_root_console()
+                    if root_console and not global_vars.HEADLESS:
+                        root_console.clear()
+                        with profiler.phase("render", "frame"):
+                            self.render(console=root_console)
+                        context = console.get_context()
+                        if context:
+                            with profiler.phase("present", "frame"):
+                                context.present(root_console)
+                action.perform()
+            except exceptions.Impossible:
+                pass  # A failed action still takes its time.
+
+        # Actors without an action wait for a turn.
+        self.turn_manager.end_turn(entity, action.cost if action else BASE_COST)
+
+        if entity.status:
+            try:
+                entity.status.process_active_effects()
+            except exceptions.Impossible:
+                pass  # Ignore impossible status exceptions from AI.
 
     def update_fov(self) -> None:
         """Recompute the visible area based on the players point of view."""
-        self.game_map.visible[:] = compute_fov(
-            transparency=self.game_map.tiles["transparent"],
-            pov=(self.player.x, self.player.y),
-            radius=8,
-            algorithm=libtcodpy.FOV_SYMMETRIC_SHADOWCAST,
-        )
-        # If a tile is "visible" it should be added to "explored".
-        self.game_map.explored |= self.game_map.visible
+        self.game_map.update_fov(self.player.x, self.player.y, radius=8)
 
     def render(self, console: Console) -> None:
-        self.game_map.render(console)
+        with profiler.phase("map", "render"):
+            self.game_map.render(console)
+
+        with profiler.phase("message_log", "render"):
+            self.message_log.render(console=console, x=21, y=45, width=40, height=5)
+
+        with profiler.phase("status", "render"):
+            self.render_status(console)
 
-        self.message_log.render(console=console, x=21, y=45, width=40, height=5)
+        with profiler.phase("names_at_mouse", "render"):
+            render_functions.render_names_at_mouse_location(
+                console=console, x=21, y=44, engine=self
+            )
 
+    def render_status(self, console: Console) -> None:
+        """Render the player bars, the dungeon level and the potion count."""
         # HP Bar
         render_functions.render_bar(
             console=console,
@@ -153,18 +172,16 @@ class Engine:
             potions=len(self.player.inventory.healing_items),
         )
 
-        render_functions.render_names_at_mouse_location(
-            console=console, x=21, y=44, engine=self
-        )
-
     def save_as(self, filename: str) -> None:
-        """Save this Engine instance as a compressed file."""
-        save_data = lzma.compress(pickle.dumps(self))
-        with open(filename, "wb") as f:
-            f.write(save_data)
+        """Save this Engine instance, with a compressed section per floor."""
+        savefile.save(self, filename)
 
     def schedule_effect(self, delay: int, effect: Callable) -> None:
-        """Schedule an effect to be called after a certain number of turns."""
+        """Schedule an effect to be called after a certain number of turns.
+
+        The effects are saved with the game, so they have to be picklable, e.g. a bound
+        method or a functools.partial of one, not a lambda.
+        """
         scheduled_turn = self.current_turn + delay
         self.scheduled_effects.append((scheduled_turn, effect))
 
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import copy
 import math
+import random
 from typing import Optional, Tuple, Type, TypeVar, TYPE_CHECKING, Union
 
 from render_order import RenderOrder
+import utils
 
 if TYPE_CHECKING:
     from components.ai import BaseAI
@@ -20,11 +22,24 @@ if TYPE_CHECKING:
 T = TypeVar("T", bound="Entity")
 
 
-class Entity:
+class Entity(utils.Slotted):
     """
     A generic object to represent players, enemies, items, etc.
     """
 
+    __slots__ = (
+        "x",
+        "y",
+        "char",
+        "color",
+        "name",
+        "description",
+        "blocks_movement",
+        "render_order",
+        "has_light",
+        "parent",
+    )
+
     parent: Union[GameMap, Inventory]
 
     def __init__(
@@ -53,19 +68,33 @@ class Entity:
         if parent:
             # If parent isn't provided now then it will be set later.
             self.parent = parent
-            parent.entities.add(self)
+            parent.add_entity(self)
 
     @property
     def gamemap(self) -> GameMap:
         return self.parent.gamemap
 
-    def spawn(self: T, x: int, y: int, gamemap: GameMap) -> T:
+    def clone(self: T, rng: Optional[random.Random] = None) -> T:
+        """Return a copy of this entity to place on a map, e.g. of a factory template.
+
+        The random state of the copy, e.g. of its AI, is rolled from rng, or the global
+        random state if not given.
+        """
+        return copy.copy(self)
+
+    def spawn(
+        self: T,
+        x: int,
+        y: int,
+        gamemap: GameMap,
+        rng: Optional[random.Random] = None,
+    ) -> T:
         """Spawn a copy of this instance at the given location."""
-        clone = copy.deepcopy(self)
+        clone = self.clone(rng)
         clone.x = x
         clone.y = y
         clone.parent = gamemap
-        gamemap.entities.add(clone)
+        gamemap.add_entity(clone)
 
         if isinstance(clone, Actor):
             gamemap.engine.turn_manager.add_actor(clone)
@@ -73,19 +102,23 @@ class Entity:
 
     def move(self, dx: int, dy: int) -> None:
         """Move the entity by a given amount."""
-        self.x += dx
-        self.y += dy
+        self.place(self.x + dx, self.y + dy)
 
     def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
         """Place this entity at a new location.  Handles moving across GameMaps."""
-        self.x = x
-        self.y = y
+        on_map = hasattr(self, "parent") and self.parent is self.gamemap  # Possibly uninitialized.
         if gamemap:
-            if hasattr(self, "parent"):  # Possibly uninitialized.
-                if self.parent is self.gamemap:
-                    self.gamemap.entities.remove(self)
+            if on_map:
+                self.gamemap.remove_entity(self)
+            self.x = x
+            self.y = y
             self.parent = gamemap
-            gamemap.entities.add(self)
+            gamemap.add_entity(self)
+        elif on_map:
+            self.gamemap.move_entity(self, x, y)
+        else:
+            self.x = x
+            self.y = y
 
     def distance(self, x: int, y: int) -> float:
         """
@@ -97,6 +130,19 @@ class Entity:
 class Actor(Entity):
     """An entity that can act."""
 
+    __slots__ = (
+        "id",
+        "is_alive",
+        "original_ai",
+        "ai",
+        "equipment",
+        "fighter",
+        "inventory",
+        "level",
+        "status",
+        "remains_color",
+    )
+
     _id_counter = 0
 
     def __init__(
@@ -157,9 +203,7 @@ class Actor(Entity):
 
     def __copy__(self):
         # Create a shallow copy of the actor
-        cls = self.__class__
-        new_actor = cls.__new__(cls)
-        new_actor.__dict__.update(self.__dict__)
+        new_actor = utils.shallow_copy(self)
 
         # Assign a new unique ID
         new_actor.id = Actor._id_counter
@@ -173,7 +217,7 @@ class Actor(Entity):
         new_actor = cls.__new__(cls)
         memo[id(self)] = new_actor
 
-        for k, v in self.__dict__.items():
+        for k, v in self.__getstate__().items():
             setattr(new_actor, k, copy.deepcopy(v, memo))
 
         # Assign a new unique ID
@@ -182,6 +226,34 @@ class Actor(Entity):
 
         return new_actor
 
+    def clone(self, rng: Optional[random.Random] = None) -> Actor:
+        """Return a copy of this actor with its own components.
+
+        Much faster than deepcopy, since only the mutable state of the components is
+        copied and the rest, like the status effects it can cause, is shared.
+        """
+        clone = copy.copy(self)
+        clone.fighter = self.fighter.clone(clone)
+        clone.level = self.level.clone(clone)
+        clone.status = self.status.clone(clone)
+        clone.inventory = self.inventory.clone(clone)
+
+        # Equip the copies of the equipped items.
+        item_copies = {
+            id(item): item_copy
+            for item, item_copy in zip(self.inventory.items, clone.inventory.items)
+        }
+        clone.equipment = self.equipment.clone(clone)
+        for slot in ("weapon", "armor", "ranged", "ammo"):
+            item = getattr(self.equipment, slot)
+            if item is not None:
+                item_copy = item_copies.get(id(item)) or item.clone()
+                setattr(clone.equipment, slot, item_copy)
+        clone.equipment.stats_changed()
+
+        clone.ai = self.ai.clone(clone, rng) if self.ai else None
+        return clone
+
     def restore_ai(self):
         """Restore the original AI."""
         if self.original_ai:
@@ -191,6 +263,8 @@ class Actor(Entity):
 
 
 class Item(Entity):
+    __slots__ = ("consumable", "equippable")
+
     def __init__(
         self,
         *,
@@ -222,3 +296,11 @@ class Item(Entity):
 
         if self.equippable:
             self.equippable.parent = self
+
+    def clone(self, rng: Optional[random.Random] = None) -> Item:
+        clone = utils.shallow_copy(self)
+        if self.consumable:
+            clone.consumable = self.consumable.clone(clone)
+        if self.equippable:
+            clone.equippable = self.equippable.clone(clone)
+        return clone
@@ -1,7 +1,8 @@
-from typing import Optional
+from typing import List, Optional
 import tcod
 from actions import SpawnEnemiesAction
 import actor_factories
+import autosave
 from event_handlers.ask_user_event_handler import AskUserEventHandler
 
 from event_handlers.base_event_handler import ActionOrHandler
@@ -20,8 +21,9 @@ class DebugMenuEventHandler(AskUserEventHandler):
         """Render the debug menu, which displays the options for debugging."""
         super().on_render(console)
 
-        height = len(self.debug_options) + 2
-        width = max(len(option) for option in self.debug_options) + 6
+        stats = self.autosave_stats()
+        height = len(self.debug_options) + len(stats) + 2
+        width = max(len(line) for line in self.debug_options + stats) + 6
 
         x = console.width // 2 - width // 2
         y = console.height // 2 - height // 2
@@ -42,6 +44,25 @@ class DebugMenuEventHandler(AskUserEventHandler):
             option_string = f"({option_key}) {option}"
             console.print(x + 1, y + i + 1, option_string)
 
+        for i, line in enumerate(stats, len(self.debug_options)):
+            console.print(x + 1, y + i + 1, line, fg=(128, 128, 128))
+
+    def autosave_stats(self) -> List[str]:
+        """Return the metrics of the last autosave."""
+        autosaver = autosave.get_autosaver()
+        if autosaver is None:
+            return []
+        if autosaver.saves == 0:
+            return ["Autosave: saving..." if autosaver.saving else "Autosave: none yet"]
+        if autosaver.error:
+            return [f"Autosave failed: {autosaver.error.splitlines()[-1]}"]
+        return [
+            f"Autosaves: {autosaver.saves}{' (saving)' if autosaver.saving else ''}",
+            f"Snapshot: {autosaver.snapshot_seconds * 1000:.1f}ms",
+            f"Write: {autosaver.write_seconds * 1000:.1f}ms",
+            f"Size: {autosaver.size / 1024:.0f}KB",
+        ]
+
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
         key = event.sym
         index = key - tcod.event.KeySym.a
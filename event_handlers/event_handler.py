@@ -5,8 +5,11 @@ from typing import Optional
 
 import tcod.event
 from actions import Action
+import autosave
 import exceptions
 import color
+import profiler
+import replay
 
 from engine import Engine
 from event_handlers.base_event_handler import BaseEventHandler
@@ -51,32 +54,43 @@ class EventHandler(BaseEventHandler):
         if action is None:
             return False
 
+        recorder = replay.get_recorder()
+        if recorder:
+            recorder.record_action(self.engine, action)
+
         self.engine.player.fighter.next_action = action
 
         # Handle player turn first
         player = self.engine.player
 
-        player.fighter.regain_energy()
-
         try:
             # If the player is under a special AI behavior ignore the user action
             action = player.fighter.next_action
-            action.perform()
-            action.exhaust_energy()
+            with profiler.phase("player_action", action=type(action).__name__):
+                action.perform()
+                action.exhaust_energy()
         except exceptions.Impossible as exc:
             # If the action results in an impossible error, we want to retry the turn.
             self.engine.message_log.add_message(exc.args[0], color.impossible)
             return
 
-        player.status.process_active_effects()
+        with profiler.phase("status_effects"):
+            player.status.process_active_effects()
 
-        self.engine.handle_entity_turns()
+        with profiler.phase("handle_entity_turns"):
+            self.engine.handle_entity_turns()
 
-        self.engine.process_scheduled_effects()
+        with profiler.phase("process_scheduled_effects"):
+            self.engine.process_scheduled_effects()
 
         self.engine.tick()
 
-        self.engine.update_fov()
+        with profiler.phase("update_fov"):
+            self.engine.update_fov()
+
+        autosaver = autosave.get_autosaver()
+        if autosaver and player.is_alive and not self.engine.victory:
+            autosaver.update(self.engine)
 
         return True
 
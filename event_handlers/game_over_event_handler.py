@@ -7,6 +7,7 @@ from typing import Optional
 import tcod.event
 from tcod import libtcodpy
 
+import autosave
 import color
 from event_handlers.event_handler import EventHandler
 from event_handlers.main_game_event_handler import MainGameEventHandler
@@ -14,6 +15,15 @@ import exceptions
 from graveyard import create_graveyard_entry
 
 
+def delete_save() -> None:
+    """Delete the active save file, after any autosave in progress is written."""
+    autosaver = autosave.get_autosaver()
+    if autosaver:
+        autosaver.wait()
+    if os.path.exists("savegame.sav"):
+        os.remove("savegame.sav")
+
+
 class GameOverEventHandler(EventHandler):
     """Event handler for the game over screen."""
 
@@ -45,8 +55,7 @@ class GameOverEventHandler(EventHandler):
     def on_quit(self) -> None:
         """Handle exiting out of a finished game."""
         create_graveyard_entry(self.engine.player, self.engine)
-        if os.path.exists("savegame.sav"):
-            os.remove("savegame.sav")  # Deletes the active save file.
+        delete_save()
         raise exceptions.QuitWithoutSaving()  # Avoid saving a finished game.
 
     def on_restart(self) -> MainGameEventHandler:
@@ -54,8 +63,7 @@ class GameOverEventHandler(EventHandler):
         from setup_game import new_game  # pylint: disable=import-outside-toplevel
 
         create_graveyard_entry(self.engine.player, self.engine)
-        if os.path.exists("savegame.sav"):
-            os.remove("savegame.sav")  # Deletes the active save file.
+        delete_save()
 
         return MainGameEventHandler(new_game())
 
@@ -116,16 +124,14 @@ class VictoryEventHandler(EventHandler):
 
     def on_quit(self) -> None:
         """Handle exiting out of a finished game."""
-        if os.path.exists("savegame.sav"):
-            os.remove("savegame.sav")  # Deletes the active save file.
+        delete_save()
         raise exceptions.QuitWithoutSaving()  # Avoid saving a finished game.
 
     def on_restart(self) -> MainGameEventHandler:
         """Handle restarting the game."""
         from setup_game import new_game  # pylint: disable=import-outside-toplevel
 
-        if os.path.exists("savegame.sav"):
-            os.remove("savegame.sav")  # Deletes the active save file.
+        delete_save()
 
         return MainGameEventHandler(new_game())
 
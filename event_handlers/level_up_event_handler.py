@@ -1,6 +1,7 @@
 from typing import Optional
 import tcod
 import color
+import replay
 from event_handlers.ask_user_event_handler import AskUserEventHandler
 from event_handlers.base_event_handler import ActionOrHandler
 
@@ -52,6 +53,11 @@ class LevelUpEventHandler(AskUserEventHandler):
         index = key - tcod.event.KeySym.a
 
         if 0 <= index <= 2:
+            recorder = replay.get_recorder()
+            if recorder:
+                recorder.record_level_up(
+                    self.engine, ("max_hp", "power", "defense")[index]
+                )
             if index == 0:
                 player.level.increase_max_hp()
             elif index == 1:
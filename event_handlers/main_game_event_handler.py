@@ -39,7 +39,7 @@ class MainGameEventHandler(EventHandler):
             and game_map.explored[event.tile.x, event.tile.y]
         ):
             if (
-                game_map.tiles["walkable"][event.tile.x, event.tile.y]
+                tile_types.WALKABLE[game_map.tiles[event.tile.x, event.tile.y]]
                 or game_map.tiles[event.tile.x, event.tile.y] in tile_types.door_tiles
             ):
                 return MoveToTileAction(self.engine.player, event.tile.x, event.tile.y)
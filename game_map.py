@@ -1,4 +1,5 @@
 from __future__ import annotations
+from collections import OrderedDict
 import itertools
 
 import random
@@ -7,10 +8,12 @@ from typing import Iterable, Iterator, List, Optional, TYPE_CHECKING, Tuple
 import numpy as np
 import tcod  # type: ignore
 from tcod.console import Console
+from tcod.map import compute_fov
 from components.consumable import HealingConsumable
 from map_gen.rectangular_room import RectRoom
 
 import tile_types
+from actor_table import ActorTable
 from entity import Actor, Item
 
 if TYPE_CHECKING:
@@ -21,6 +24,30 @@ if TYPE_CHECKING:
 class GameMap:
     """Class to manage map mechanics, and render the map to the console."""
 
+    # Built on demand, the class defaults cover maps loaded from saves made before the index.
+    entity_cells: Optional[dict[tuple[int, int], list[Entity]]] = None
+    entity_locations: Optional[dict[Entity, tuple[int, int]]] = None
+    occupied: Optional[np.ndarray] = None
+    actor_table: Optional[ActorTable] = None
+    player_distance: Optional[np.ndarray] = None
+    player_distance_key: Optional[tuple[int, int, int]] = None
+    static_light_distance: Optional[np.ndarray] = None
+    # Bumped whenever a tile changes its transparency, FOV results are cached against it.
+    transparency_version = 0
+    fov_cache: Optional[OrderedDict] = None
+    fov_key: Optional[tuple[int, int, int, int]] = None
+
+    # Bumped whenever a tile changes its walkability, the regions are cached against it.
+    walkable_version = 0
+    region_labels: Optional[np.ndarray] = None
+    region_tiles: Optional[List[np.ndarray]] = None
+    region_key: Optional[int] = None
+
+    # Rooms and layouts the generator rejected and tried again, see mapgen_benchmark.
+    generation_retries = 0
+
+    FOV_CACHE_SIZE = 16
+
     def __init__(
         self,
         engine: Engine,
@@ -35,10 +62,18 @@ class GameMap:
         """
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
+        self.entities: set[Entity] = set()
+        # Spatial index of the entities by location, kept in sync by the entity methods.
+        self.entity_cells = None
+        self.entity_locations = None
+        for entity in entities:
+            self.add_entity(entity)
         self.fill_wall_tile = fill_wall_tile
-        self.tiles = np.full((width, height), fill_value=fill_wall_tile, order="F")
-        self.theme_rooms = set[RectRoom]()
+        # Tile ids, see the registry in tile_types for the data of each tile.
+        self.tiles = np.full(
+            (width, height), fill_value=fill_wall_tile, dtype=np.uint8, order="F"
+        )
+        self.theme_rooms: List[RectRoom] = []
         self.bloody_tiles = set()
         self.name = name
 
@@ -52,17 +87,191 @@ class GameMap:
         self.upstairs_location: tuple[int, int] = (0, 0)
         self.downstairs_location: tuple[int, int] = (0, 0)
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The index is rebuilt after loading, this also handles saves made before it existed.
+        state["entity_cells"] = None
+        state["entity_locations"] = None
+        state["occupied"] = None
+        state["actor_table"] = None
+        state["player_distance"] = None
+        state["player_distance_key"] = None
+        state["static_light_distance"] = None
+        state["fov_cache"] = None
+        state["fov_key"] = None
+        state["region_labels"] = None
+        state["region_tiles"] = None
+        state["region_key"] = None
+        return state
+
+    def __setstate__(self, state):
+        # Saves made before the tile ids stored the full tile struct for every cell.
+        if state["tiles"].dtype == tile_types.tile_dt:
+            state["tiles"] = tile_types.ids_from_struct(state["tiles"])
+            state["fill_wall_tile"] = int(
+                tile_types.ids_from_struct(np.asarray(state["fill_wall_tile"]))
+            )
+        self.__dict__.update(state)
+
+    def set_tile(self, x: int, y: int, tile: int) -> None:
+        """Change a tile during play, so the cached FOV and regions are recomputed if needed."""
+        if tile_types.TRANSPARENT[tile] != tile_types.TRANSPARENT[self.tiles[x, y]]:
+            self.transparency_version += 1
+        if tile_types.WALKABLE[tile] != tile_types.WALKABLE[self.tiles[x, y]]:
+            self.walkable_version += 1
+        self.tiles[x, y] = tile
+
+    @property
+    def walkable(self) -> np.ndarray:
+        """Boolean array of the walkable tiles."""
+        return tile_types.WALKABLE[self.tiles]
+
+    @property
+    def transparent(self) -> np.ndarray:
+        """Boolean array of the tiles that don't block FOV."""
+        return tile_types.TRANSPARENT[self.tiles]
+
     @property
     def gamemap(self) -> GameMap:
         return self
 
+    def _build_index(self) -> None:
+        # Entities might not be fully unpickled yet when the map is, so this is done lazily.
+        self.entity_cells = {}
+        self.entity_locations = {}
+        self.occupied = np.zeros((self.width, self.height), dtype=bool, order="F")
+        self.actor_table = ActorTable()
+        for entity in self.entities:
+            self._add_to_cell(entity)
+            if isinstance(entity, Actor):
+                self.actor_table.add(entity)
+
+    def add_entity(self, entity: Entity) -> None:
+        """Add an entity to this map at its current location."""
+        if self.entity_cells is None:
+            self._build_index()
+        if entity in self.entities:
+            self._remove_from_cell(entity)
+        self.entities.add(entity)
+        self._add_to_cell(entity)
+        if isinstance(entity, Actor):
+            self.get_actor_table().add(entity)
+        self._light_changed(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        """Remove an entity from this map."""
+        if self.entity_cells is None:
+            self._build_index()
+        if entity in self.entities:
+            self.entities.remove(entity)
+            self._remove_from_cell(entity)
+            if isinstance(entity, Actor):
+                self.get_actor_table().remove(entity)
+            self._light_changed(entity)
+
+    def move_entity(self, entity: Entity, x: int, y: int) -> None:
+        """Change the location of an entity on this map, keeping the index up to date."""
+        if self.entity_cells is None:
+            self._build_index()
+        entity.x, entity.y = x, y
+        if entity in self.entities:
+            self._remove_from_cell(entity)
+            self._add_to_cell(entity)
+            if isinstance(entity, Actor):
+                self.get_actor_table().move(entity)
+            self._light_changed(entity)
+
+    def _add_to_cell(self, entity: Entity) -> None:
+        assert self.entity_cells is not None and self.entity_locations is not None
+        assert self.occupied is not None
+        location = entity.x, entity.y
+        self.entity_locations[entity] = location
+        self.entity_cells.setdefault(location, []).append(entity)
+        if self.in_bounds(*location):
+            self.occupied[location] = True
+
+    def _remove_from_cell(self, entity: Entity) -> None:
+        assert self.entity_cells is not None and self.entity_locations is not None
+        assert self.occupied is not None
+        location = self.entity_locations.pop(entity)
+        cell = self.entity_cells[location]
+        cell.remove(entity)
+        if not cell:
+            del self.entity_cells[location]
+            if self.in_bounds(*location):
+                self.occupied[location] = False
+
+    def get_actor_table(self) -> ActorTable:
+        if self.entity_cells is None:
+            self._build_index()
+        assert self.actor_table is not None
+        return self.actor_table
+
+    def actor_died(self, actor: Actor) -> None:
+        if self.actor_table is not None:
+            self.actor_table.set_alive(actor)
+
+    def _light_changed(self, entity: Entity) -> None:
+        if entity.has_light and not isinstance(entity, Actor):
+            self.static_light_distance = None
+
+    def get_entities_at_location(self, x: int, y: int) -> List[Entity]:
+        if self.entity_cells is None:
+            self._build_index()
+        assert self.entity_cells is not None
+        return self.entity_cells.get((x, y), [])
+
+    def get_player_distance_map(self) -> np.ndarray:
+        """Return the walking distance from every tile to the player.
+
+        It is computed once per turn and shared by all the actors chasing the player.
+        Unreachable tiles have the maximum int32 value.
+        """
+        player = self.engine.player
+        key = (self.engine.current_turn, player.x, player.y)
+        if self.player_distance is not None and self.player_distance_key == key:
+            return self.player_distance
+
+        cost = self.walkable.astype(np.int32)
+        for entity in self.entities:
+            # Same as in BaseAI.get_path_to, avoid crowding behind other blocking entities.
+            if entity.blocks_movement and cost[entity.x, entity.y]:
+                cost[entity.x, entity.y] += 10
+
+        distance = tcod.path.maxarray((self.width, self.height), dtype=np.int32, order="F")
+        distance[player.x, player.y] = 0
+        tcod.path.dijkstra2d(distance, cost, 2, 3, out=distance)
+
+        self.player_distance = distance
+        self.player_distance_key = key
+        return distance
+
+    def get_step_towards_player(self, x: int, y: int) -> Optional[Tuple[int, int]]:
+        """Return the free adjacent tile that gets closest to the player, if any gets closer."""
+        distance = self.get_player_distance_map()
+        step = None
+        best = distance[x, y]
+        for step_x, step_y in self.get_walkable_adjacent_tiles(x, y):
+            if distance[step_x, step_y] < best and not self.get_blocking_entity_at_location(
+                step_x, step_y
+            ):
+                best = distance[step_x, step_y]
+                step = step_x, step_y
+        return step
+
     @property
     def actors(self) -> Iterator[Actor]:
-        """Iterate over this maps living actors."""
-        yield from (
-            entity
-            for entity in self.entities
-            if isinstance(entity, Actor) and entity.is_alive
+        """Iterate over this maps living actors.
+
+        In id order rather than set order, so a game plays the same for a seed.
+        """
+        yield from sorted(
+            (
+                entity
+                for entity in self.entities
+                if isinstance(entity, Actor) and entity.is_alive
+            ),
+            key=lambda actor: actor.id,
         )
 
     @property
@@ -84,21 +293,16 @@ class GameMap:
         location_x: int,
         location_y: int,
     ) -> Optional[Entity]:
-        for entity in self.entities:
-            if (
-                entity is not None
-                and entity.blocks_movement
-                and entity.x == location_x
-                and entity.y == location_y
-            ):
+        for entity in self.get_entities_at_location(location_x, location_y):
+            if entity.blocks_movement:
                 return entity
 
         return None
 
     def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+        for entity in self.get_entities_at_location(x, y):
+            if isinstance(entity, Actor) and entity.is_alive:
+                return entity
 
         return None
 
@@ -106,61 +310,126 @@ class GameMap:
         return self.visible[x, y]
 
     def get_actors_in_fov(self):
-        actors = set([])
-        for actor in self.actors:
-            if self.is_in_fov(actor.x, actor.y):
-                actors.add(actor)
-        return actors
+        return set(self.get_actor_table().visible_actors(self.visible))
 
     def get_closest_actor(self, x: int, y: int) -> Optional[Actor]:
-        closest_distance = 100
-        closest_actor = None
-        for actor in self.get_actors_in_fov() - {self.engine.player}:
-            if actor.x == x and actor.y == y:
-                return actor
-            dx = actor.x - x
-            dy = actor.y - y
-            distance = distance = max(abs(dx), abs(dy))
-            if distance < closest_distance:
-                closest_distance = distance
-                closest_actor = actor
-        return closest_actor
+        """Return the closest visible actor other than the player, by Chebyshev distance."""
+        return self.get_actor_table().closest_visible_actor(
+            x, y, self.visible, exclude=self.engine.player, max_distance=100
+        )
 
     def get_item_at_location(self, x: int, y: int) -> Optional[Item]:
-        return next((item for item in self.items if item.x == x and item.y == y), None)
+        for entity in self.get_entities_at_location(x, y):
+            if isinstance(entity, Item):
+                return entity
+
+        return None
 
     def get_random_empty_tile(
-        self, x: int, y: int, width: int, height: int
+        self,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        rng: Optional[random.Random] = None,
     ) -> Optional[tuple[int, int]]:
-        for _ in range(100):
-            x = min(np.random.randint(x, x + width - 1), self.width - 1)
-            y = min(np.random.randint(y, y + height - 1), self.height - 1)
-            if (
-                self.tiles[x, y]["walkable"]
-                and not self.get_blocking_entity_at_location(x, y)
-                and not self.get_actor_at_location(x, y)
-                and not self.get_item_at_location(x, y)
-            ):
-                return x, y
+        tiles = self.sample_free_tiles(1, x, y, x + width - 1, y + height - 1, rng)
+        return tiles[0] if tiles else None
+
+    def get_free_tiles(self, x1: int, y1: int, x2: int, y2: int) -> np.ndarray:
+        """Return which tiles of the [x1:x2, y1:y2] area are walkable and without entities."""
+        if self.entity_cells is None:
+            self._build_index()
+        assert self.occupied is not None
+        walkable = tile_types.WALKABLE[self.tiles[x1:x2, y1:y2]]
+        return walkable & ~self.occupied[x1:x2, y1:y2]
+
+    def sample_free_tiles(
+        self,
+        count: int,
+        x1: int = 0,
+        y1: int = 0,
+        x2: Optional[int] = None,
+        y2: Optional[int] = None,
+        rng: Optional[random.Random] = None,
+    ) -> List[Tuple[int, int]]:
+        """Return up to count distinct random free tiles from the [x1:x2, y1:y2] area.
+
+        The area is clipped to the map, and fewer tiles are returned if the area doesn't
+        have enough free ones. The tiles are drawn from rng, or the global random state.
+        """
+        x1, y1 = max(x1, 0), max(y1, 0)
+        x2 = self.width if x2 is None else min(x2, self.width)
+        y2 = self.height if y2 is None else min(y2, self.height)
+        if count <= 0 or x1 >= x2 or y1 >= y2:
+            return []
+
+        free = np.flatnonzero(self.get_free_tiles(x1, y1, x2, y2))
+        chosen = free[(rng or random).sample(range(len(free)), min(count, len(free)))]
+        area_height = y2 - y1
+        return [(x1 + int(i) // area_height, y1 + int(i) % area_height) for i in chosen]
 
     def in_bounds(self, x: int, y: int) -> bool:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def get_region_labels(self) -> np.ndarray:
+        """Return the label of the walkable region of every tile, 0 for unwalkable tiles.
+
+        Regions are connected through cardinal moves. The labels are computed once and
+        cached until a tile changes its walkability.
+        """
+        if self.region_labels is not None and self.region_key == self.walkable_version:
+            return self.region_labels
+
+        walkable = self.walkable
+        cost = walkable.astype(np.int8)
+        labels = np.zeros((self.width, self.height), dtype=np.int32, order="F")
+        # Index 0 is the unwalkable "region", so the labels can index this list.
+        region_tiles: List[np.ndarray] = [np.empty((0, 2), dtype=np.intp)]
+        unlabeled = walkable.copy()
+        while unlabeled.any():
+            x, y = np.unravel_index(np.argmax(unlabeled), unlabeled.shape)
+            distance = tcod.path.maxarray((self.width, self.height), order="F")
+            distance[x, y] = 0
+            tcod.path.dijkstra2d(distance, cost, 1, 0, out=distance)
+            reached = distance != np.iinfo(distance.dtype).max
+            labels[reached] = len(region_tiles)
+            region_tiles.append(np.argwhere(reached))
+            unlabeled &= ~reached
+
+        self.region_labels = labels
+        self.region_tiles = region_tiles
+        self.region_key = self.walkable_version
+        return labels
+
+    def get_region_tiles(self, x: int, y: int) -> np.ndarray:
+        """Return an (n, 2) array with the tiles of the walkable region containing (x, y)."""
+        label = self.get_region_labels()[x, y]
+        assert self.region_tiles is not None
+        return self.region_tiles[label]
+
+    def is_same_region(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        """Return True if both tiles are walkable and connected to each other."""
+        labels = self.get_region_labels()
+        return labels[start] != 0 and labels[start] == labels[end]
+
+    def get_random_tile_in_region(self, x: int, y: int) -> Optional[Tuple[int, int]]:
+        """Return a random tile of the walkable region containing (x, y).
+
+        Returns None if (x, y) isn't walkable.
+        """
+        tiles = self.get_region_tiles(x, y)
+        if len(tiles) == 0:
+            return None
+        tile_x, tile_y = tiles[random.randrange(len(tiles))]
+        return int(tile_x), int(tile_y)
+
     def get_walkable_tiles_from_position(
         self, origin: Tuple[int, int], game_map: GameMap
     ) -> List[Tuple[int, int]]:
-        """Perform a flood-fill to find which areas the current position has access to."""
-        walkable_tiles = []
-        stack = [(origin[0], origin[1])]
-        while stack:
-            x, y = stack.pop()
-            if (x, y) not in walkable_tiles and game_map.tiles["walkable"][x, y]:
-                walkable_tiles.append((x, y))
-                stack.extend(
-                    [(x + dx, y + dy) for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]]
-                )
-        return walkable_tiles
+        """Find which areas the current position has access to."""
+        return [(int(x), int(y)) for x, y in game_map.get_region_tiles(*origin)]
 
     def get_walkable_adjacent_tiles(self, x: int, y: int) -> Iterator[tuple[int, int]]:
         """Get all walkable adjacent tiles to the given (x, y) coordinate."""
@@ -169,7 +438,7 @@ class GameMap:
                 continue
             if not self.in_bounds(x + x_offset, y + y_offset):
                 continue
-            if not self.tiles[x + x_offset, y + y_offset]["walkable"]:
+            if not tile_types.WALKABLE[self.tiles[x + x_offset, y + y_offset]]:
                 continue
             yield x + x_offset, y + y_offset
 
@@ -262,36 +531,72 @@ class GameMap:
 
         return suitable_walls
 
-    def place_door(self, room: RectRoom):
+    def place_door(self, room: RectRoom, rng: Optional[random.Random] = None):
         """Place a door on a random suitable wall of the room."""
         suitable_walls = self._find_suitable_walls(room)
         if suitable_walls:
-            chosen_wall = random.choice(suitable_walls)
-            self.tiles[chosen_wall] = tile_types.closed_door
+            x, y = (rng or random).choice(suitable_walls)
+            self.set_tile(x, y, tile_types.closed_door)
+
+    def update_fov(self, x: int, y: int, radius: int) -> None:
+        """Set the visible tiles from the (x, y) point of view and add them to explored.
+
+        Nothing is done if neither the point of view nor the transparency changed since
+        the last call. The FOV is only computed on the square around the point of view
+        that the radius can reach, and recent results are kept for stepping back.
+        """
+        key = (x, y, radius, self.transparency_version)
+        if key == self.fov_key:
+            return
+
+        x1, y1 = max(x - radius, 0), max(y - radius, 0)
+        x2, y2 = min(x + radius + 1, self.width), min(y + radius + 1, self.height)
+        if self.fov_cache is None:
+            self.fov_cache = OrderedDict()
+        window_visible = self.fov_cache.get(key)
+        if window_visible is None:
+            window_visible = compute_fov(
+                transparency=tile_types.TRANSPARENT[self.tiles[x1:x2, y1:y2]],
+                pov=(x - x1, y - y1),
+                radius=radius,
+                algorithm=tcod.libtcodpy.FOV_SYMMETRIC_SHADOWCAST,
+            )
+            self.fov_cache[key] = window_visible
+            if len(self.fov_cache) > self.FOV_CACHE_SIZE:
+                self.fov_cache.popitem(last=False)
+        else:
+            self.fov_cache.move_to_end(key)
+
+        self.visible[:] = False
+        self.visible[x1:x2, y1:y2] = window_visible
+        # If a tile is "visible" it should be added to "explored".
+        self.explored[x1:x2, y1:y2] |= window_visible
+        self.fov_key = key
 
     def render_basic(self, console: Console) -> None:
-        console.rgb[0 : self.width, 0 : self.height] = self.tiles["light"]
+        console.rgb[0 : self.width, 0 : self.height] = tile_types.LIGHT[self.tiles]
 
     def render_with_light(self, console: Console) -> None:
         """Render the map with the light effect. Entities with the has_light will generate light."""
         dim_adjustment = 0.4  # Increase this value to decrease the dimming effect
 
-        lights = [entity for entity in self.entities if entity.has_light]
+        # Actors carry their lights around, the rest of the lights don't move.
+        dynamic_lights = [
+            entity
+            for entity in self.entities
+            if entity.has_light and isinstance(entity, Actor)
+        ]
 
-        # Calculate the distance from each light object to each tile on the map
-        distances = np.zeros((self.width, self.height, len(lights)))
-        for i, light in enumerate(lights):
-            distances[:, :, i] = np.sqrt(
-                (np.arange(self.width)[:, None] - light.x) ** 2
-                + (np.arange(self.height) - light.y) ** 2
-            )
+        # Distance from each tile to the closest light object
+        distance = self.get_static_light_distance()
+        for light in dynamic_lights:
+            distance = np.minimum(distance, self.get_distance_from(light.x, light.y))
 
         # Calculate the dim factor for each tile based on the distance to the closest light object
-        dim_factor = np.min(distances, axis=2)
-        dim_factor = self.calculate_dim_factor(dim_factor, dim_adjustment)
+        dim_factor = self.calculate_dim_factor(distance, dim_adjustment)
 
         # Apply the dimming effect to the light colors
-        light_colors = self.tiles["light"]
+        light_colors = tile_types.LIGHT[self.tiles]
         dimmed_light_colors = np.empty_like(light_colors)
         dimmed_light_colors["ch"] = light_colors["ch"]
         for color in ["fg", "bg"]:
@@ -303,7 +608,7 @@ class GameMap:
         # Render the dimmed tiles
         console.rgb[0 : self.width, 0 : self.height] = np.select(
             condlist=[self.visible, self.explored],
-            choicelist=[dimmed_light_colors, self.tiles["dark"]],
+            choicelist=[dimmed_light_colors, tile_types.DARK[self.tiles]],
             default=tile_types.SHROUD,
         )
 
@@ -317,16 +622,7 @@ class GameMap:
         )
 
         for entity in entities_sorted_for_rendering:
-            # Calculate the distance from the entity to the closest light object
-            distances = np.sqrt(
-                list(
-                    (entity.x - light.x) ** 2 + (entity.y - light.y) ** 2
-                    for light in lights
-                )
-            )
-            distance = np.min(distances)
-
-            entity_dim_factor = self.calculate_dim_factor(distance, dim_adjustment)
+            entity_dim_factor = dim_factor[entity.x, entity.y]
 
             # Apply the dim factor to the entity's color
             dimmed_color = tuple(
@@ -339,6 +635,27 @@ class GameMap:
             if self.visible[entity.x, entity.y]:
                 console.print(entity.x, entity.y, entity.char, fg=dimmed_color)
 
+    def get_distance_from(self, x: int, y: int) -> np.ndarray:
+        """Return the distance from every tile on the map to the given (x, y) coordinate."""
+        return np.sqrt(
+            (np.arange(self.width)[:, None] - x) ** 2
+            + (np.arange(self.height) - y) ** 2
+        )
+
+    def get_static_light_distance(self) -> np.ndarray:
+        """Return the distance from every tile to the closest light that isn't an actor.
+
+        It is cached until one of those lights is added, removed or moved.
+        """
+        if self.static_light_distance is None:
+            distance = np.full((self.width, self.height), np.inf)
+            for entity in self.entities:
+                if entity.has_light and not isinstance(entity, Actor):
+                    np.minimum(distance, self.get_distance_from(entity.x, entity.y), out=distance)
+            self.static_light_distance = distance
+
+        return self.static_light_distance
+
     def calculate_dim_factor(
         self, distance: float | np.ndarray, adjustment: float
     ) -> np.ndarray:
@@ -353,14 +670,11 @@ class GameMap:
         self, start_x: int, start_y: int, end_x: int, end_y: int
     ) -> bool:
         """Check if a straight line path is clear of obstacles."""
-        tiles = self.tiles  # Assumes you have a tiles structure similar to get_path_to
-        walkable = tiles["walkable"]
-
         # Bresenham's Line Algorithm
         points = tcod.los.bresenham(start=(start_x, start_y), end=(end_x, end_y))
         for x, y in points:
             # If the tile is not walkable, there is an obstacle in the way.
-            if not walkable[x, y]:
+            if not tile_types.WALKABLE[self.tiles[x, y]]:
                 return False
         return True
 
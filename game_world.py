@@ -1,9 +1,18 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, List
+from concurrent.futures import Future, ProcessPoolExecutor
+import random
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
+
+import actor_factories
+import global_vars
+import savefile
 import utils
 from engine import Engine
+from entity import Actor
 from exceptions import Impossible
+from game_map import GameMap
 import color
 from map_gen import procgen
 from map_gen.debug_room import create_debug_room
@@ -11,9 +20,7 @@ from map_gen.generate_cave import generate_cave
 from map_gen.generate_dungeon import generate_dungeon
 from map_gen.top_floor import create_top_floor
 from map_gen.generate_cathedral import generate_cathedral
-
-if TYPE_CHECKING:
-    from game_map import GameMap
+from turn_manager import TurnManager
 
 prefab_maps = {
     "debug_room": create_debug_room,
@@ -38,12 +45,104 @@ floor_map_generator = {
     # Add more floors and corresponding functions with parameters as needed.
 }
 
+# Worker process that generates the next floor while the current one is played.
+_floor_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_floor_generator(floor: int) -> Callable[..., GameMap]:
+    """Return the generator function for the given floor."""
+    for generator_floor in sorted(floor_map_generator.keys(), reverse=True):
+        if floor >= generator_floor:
+            return floor_map_generator[generator_floor]
+
+    # If no generator is found, default to generate_dungeon
+    return generate_dungeon
+
+
+def new_floor_engine(floor: int, map_width: int, map_height: int) -> Engine:
+    """
+    Return an engine to generate a floor outside of the game. Generators place the
+    player and spawn actors into the turn manager, so it has stand-ins for those.
+    """
+    engine = Engine(player=actor_factories.player.clone())
+    engine.turn_manager = TurnManager()
+    engine.game_world = GameWorld(
+        engine=engine,
+        map_width=map_width,
+        map_height=map_height,
+        current_floor=floor,
+    )
+    return engine
+
+
+def floor_seed(world_seed: int, floor: int) -> int:
+    """Return the seed of a floor, which only depends on the world seed and the floor."""
+    return int(np.random.SeedSequence((world_seed, floor)).generate_state(1)[0])
+
+
+def build_floor(floor: int, map_width: int, map_height: int, seed: int) -> Dict[str, Any]:
+    """
+    Generate a floor with its own engine and return it detached from it, so it can be
+    sent back from a worker process and attached to the game with GameWorld.attach_floor.
+    """
+    # The generator draws from its own RNG, the global state is seeded as well since
+    # the new entities roll some of their stats when they are created.
+    random.seed(seed)
+    np.random.seed(seed)
+
+    engine = new_floor_engine(floor, map_width, map_height)
+    player = engine.player
+    game_map = get_floor_generator(floor)(
+        map_width=map_width,
+        map_height=map_height,
+        engine=engine,
+        rng=random.Random(seed),
+    )
+    engine.game_world.set_fixed_items(game_map.items)
+
+    game_map.remove_entity(player)
+    entities = list(game_map.entities)
+    for entity in entities:
+        del entity.parent
+
+    map_state = game_map.__getstate__()
+    del map_state["engine"]
+    del map_state["entities"]
+
+    return {
+        "map_state": map_state,
+        "entities": entities,
+        "player_location": (player.x, player.y),
+    }
+
+
+def build_floor_in_process(
+    floor: int, map_width: int, map_height: int, seed: int
+) -> Dict[str, Any]:
+    """Same as build_floor, without disturbing the random state of the game."""
+    random_state = random.getstate()
+    np_random_state = np.random.get_state()
+    try:
+        return build_floor(floor, map_width, map_height, seed)
+    finally:
+        random.setstate(random_state)
+        np.random.set_state(np_random_state)
+
 
 class GameWorld:
     """
     Holds the settings for the GameMap, and generates new maps when moving down the stairs.
     """
 
+    # Floor number, seed and worker job of the floor being generated in the background.
+    pending_floor: Optional[Tuple[int, int, Optional[Future]]] = None
+    # Seed the floors are generated from, saves made before it existed get one when loaded.
+    seed: Optional[int] = None
+    # Saved sections of the floors the player isn't on, by floor number, see savefile.
+    saved_floors: Optional[savefile.FloorCache] = None
+    # Floor numbers from the least to the most recently visited, see evict_floors.
+    visited_floors: Optional[List[int]] = None
+
     def __init__(
         self,
         *,
@@ -51,12 +150,15 @@ class GameWorld:
         map_width: int,
         map_height: int,
         current_floor: int = 1,
+        seed: Optional[int] = None,
     ):
         self.engine = engine
         self.map_width = map_width
         self.map_height = map_height
         self.current_floor = current_floor
-        self.floors: List[GameMap] = []
+        self.seed = random.getrandbits(32) if seed is None else seed
+        # Floors of a loaded game are None until they are visited.
+        self.floors: List[Optional[GameMap]] = []
 
     def set_fixed_items(self, items) -> None:
         items = list(items)
@@ -66,32 +168,116 @@ class GameWorld:
         if len(fixed_items) > 0:
             utils.replace_items_in_list(items, 0, fixed_items)
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # A worker job can't be saved, the floor will be generated again when needed.
+        state["pending_floor"] = None
+        # The floor sections are stored next to the engine, not inside it.
+        state["saved_floors"] = None
+        return state
+
     def generate_floor(self) -> None:
         """Generate a new floor, using the corresponding floor generator function."""
         if self.engine.debug_mode:
             print(f"Generating floor {self.current_floor}")
-        floor_generator = None
-        for floor in sorted(floor_map_generator.keys(), reverse=True):
-            if self.current_floor >= floor:
-                floor_generator = floor_map_generator[floor]
-                break
 
-        # If no generator is found, default to generate_dungeon
-        if floor_generator is None:
-            floor_generator = generate_dungeon
+        pending, self.pending_floor = self.pending_floor, None
+        seed = self.get_floor_seed(self.current_floor)
+        floor_data = None
+        if pending and pending[:2] == (self.current_floor, seed):
+            floor_data = self.get_pregenerated_floor(pending[2])
 
-        additional_params = {
-            "map_width": self.map_width,
-            "map_height": self.map_height,
-            "engine": self.engine,
-        }
-        # Generate the game map using the chosen generator function
-        game_map = floor_generator(**additional_params)
+        if floor_data is None:
+            # The same seed gives the same floor the worker would have generated.
+            floor_data = build_floor_in_process(
+                self.current_floor, self.map_width, self.map_height, seed
+            )
 
-        self.set_fixed_items(game_map.items)
+        game_map = self.attach_floor(floor_data)
 
         self.floors.append(game_map)
         self.engine.game_map = game_map
+        x, y = floor_data["player_location"]
+        self.engine.player.place(x, y, game_map)
+        self.schedule_floor_actors()
+        self.visit_floor(len(self.floors))
+        self.prefetch_next_floor()
+
+    def prefetch_next_floor(self) -> None:
+        """Start generating the next floor in a worker process while this one is played."""
+        global _floor_executor
+
+        next_floor = self.current_floor + 1
+        if (
+            next_floor <= len(self.floors)
+            or next_floor in world_prefabs
+            or (self.pending_floor and self.pending_floor[0] == next_floor)
+        ):
+            return
+
+        seed = self.get_floor_seed(next_floor)
+        future = None
+        if not global_vars.PREGENERATE_FLOORS:
+            self.pending_floor = (next_floor, seed, future)
+            return
+
+        try:
+            if _floor_executor is None:
+                _floor_executor = ProcessPoolExecutor(max_workers=1)
+            future = _floor_executor.submit(
+                build_floor, next_floor, self.map_width, self.map_height, seed
+            )
+        except (OSError, RuntimeError, NotImplementedError) as exc:
+            # No worker processes on this platform, the floor is generated when reached.
+            if self.engine.debug_mode:
+                print(f"Can't generate floor {next_floor} in the background: {exc}")
+
+        self.pending_floor = (next_floor, seed, future)
+
+    def get_floor_seed(self, floor: int) -> int:
+        """Return the seed of a floor of this world."""
+        if self.seed is None:
+            self.seed = random.getrandbits(32)
+        return floor_seed(self.seed, floor)
+
+    def get_pregenerated_floor(self, future: Optional[Future]) -> Optional[Dict[str, Any]]:
+        """Return the floor from the worker, or None if it has to be generated here."""
+        if future is None:
+            return None
+
+        if future.cancel():
+            # The worker didn't start it yet, it is faster to generate it right away.
+            return None
+
+        try:
+            # If the worker is already on it, waiting is faster than starting over.
+            return future.result()
+        except Exception as exc:
+            if self.engine.debug_mode:
+                print(f"Background floor generation failed: {exc}")
+            return None
+
+    def attach_floor(self, floor_data: Dict[str, Any]) -> GameMap:
+        """Create the GameMap of a floor returned by build_floor in this engine."""
+        game_map = GameMap.__new__(GameMap)
+        game_map.__dict__.update(floor_data["map_state"])
+        game_map.engine = self.engine
+        game_map.entities = set()
+
+        entities = floor_data["entities"]
+        # Actor ids come from the process that generated them, give them new ones.
+        for actor in sorted(
+            (entity for entity in entities if isinstance(entity, Actor)),
+            key=lambda actor: actor.id,
+        ):
+            actor.id = Actor._id_counter
+            Actor._id_counter += 1
+
+        for entity in entities:
+            entity.parent = game_map
+            game_map.add_entity(entity)
+
+        return game_map
 
     def load_prefab_map(self, map_name: str) -> None:
         params = {
@@ -108,6 +294,8 @@ class GameWorld:
         game_map = map_generator(**params)
         self.floors.append(game_map)
         self.engine.game_map = game_map
+        self.schedule_floor_actors()
+        self.visit_floor(len(self.floors))
 
     def load_floor(self, floor: int) -> None:
         """
@@ -123,7 +311,10 @@ class GameWorld:
             print(f"Loading floor {floor}")
 
         # Update current loaded floor with the new floor
-        self.engine.game_map = self.floors[floor - 1]
+        self.engine.game_map = self.get_floor(floor)
+        if self.saved_floors:
+            # The floor changes while the player is on it, it has to be saved again.
+            self.saved_floors.discard(floor)
 
         # Set the pair of stairs to put the player on depending if we're ascending or descending
         stairs = (
@@ -137,6 +328,79 @@ class GameWorld:
             stairs[1],
             self.engine.game_map,
         )
+        self.schedule_floor_actors()
+        self.visit_floor(floor)
+        self.prefetch_next_floor()
+
+    def get_floor(self, floor: int) -> GameMap:
+        """Return the map of a floor, loading it from the floor cache if needed."""
+        game_map = self.floors[floor - 1]
+        if game_map is None:
+            saved_floors = self.saved_floors
+            if saved_floors is None or floor not in saved_floors:
+                raise ValueError(f"Floor {floor} is neither loaded nor saved.")
+            # A floor evicted moments ago can be loaded before it is compressed.
+            pickled = saved_floors.get_pickle(floor)
+            if pickled is None:
+                game_map = savefile.load_floor(self.engine, saved_floors[floor])
+            else:
+                game_map = savefile.load_floor(self.engine, pickled, compressed=False)
+            self.floors[floor - 1] = game_map
+        return game_map
+
+    def get_saved_floors(self) -> savefile.FloorCache:
+        if self.saved_floors is None:
+            self.saved_floors = savefile.FloorCache()
+        return self.saved_floors
+
+    def visit_floor(self, floor: int) -> None:
+        """Make the floor the most recently visited and evict the least recent ones."""
+        if self.visited_floors is None:
+            self.visited_floors = []
+        if floor in self.visited_floors:
+            self.visited_floors.remove(floor)
+        self.visited_floors.append(floor)
+        self.evict_floors()
+
+    def evict_floors(self) -> None:
+        """
+        Keep at most LOADED_FLOORS floors in memory, the current one included. The least
+        recently visited floors are saved to the floor cache, get_floor loads them again.
+        Only pickling them happens here, they are compressed on a worker thread so
+        taking the stairs doesn't stall.
+        """
+        visited = set(self.visited_floors or [])
+        # Floors loaded before they were tracked, e.g. from a save, are the oldest.
+        floors = [
+            floor for floor in range(1, len(self.floors) + 1) if floor not in visited
+        ] + (self.visited_floors or [])
+        loaded = [
+            floor
+            for floor in floors
+            if self.floors[floor - 1] is not None
+            and self.floors[floor - 1] is not self.engine.game_map
+        ]
+
+        saved_floors = self.get_saved_floors()
+        saved_floors.store_compressed()
+        for floor in loaded[: max(0, len(loaded) - global_vars.LOADED_FLOORS + 1)]:
+            game_map = self.floors[floor - 1]
+            if game_map is None:
+                continue
+            if floor not in saved_floors:
+                saved_floors.add_pickle(
+                    floor, savefile.pickle_floor(self.engine, game_map)
+                )
+            self.floors[floor - 1] = None
+
+            if self.engine.debug_mode:
+                print(f"Evicted floor {floor}")
+
+    def schedule_floor_actors(self) -> None:
+        """Only the actors on the current floor take turns."""
+        self.engine.turn_manager.set_actors(
+            [self.engine.player, *self.engine.game_map.actors]
+        )
 
     def descend(self) -> None:
         self.engine.game_world.load_floor(self.engine.game_world.current_floor - 1)
@@ -1,4 +1,5 @@
 DEBUG_MODE = False
+HEADLESS = False
 VERSION = "0.5.0"
 
 # Combat
@@ -8,3 +9,13 @@ HIT_CHANCE_BASE = 0.987
 # Others
 
 ACTION_DELAY = 0.3
+
+# Generate the next floor in a worker process while the current one is played.
+PREGENERATE_FLOORS = True
+
+# Save the game in the background every this many turns, and on every floor change.
+AUTOSAVE_TURNS = 200
+
+# Floors kept in memory, the current one included. The others are compressed to a
+# cache file and loaded again when the player goes back to them.
+LOADED_FLOORS = 3
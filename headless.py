@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Run game sessions without a window, driven by a bot or a script of commands.
+
+Usage: python headless.py [--turns N] [--seed N] [--script FILE] [--record FILE]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+import actions
+import global_vars
+import replay
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+
+DIRECTIONS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+class Bot:
+    """Decides the player actions of a headless game session."""
+
+    def get_action(self, engine: Engine) -> Optional[actions.Action]:
+        """Return the next player action, or None to end the session."""
+        raise NotImplementedError()
+
+    def level_up(self, engine: Engine) -> None:
+        """Pick an attribute when the player levels up."""
+        recorder = replay.get_recorder()
+        if recorder:
+            recorder.record_level_up(engine, "max_hp")
+        engine.player.level.increase_max_hp()
+
+
+class ExplorerBot(Bot):
+    """Heals when hurt, attacks any enemy in sight, otherwise walks to the up stairs and climbs them."""
+
+    def __init__(self, stuck_turns: int = 5, seed: Optional[int] = None):
+        self.stuck_turns = stuck_turns
+        # The bot has its own random stream, so it doesn't change the game's rolls.
+        self.rng = random.Random(seed)
+        self.last_position = (-1, -1)
+        self.turns_without_moving = 0
+
+    def get_action(self, engine: Engine) -> Optional[actions.Action]:
+        player = engine.player
+        game_map = engine.game_map
+
+        if (player.x, player.y) == self.last_position:
+            self.turns_without_moving += 1
+        else:
+            self.turns_without_moving = 0
+        self.last_position = (player.x, player.y)
+
+        if player.fighter.hp < player.fighter.max_hp // 3 and player.inventory.healing_items:
+            return actions.QuickHealAction(player)
+
+        target = game_map.get_closest_actor(player.x, player.y)
+        if target:
+            dx = target.x - player.x
+            dy = target.y - player.y
+            if max(abs(dx), abs(dy)) <= 1:
+                return actions.BumpAction(player, dx, dy)
+
+        if self.turns_without_moving >= self.stuck_turns:
+            # Wander around until something changes, e.g. there is no path to the stairs.
+            # Waiting lets the turns pass when the player can't move at all, e.g. when grappled.
+            if self.rng.random() < 0.5:
+                return actions.WaitAction(player)
+            return actions.BumpAction(player, *self.rng.choice(DIRECTIONS))
+
+        if target:
+            return actions.MoveToTileAction(player, target.x, target.y)
+
+        if (player.x, player.y) == game_map.upstairs_location:
+            return actions.TakeStairsAction(player)
+
+        return actions.MoveToTileAction(player, *game_map.upstairs_location)
+
+
+class ScriptBot(Bot):
+    """Plays a list of commands, one per line. Empty lines and # comments are ignored.
+
+    Commands: move DX DY, goto X Y, wait, pickup, stairs, heal, special.
+    """
+
+    commands: Dict[str, Callable[..., actions.Action]] = {
+        "move": actions.BumpAction,
+        "goto": actions.MoveToTileAction,
+        "wait": actions.WaitAction,
+        "pickup": actions.PickupAction,
+        "stairs": actions.TakeStairsAction,
+        "heal": actions.QuickHealAction,
+        "special": actions.SpecialAbilityAction,
+    }
+
+    def __init__(self, lines: List[str]):
+        self.lines = [
+            line.split("#")[0].split()
+            for line in lines
+            if line.split("#")[0].strip()
+        ]
+        self.index = 0
+
+    @classmethod
+    def from_file(cls, filename: str) -> ScriptBot:
+        with open(filename) as f:
+            return cls(f.readlines())
+
+    def get_action(self, engine: Engine) -> Optional[actions.Action]:
+        if self.index >= len(self.lines):
+            return None
+
+        command, *args = self.lines[self.index]
+        self.index += 1
+
+        if command not in self.commands:
+            raise ValueError(f"Unknown command in script: {command}")
+
+        return self.commands[command](engine.player, *(int(arg) for arg in args))
+
+
+def run(engine: Engine, bot: Bot, max_turns: int, max_failures: int = 1000) -> dict:
+    """Feed the bot actions to the engine until it runs out of turns, dies or wins.
+
+    Returns a summary of the session.
+    """
+    from event_handlers.event_handler import EventHandler
+
+    handler = EventHandler(engine)
+    first_turn = engine.current_turn
+    failures = 0
+
+    start = time.perf_counter()
+    while (
+        engine.current_turn - first_turn < max_turns
+        and engine.player.is_alive
+        and not engine.victory
+        and failures < max_failures
+    ):
+        action = bot.get_action(engine)
+        if action is None:
+            break
+
+        if handler.handle_action(action):
+            failures = 0
+        else:
+            failures += 1
+
+        while engine.player.level.requires_level_up:
+            bot.level_up(engine)
+    elapsed = time.perf_counter() - start
+
+    turns = engine.current_turn - first_turn
+    return {
+        "turns": turns,
+        "seconds": elapsed,
+        "turns_per_second": turns / elapsed if elapsed > 0 else 0.0,
+        "floor": engine.game_world.current_floor,
+        "alive": engine.player.is_alive,
+        "victory": engine.victory,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the game without a window.")
+    parser.add_argument("--turns", type=int, default=1000, help="turns to play")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--script", default=None, help="file with player commands")
+    parser.add_argument("--record", default=None, help="save the session as a replay")
+    args = parser.parse_args()
+
+    global_vars.HEADLESS = True
+
+    if args.seed is not None:
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+
+    import setup_game
+
+    if args.record:
+        replay.set_recorder(replay.ReplayRecorder(args.record, seed=args.seed))
+
+    engine = setup_game.new_game()
+    if args.script:
+        bot: Bot = ScriptBot.from_file(args.script)
+    else:
+        bot = ExplorerBot(seed=args.seed)
+
+    summary = run(engine, bot, args.turns)
+
+    recorder = replay.get_recorder()
+    if recorder:
+        recorder.save()
+
+    print(
+        f"Played {summary['turns']} turns in {summary['seconds']:.2f}s "
+        f"({summary['turns_per_second']:.0f} turns/s), "
+        f"reached floor {summary['floor']}, "
+        f"{'won' if summary['victory'] else 'alive' if summary['alive'] else 'died'}."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
-"""Factory functions to create item instances."""
+"""Factory functions to create item instances.
+
+Items are placed in the game as copies of these, see Entity.spawn.
+"""
 from components import consumable, equippable
 from entity import Item
 from equipment_types import AmmoType
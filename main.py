@@ -1,15 +1,19 @@
 #!/usr/bin/env python3
+import multiprocessing
 import os
 import sys
 import traceback
 import tcod
 
+import autosave
 import color
 import console
 from event_handlers.base_event_handler import BaseEventHandler
 from event_handlers.event_handler import EventHandler
 import exceptions
 
+import profiler
+import replay
 import setup_game
 import global_vars
 
@@ -17,10 +21,24 @@ import global_vars
 def save_game(handler: BaseEventHandler, filename: str) -> None:
     """If the current event handler has an active Engine then save it."""
     if isinstance(handler, EventHandler):
+        autosaver = autosave.get_autosaver()
+        if autosaver:
+            # Let the running autosave finish, so it doesn't replace this save.
+            autosaver.wait()
         handler.engine.save_as(filename)
         print("Game saved.")
 
 
+def save_replay() -> None:
+    """Write the recorded session and profile, if the game is being recorded."""
+    recorder = replay.get_recorder()
+    if recorder:
+        recorder.save()
+    turn_profiler = profiler.get_profiler()
+    if turn_profiler:
+        turn_profiler.save()
+
+
 def main() -> None:
     """Main startup function."""
     screen_width = 80
@@ -49,6 +67,17 @@ def main() -> None:
 
     global_vars.DEBUG_MODE = debug_mode
 
+    # Save in the background on floor changes and every AUTOSAVE_TURNS turns.
+    autosave.set_autosaver(autosave.Autosaver("savegame.sav"))
+
+    # Record the actions of new games to replay them later with replay.py.
+    if "-record" in sys.argv:
+        replay.set_recorder(replay.ReplayRecorder("recording.replay"))
+
+    # Time the phases of every turn and frame, see profiler.py.
+    if "-profile" in sys.argv:
+        profiler.set_profiler(profiler.TurnProfiler("profile.json"))
+
     title = "Castle of the Eternal Night"
     if debug_mode:
         title += " - DEBUG MODE"
@@ -68,13 +97,16 @@ def main() -> None:
         try:
             while True:
                 root_console.clear()
-                handler.on_render(console=root_console)
-                console.get_context().present(root_console)
+                with profiler.phase("render", "frame"):
+                    handler.on_render(console=root_console)
+                with profiler.phase("present", "frame"):
+                    console.get_context().present(root_console)
 
                 try:
                     for event in tcod.event.wait():
                         context.convert_event(event)
-                        handler = handler.handle_events(event)
+                        with profiler.phase("handle_event", "frame"):
+                            handler = handler.handle_events(event)
                 except Exception:  # Handle exceptions in game.
                     traceback.print_exc()  # Print error to stderr.
                     # Then print the error to the message log.
@@ -83,14 +115,19 @@ def main() -> None:
                             traceback.format_exc(), color.error
                         )
         except exceptions.QuitWithoutSaving:
+            save_replay()
             raise
         except SystemExit:  # Save and quit.
             save_game(handler, "savegame.sav")
+            save_replay()
             raise
         except BaseException:  # Save on any other unexpected exception.
             save_game(handler, "savegame.sav")
+            save_replay()
             raise
 
 
 if __name__ == "__main__":
+    # Needed by the floor generation worker process in the bundled executable.
+    multiprocessing.freeze_support()
     main()
@@ -1,13 +1,20 @@
 from __future__ import annotations
 import random
-from typing import List, Tuple
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
 
 from map_gen.base_room import Room
+from map_gen.cellular_automata import run_automata
 
 
 class CaveLikeRoom(Room):
     """A cave-like room on the map using cellular automata."""
 
+    # Neighbor counts that fill an empty cell and that keep a filled cell filled.
+    BIRTH = (6, 7, 8)
+    SURVIVAL = (3, 4, 5, 6, 7, 8)
+
     def __init__(
         self,
         x: int,
@@ -16,6 +23,9 @@ class CaveLikeRoom(Room):
         height: int,
         fill_probability: float,
         generations: int,
+        birth: Iterable[int] = BIRTH,
+        survival: Iterable[int] = SURVIVAL,
+        rng: Optional[random.Random] = None,
     ):
         """
         Initializes the cave-like room with given dimensions and cellular automata parameters.
@@ -27,6 +37,9 @@ class CaveLikeRoom(Room):
             height (int): The height of the cave-like room.
             fill_probability (float): Probability of a cell being filled initially.
             generations (int): Number of generations to run the cellular automata.
+            birth (Iterable[int]): Neighbor counts that fill an empty cell.
+            survival (Iterable[int]): Neighbor counts that keep a filled cell filled.
+            rng (random.Random): Draws the initial cells, the global random state if None.
         """
         self.x1 = x
         self.y1 = y
@@ -34,58 +47,24 @@ class CaveLikeRoom(Room):
         self.height = height
         self.fill_probability = fill_probability
         self.generations = generations
-        self.grid = self._initialize_grid()
-        self._generate()
-
-    def _initialize_grid(self) -> List[List[int]]:
-        return [
-            [
-                1 if random.random() < self.fill_probability else 0
-                for _ in range(self.width)
-            ]
-            for _ in range(self.height)
-        ]
-
-    def _count_filled_neighbors(self, grid: List[List[int]], x: int, y: int) -> int:
-        count = 0
-        for dx in range(-1, 2):
-            for dy in range(-1, 2):
-                nx, ny = x + dx, y + dy
-                if (
-                    (dx != 0 or dy != 0)
-                    and 0 <= nx < self.width
-                    and 0 <= ny < self.height
-                ):
-                    count += grid[ny][nx]
-        return count
+        self.grid = run_automata(
+            self._initialize_grid(rng), generations, birth, survival
+        )
 
-    def _generate(self):
-        for _ in range(self.generations):
-            new_grid = [
-                [self.grid[y][x] for x in range(self.width)] for y in range(self.height)
-            ]
-            for y in range(self.height):
-                for x in range(self.width):
-                    filled_neighbors = self._count_filled_neighbors(self.grid, x, y)
-                    if self.grid[y][x] == 1:
-                        if filled_neighbors < 3:
-                            new_grid[y][x] = 0  # Die if too lonely
-                        elif filled_neighbors > 4:
-                            new_grid[y][x] = 1  # Stay filled if enough neighbors
-                    else:
-                        if filled_neighbors > 5:
-                            new_grid[y][x] = 1  # Become filled if surrounded
-            self.grid = new_grid
+    def _initialize_grid(self, rng: Optional[random.Random]) -> np.ndarray:
+        # Draw the cells row by row, so a seed gives the same cave as the list based version.
+        draw = (rng or random).random
+        cells = [draw() < self.fill_probability for _ in range(self.width * self.height)]
+        return np.array(cells, dtype=bool).reshape(self.height, self.width).T
 
     @property
     def size(self) -> int:
         """Return the size of this cave-like room, which is the count of filled tiles."""
-        filled_tiles = sum(tile == 1 for row in self.grid for tile in row)
-        return filled_tiles
+        return int(np.count_nonzero(self.grid))
 
     @property
-    def inner(self) -> List[List[int]]:
-        """Return the inner area of this cave-like room as a 2D grid."""
+    def inner(self) -> np.ndarray:
+        """Return the inner area of this cave-like room as a boolean (width, height) array."""
         return self.grid
 
     @property
@@ -0,0 +1,46 @@
+"""Cellular automata on numpy boolean grids."""
+
+from __future__ import annotations
+from typing import Iterable
+
+import numpy as np
+
+
+def count_neighbors(grid: np.ndarray) -> np.ndarray:
+    """Return how many of the 8 neighbors of each cell are filled. Cells outside the grid count as empty."""
+    padded = np.pad(grid, 1).astype(np.uint8)
+    width, height = grid.shape
+    counts = np.zeros(grid.shape, dtype=np.uint8)
+    for dx in range(3):
+        for dy in range(3):
+            if dx != 1 or dy != 1:
+                counts += padded[dx : dx + width, dy : dy + height]
+    return counts
+
+
+def run_automata(
+    grid: np.ndarray,
+    generations: int,
+    birth: Iterable[int],
+    survival: Iterable[int],
+) -> np.ndarray:
+    """
+    Run the automata on a boolean grid and return the resulting grid.
+
+    Parameters:
+        grid (np.ndarray): Boolean array, True for filled cells.
+        generations (int): Number of generations to run.
+        birth (Iterable[int]): Neighbor counts that fill an empty cell.
+        survival (Iterable[int]): Neighbor counts that keep a filled cell filled.
+    """
+    # Lookup tables indexed by neighbor count.
+    born = np.zeros(9, dtype=bool)
+    born[list(birth)] = True
+    survives = np.zeros(9, dtype=bool)
+    survives[list(survival)] = True
+
+    grid = np.asarray(grid, dtype=bool)
+    for _ in range(generations):
+        counts = count_neighbors(grid)
+        grid = np.where(grid, survives[counts], born[counts])
+    return grid
@@ -1,4 +1,3 @@
-from copy import deepcopy
 from game_map import GameMap
 from map_gen.rectangular_room import RectRoom
 import tile_types
@@ -20,25 +19,25 @@ def create_debug_room(map_width: int, map_height: int, engine: Engine) -> GameMa
     dungeon.tiles[new_room.inner] = tile_types.floor
 
     # Place some items
-    confusion_scroll = deepcopy(item_factories.confusion_scroll)
+    confusion_scroll = item_factories.confusion_scroll.clone()
     confusion_scroll.place(new_room.x1 + 3, new_room.y1 + 1, dungeon)
 
-    map_item = deepcopy(item_factories.map_scroll)
+    map_item = item_factories.map_scroll.clone()
     map_item.place(new_room.x1 + 4, new_room.y1 + 1, dungeon)
 
-    holy_water = deepcopy(item_factories.holy_water_vial)
+    holy_water = item_factories.holy_water_vial.clone()
     holy_water.place(new_room.x1 + 1, new_room.y1 + 2, dungeon)
 
-    bow = deepcopy(item_factories.bow)
+    bow = item_factories.bow.clone()
     bow.place(new_room.x1 + 12, new_room.y1 + 12, dungeon)
 
-    crossbow = deepcopy(item_factories.crossbow)
+    crossbow = item_factories.crossbow.clone()
     crossbow.place(new_room.x1 + 13, new_room.y1 + 12, dungeon)
 
-    arrows = deepcopy(item_factories.arrows)
+    arrows = item_factories.arrows.clone()
     arrows.place(new_room.x1 + 14, new_room.y1 + 14, dungeon)
 
-    bolts = deepcopy(item_factories.bolts)
+    bolts = item_factories.bolts.clone()
     bolts.place(new_room.x1 + 16, new_room.y1 + 16, dungeon)
 
     player.place(*new_room.center, dungeon)
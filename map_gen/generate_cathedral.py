@@ -4,7 +4,7 @@ from __future__ import annotations
 import copy
 
 import random
-from typing import TYPE_CHECKING, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 import numpy as np
 
@@ -66,38 +66,193 @@ Tile = {
     "Test": 37,
 }
 
-rooms: List[RectRoom] = []
+# Matches no Tile, for the missing neighbours of the cells on the edges of the map.
+NO_TILE = 255
 
-dungeon_mask = np.array([])
-protected = np.array([])
-dungeon = np.array([])
-chamber = np.array([])
 
-vertical_layout = False
+def tile_rules(*rules: Tuple[str, str, str]) -> Tuple[Tuple[int, int, int], ...]:
+    return tuple(
+        (Tile[tile], Tile[neighbour], Tile[new]) for tile, neighbour, new in rules
+    )
 
-has_chamber1 = False
-has_chamber2 = False
-has_chamber3 = False
 
-chamber_offset = 0
+# The passes of fix_tiles_patterns. Each maps a direction (dx, dy) to the rules
+# (tile, neighbour, new): the neighbour at that direction of a tile becomes the new
+# tile. The rules of a direction are applied in order.
+PATTERN_PASSES: Tuple[Dict[Tuple[int, int], Tuple[Tuple[int, int, int], ...]], ...] = (
+    {
+        (1, 0): tile_rules(
+            ("HWall", "Dirt", "DirtHwallEnd"),
+            ("Floor", "Dirt", "DirtHwall"),
+            ("Floor", "HWall", "HWallEnd"),
+            ("VWallEnd", "Dirt", "DirtVwallEnd"),
+        ),
+        (0, 1): tile_rules(
+            ("VWall", "Dirt", "DirtVwallEnd"),
+            ("Floor", "VWall", "VWallEnd"),
+            ("Floor", "Dirt", "DirtVwall"),
+        ),
+    },
+    {
+        (1, 0): tile_rules(
+            ("Floor", "DirtVwall", "HDirtCorner"),
+            ("Floor", "Dirt", "VDirtCorner"),
+            ("HWallEnd", "Dirt", "DirtHwallEnd"),
+            ("Floor", "DirtVwallEnd", "HDirtCorner"),
+            ("DirtVwall", "Dirt", "VDirtCorner"),
+            ("HWall", "DirtVwall", "HDirtCorner"),
+            ("DirtVwall", "VWall", "VWallEnd"),
+            ("HWallEnd", "DirtVwall", "HDirtCorner"),
+            ("HWall", "VWall", "VWallEnd"),
+            ("Corner", "Dirt", "DirtVwallEnd"),
+            ("HDirtCorner", "VWall", "VWallEnd"),
+            ("HWallEnd", "VWall", "VWallEnd"),
+            ("HWallEnd", "DirtVwallEnd", "HDirtCorner"),
+            ("DWall", "VCorner", "HCorner"),
+            ("HWallEnd", "Floor", "HCorner"),
+            ("HWall", "DirtVwallEnd", "HDirtCorner"),
+            ("HWall", "Floor", "HCorner"),
+        ),
+        (-1, 0): tile_rules(("DirtHwallEnd", "Dirt", "DirtVwall")),
+        (0, 1): tile_rules(
+            ("VWall", "HWall", "HWallEnd"),
+            ("VWallEnd", "DirtHwall", "HDirtCorner"),
+            ("DirtHwall", "HWall", "HWallEnd"),
+            ("VWallEnd", "HWall", "HWallEnd"),
+            ("HDirtCorner", "HWall", "HWallEnd"),
+            ("VWallEnd", "Dirt", "DirtVwallEnd"),
+            ("VWallEnd", "Floor", "VCorner"),
+            ("VWall", "Floor", "VCorner"),
+            ("Floor", "VCorner", "HCorner"),
+        ),
+        (0, -1): tile_rules(
+            ("VWallEnd", "Dirt", "HWallEnd"),
+            ("VWallEnd", "Dirt", "DirtVwallEnd"),
+            ("HWallEnd", "DirtVwallEnd", "HDirtCorner"),
+            ("DirtHwall", "DirtVwallEnd", "HDirtCorner"),
+        ),
+    },
+    {
+        (0, 1): tile_rules(("DWall", "HWall", "HWallEnd")),
+    },
+)
 
-max_encounters = 0
-current_encounters = 0
-color_rooms = False
+# Tiles a wall added across a room can end at.
+WALL_END_TILES = frozenset(
+    Tile[name]
+    for name in (
+        "Corner",
+        "Wall",
+        "Arch",
+        "VWallEnd",
+        "HWallEnd",
+        "VCorner",
+        "HCorner",
+        "DirtHwall",
+        "DirtVwall",
+        "VDirtCorner",
+        "HDirtCorner",
+        "DirtHwallEnd",
+        "DirtVwallEnd",
+    )
+)
 
-DMAXX = 0
-DMAXY = 0
+# Tiles add_wall starts walls from.
+WALL_START_TILES = [
+    Tile[name] for name in ("Corner", "VWallEnd", "HWallEnd", "HWall", "VWall")
+]
+
+# Game tile id of each Tile, index it with the dungeon to map it in one step.
+GAME_TILES = np.full(len(Tile), tile_types.unknown, dtype=np.uint8)
+for names, game_tile in (
+    (("Floor",), tile_types.floor),
+    (
+        (
+            "Dirt",
+            "Wall",
+            "DWall",
+            "VWall",
+            "HWall",
+            "VWallEnd",
+            "HWallEnd",
+            "VCorner",
+            "HCorner",
+            "VArchHWall",
+            "HWallVArch",
+            "DirtHwall",
+            "DirtVwall",
+            "VDirtCorner",
+            "HDirtCorner",
+            "DirtHwallEnd",
+            "DirtVwallEnd",
+            "HWallVFence",
+            "HFenceVWall",
+            "HArchVWall",
+        ),
+        tile_types.wall,
+    ),
+    (
+        ("Arch", "VArch", "HArch", "DArch", "Corner", "VArchEnd", "HArchEnd"),
+        tile_types.arch,
+    ),
+    (("HFence", "VFence"), tile_types.fence),
+    (("Pillar",), tile_types.pillar),
+    (("HDoor", "VDoor"), tile_types.closed_door),
+):
+    GAME_TILES[[Tile[name] for name in names]] = game_tile
 
 
-def init_dungeon_flags(map: GameMap):
-    global dungeon
-    global protected
-    global chamber
-    DMAXX = map.width
-    DMAXY = map.height
-    dungeon = np.full((DMAXX, DMAXY), fill_value=Tile["Dirt"], order="F")
-    protected = np.full((DMAXX, DMAXY), fill_value=False, order="F")
-    chamber = np.full((DMAXX, DMAXY), fill_value=False, order="F")
+def neighbours_from(tiles: np.ndarray, dx: int, dy: int) -> np.ndarray:
+    """Return the tile at (x - dx, y - dy) of each cell, NO_TILE past the edges."""
+    width, height = tiles.shape
+    neighbours = np.full_like(tiles, NO_TILE)
+    neighbours[max(dx, 0) : width + min(dx, 0), max(dy, 0) : height + min(dy, 0)] = (
+        tiles[max(-dx, 0) : width - max(dx, 0), max(-dy, 0) : height - max(dy, 0)]
+    )
+    return neighbours
+
+
+def replace_neighbours(
+    rules: Tuple[Tuple[int, int, int], ...], tiles: np.ndarray, neighbours: np.ndarray
+) -> np.ndarray:
+    """Apply the rules to each cell of neighbours, given the tile it neighbours."""
+    neighbours = neighbours.copy()
+    for tile, neighbour, new in rules:
+        neighbours[(tiles == tile) & (neighbours == neighbour)] = new
+    return neighbours
+
+
+def fix_tiles_pattern_pass(
+    dungeon: np.ndarray, rules: Dict[Tuple[int, int], Tuple[Tuple[int, int, int], ...]]
+) -> np.ndarray:
+    """
+    Return the dungeon after a pass of the rules, with the result of visiting the cells
+    row by row and applying the rules of each cell to its current neighbours.
+
+    When a cell is visited it may have been changed by the rules of the cells above and
+    left of it, which depend on what was changed before them. Applying those rules to
+    the whole dungeon until it doesn't change gives the tile of each cell by then. The
+    cells right of and below it only change it afterwards.
+    """
+    no_rules: Tuple[Tuple[int, int, int], ...] = ()
+    visited = dungeon
+    while True:
+        from_above = replace_neighbours(
+            rules.get((0, 1), no_rules), neighbours_from(visited, 0, 1), dungeon
+        )
+        from_left = replace_neighbours(
+            rules.get((1, 0), no_rules), neighbours_from(visited, 1, 0), from_above
+        )
+        if np.array_equal(from_left, visited):
+            break
+        visited = from_left
+
+    from_right = replace_neighbours(
+        rules.get((-1, 0), no_rules), neighbours_from(visited, -1, 0), visited
+    )
+    return replace_neighbours(
+        rules.get((0, -1), no_rules), neighbours_from(visited, 0, -1), from_right
+    )
 
 
 def get_min_area(level: int):
@@ -111,829 +266,568 @@ def get_min_area(level: int):
     return 761
 
 
-def generate_cathedral(
-    map_width: int,
-    map_height: int,
-    engine: Engine,
-) -> GameMap:
-    global max_encounters, DMAXX, DMAXY
-    player = engine.player
-    map = GameMap(engine, map_width, map_height, entities=[player], name="Castle")
-    DMAXX = map.width
-    DMAXY = map.height
-    floor = engine.game_world.current_floor
-    max_encounters = get_max_value_for_floor(parameters.max_encounters_by_floor, floor)
-
-    while True:
-        while True:
-            first_room(map)
-            if find_area() > get_min_area(floor):
-                break
-
-        init_dungeon_flags(map)
-        make_dmt()
-        fill_chambers()
-        fix_tiles_patterns()
-        add_wall()
+class CathedralGenerator:
+    """
+    Generates a cathedral map. All the generation state lives in the instance and every
+    random decision, on the layout and the entities, comes from its own RNG, so several
+    generators can run at the same time.
+    """
 
-        map_dungeon(map)
-        if place_all_stairs(map):
-            break
-
-    if player is not None:
-        place_level_entities(map, floor)
-        place_level_torches(map, 4, 10)
-        player.place(*map.downstairs_location, map)
-
-    find_theme_rooms(4, 8, Tile["Floor"], map, dungeon)
-    create_theme_rooms(map)
-
-    return map
-
-
-def map_room(room: RectRoom, map: GameMap):
-    global rooms
-    global dungeon_mask
-    rooms.append(room)
-
-    for x, y in room.get_outer_points():
-        if x > map.width - 1 or y > map.height - 1:
-            continue
-        dungeon_mask[x, y] = True
-
-
-def place_stairs(map: GameMap, tile_type, location_name: str) -> bool:
-    x = generate_rnd(map.width - 1)
-    y = generate_rnd(map.height - 1)
-    j = y
-    for i in range(x, map.width - 1):
-        if i == map.width - 1:
-            i = 0
-            j += 1
-            if j == map.height - 1:
-                j = 0
-        if dungeon[i][j] == Tile["Floor"]:
-            map.tiles[i][j] = tile_type
-            setattr(map, location_name, (i, j))
-            return True
-    return False
-
-
-def place_all_stairs(map: GameMap) -> bool:
-    stairs_down = place_stairs(map, tile_types.down_stairs, "downstairs_location")
-    stairs_up = place_stairs(map, tile_types.up_stairs, "upstairs_location")
-    return stairs_down and stairs_up
-
-
-def check_room(room: RectRoom, dungeon: GameMap):
-    global rooms
-    global dungeon_mask
-    if (
-        room.x < 0
-        or room.y < 0
-        or room.x2 >= dungeon.width
-        or room.y2 >= dungeon.height
+    def __init__(
+        self,
+        map_width: int,
+        map_height: int,
+        engine: Engine,
+        rng: random.Random,
     ):
-        return False
+        self.map_width = map_width
+        self.map_height = map_height
+        self.engine = engine
+        self.rng = rng
 
-    for x, y in room.get_outer_points():
-        if dungeon_mask[x][y]:
-            return False
+        self.rooms: List[RectRoom] = []
 
-    return True
+        self.dungeon_mask = np.array([])
+        self.protected = np.array([])
+        self.dungeon = np.array([])
+        self.chamber = np.array([])
 
+        self.vertical_layout = False
 
-def generate_room(area: RectRoom, dungeon: GameMap, vertical_layout: bool):
-    place_room1 = False
+        self.has_chamber1 = False
+        self.has_chamber2 = False
+        self.has_chamber3 = False
 
-    rotate = flip_coin(4)
-    vertical_layout = (not vertical_layout and rotate) or (
-        vertical_layout and not rotate
-    )
+        self.chamber_offset = 0
 
-    room1 = RectRoom(0, 0, 0, 0)
+        self.max_encounters = 0
+        self.current_encounters = 0
+        self.color_rooms = False
 
-    for _ in range(20):
-        random_width = (random.randint(0, 4) + 2) & ~1
-        random_height = (random.randint(0, 4) + 2) & ~1
-        room1.x = area.x
-        room1.y = area.y
-        room1.width = random_width
-        room1.height = random_height
+        self.DMAXX = map_width
+        self.DMAXY = map_height
 
-        if vertical_layout:
-            room1.x += -room1.width
-            room1.y += int(area.height / 2 - room1.height / 2)
-            place_room1 = check_room(
-                RectRoom(room1.x - 1, room1.y - 1, room1.width + 1, room1.height + 2),
-                dungeon,
-            )
-        else:
-            room1.x += int(area.width / 2 - random_width / 2)
-            room1.y += -room1.height
-            place_room1 = check_room(
-                RectRoom(room1.x - 1, room1.y - 1, room1.width + 2, room1.height + 1),
-                dungeon,
-            )
-
-        if place_room1:
-            break
-
-    if place_room1:
-        map_room(room1, dungeon)
-
-    place_room2 = False
-    room2 = copy.deepcopy(room1)
-
-    if vertical_layout:
-        room2.x = area.x + area.width
-
-        place_room2 = check_room(
-            RectRoom(room2.x1, room2.y1 - 1, room2.width + 1, room2.height + 2),
-            dungeon,
+    def generate(self) -> GameMap:
+        player = self.engine.player
+        map = GameMap(
+            self.engine,
+            self.map_width,
+            self.map_height,
+            entities=[player],
+            name="Castle",
         )
-    else:
-        room2.y = area.y + area.height
-
-        place_room2 = check_room(
-            RectRoom(room2.x1 - 1, room2.y1, room2.width + 2, room2.height + 1),
-            dungeon,
+        floor = self.engine.game_world.current_floor
+        self.max_encounters = get_max_value_for_floor(
+            parameters.max_encounters_by_floor, floor
         )
 
-    if place_room2:
-        map_room(room2, dungeon)
-    if place_room1:
-        generate_room(room1, dungeon, not vertical_layout)
-    if place_room2:
-        generate_room(room2, dungeon, not vertical_layout)
-
-
-def first_room(map: GameMap):
-    global rooms, dungeon_mask, chamber_offset
-    global vertical_layout, has_chamber1, has_chamber2, has_chamber3
-
-    dungeon_mask = np.full((map.width, map.height), fill_value=False, order="F")
-    rooms = []
-    vertical_layout = flip_coin()
-    has_chamber1 = not flip_coin()
-    has_chamber2 = not flip_coin()
-    has_chamber3 = not flip_coin()
-    chamber_offset = generate_rnd(24)
-
-    if not has_chamber1 or not has_chamber3:
-        has_chamber2 = True
-
-    chamber1 = RectRoom(1, 15, 10, 10)
-    chamber2 = RectRoom(15, 15, 10, 10)
-    chamber3 = RectRoom(29, 15, 10, 10)
-    hallway_x1 = 1
-    hallway_width = 38
-    if not has_chamber1:
-        hallway_x1 += 17
-        hallway_width -= 17
-    if not has_chamber3:
-        hallway_width -= 16
-
-    hallway = RectRoom(hallway_x1, 17, hallway_width, 6)
-
-    if vertical_layout:
-        chamber1.x, chamber1.y = chamber1.y, chamber1.x
-        chamber3.x, chamber3.y = chamber3.y, chamber3.x
-        hallway.x, hallway.y = hallway.y, hallway.x
-        hallway.width, hallway.height = hallway.height, hallway.width
-
-    chamber1.x += chamber_offset
-    chamber2.x += chamber_offset
-    chamber3.x += chamber_offset
-    hallway.x += chamber_offset
-
-    if has_chamber1:
-        map_room(chamber1, map)
-    if has_chamber2:
-        map_room(chamber2, map)
-    if has_chamber3:
-        map_room(chamber3, map)
-
-    map_room(hallway, map)
-
-    if has_chamber1:
-        generate_room(chamber1, map, vertical_layout)
-    if has_chamber2:
-        generate_room(chamber2, map, vertical_layout)
-    if has_chamber3:
-        generate_room(chamber3, map, vertical_layout)
-
-
-def find_area():
-    global rooms
-    total_count = 0
-    for room in rooms:
-        total_count += room.outer_size
-
-    return total_count
-
-
-def fill_chambers():
-    global vertical_layout, has_chamber1, has_chamber2, has_chamber3
-    chamber1 = (0, 14)
-    chamber2 = (14, 14)
-    chamber3 = (28, 14)
-    hall1 = (12, 18)
-    hall2 = (26, 18)
-
-    if vertical_layout:
-        chamber1 = (chamber1[1], chamber1[0])
-        chamber3 = (chamber3[1], chamber3[0])
-        hall1 = (hall1[1], hall1[0])
-        hall2 = (hall2[1], hall2[0])
-
-    # Apply offset values
-    chamber1 = chamber1[0] + chamber_offset, chamber1[1]
-    chamber2 = chamber2[0] + chamber_offset, chamber2[1]
-    chamber3 = chamber3[0] + chamber_offset, chamber3[1]
-    hall1 = hall1[0] + chamber_offset, hall1[1]
-    hall2 = hall2[0] + chamber_offset, hall2[1]
-
-    if has_chamber1:
-        generate_chamber(chamber1, False, True, vertical_layout)
-    if has_chamber2:
-        generate_chamber(chamber2, has_chamber1, has_chamber3, vertical_layout)
-    if has_chamber3:
-        generate_chamber(chamber3, True, False, vertical_layout)
-
-    if has_chamber2:
-        if has_chamber1:
-            generate_hall(hall1, 2, vertical_layout)
-        if has_chamber3:
-            generate_hall(hall2, 2, vertical_layout)
-    else:
-        generate_hall(hall1, 16, vertical_layout)
-
-        # InitSetPiece()
-        # Set a set piece in one of the chambers
-
-
-def fix_tiles_patterns():
-    for j in range(DMAXY):
-        for i in range(DMAXX):
-            if i + 1 < DMAXX:
-                if dungeon[i][j] == Tile["HWall"] and dungeon[i + 1][j] == Tile["Dirt"]:
-                    dungeon[i + 1][j] = Tile["DirtHwallEnd"]
-                if dungeon[i][j] == Tile["Floor"] and dungeon[i + 1][j] == Tile["Dirt"]:
-                    dungeon[i + 1][j] = Tile["DirtHwall"]
-                if (
-                    dungeon[i][j] == Tile["Floor"]
-                    and dungeon[i + 1][j] == Tile["HWall"]
-                ):
-                    dungeon[i + 1][j] = Tile["HWallEnd"]
-                if (
-                    dungeon[i][j] == Tile["VWallEnd"]
-                    and dungeon[i + 1][j] == Tile["Dirt"]
-                ):
-                    dungeon[i + 1][j] = Tile["DirtVwallEnd"]
-
-            if j + 1 < DMAXY:
-                if dungeon[i][j] == Tile["VWall"] and dungeon[i][j + 1] == Tile["Dirt"]:
-                    dungeon[i][j + 1] = Tile["DirtVwallEnd"]
-                if (
-                    dungeon[i][j] == Tile["Floor"]
-                    and dungeon[i][j + 1] == Tile["VWall"]
-                ):
-                    dungeon[i][j + 1] = Tile["VWallEnd"]
-                if dungeon[i][j] == Tile["Floor"] and dungeon[i][j + 1] == Tile["Dirt"]:
-                    dungeon[i][j + 1] = Tile["DirtVwall"]
-
-    for j in range(DMAXY):
-        for i in range(DMAXX):
-            if i + 1 < DMAXX:
-                if (
-                    dungeon[i][j] == Tile["Floor"]
-                    and dungeon[i + 1][j] == Tile["DirtVwall"]
-                ):
-                    dungeon[i + 1][j] = Tile["HDirtCorner"]
-                if dungeon[i][j] == Tile["Floor"] and dungeon[i + 1][j] == Tile["Dirt"]:
-                    dungeon[i + 1][j] = Tile["VDirtCorner"]
-                if (
-                    dungeon[i][j] == Tile["HWallEnd"]
-                    and dungeon[i + 1][j] == Tile["Dirt"]
-                ):
-                    dungeon[i + 1][j] = Tile["DirtHwallEnd"]
-                if (
-                    dungeon[i][j] == Tile["Floor"]
-                    and dungeon[i + 1][j] == Tile["DirtVwallEnd"]
-                ):
-                    dungeon[i + 1][j] = Tile["HDirtCorner"]
-                if (
-                    dungeon[i][j] == Tile["DirtVwall"]
-                    and dungeon[i + 1][j] == Tile["Dirt"]
-                ):
-                    dungeon[i + 1][j] = Tile["VDirtCorner"]
-                if (
-                    dungeon[i][j] == Tile["HWall"]
-                    and dungeon[i + 1][j] == Tile["DirtVwall"]
-                ):
-                    dungeon[i + 1][j] = Tile["HDirtCorner"]
-                if (
-                    dungeon[i][j] == Tile["DirtVwall"]
-                    and dungeon[i + 1][j] == Tile["VWall"]
-                ):
-                    dungeon[i + 1][j] = Tile["VWallEnd"]
-                if (
-                    dungeon[i][j] == Tile["HWallEnd"]
-                    and dungeon[i + 1][j] == Tile["DirtVwall"]
-                ):
-                    dungeon[i + 1][j] = Tile["HDirtCorner"]
-                if (
-                    dungeon[i][j] == Tile["HWall"]
-                    and dungeon[i + 1][j] == Tile["VWall"]
-                ):
-                    dungeon[i + 1][j] = Tile["VWallEnd"]
-                if (
-                    dungeon[i][j] == Tile["Corner"]
-                    and dungeon[i + 1][j] == Tile["Dirt"]
-                ):
-                    dungeon[i + 1][j] = Tile["DirtVwallEnd"]
-                if (
-                    dungeon[i][j] == Tile["HDirtCorner"]
-                    and dungeon[i + 1][j] == Tile["VWall"]
-                ):
-                    dungeon[i + 1][j] = Tile["VWallEnd"]
-                if (
-                    dungeon[i][j] == Tile["HWallEnd"]
-                    and dungeon[i + 1][j] == Tile["VWall"]
-                ):
-                    dungeon[i + 1][j] = Tile["VWallEnd"]
-                if (
-                    dungeon[i][j] == Tile["HWallEnd"]
-                    and dungeon[i + 1][j] == Tile["DirtVwallEnd"]
-                ):
-                    dungeon[i + 1][j] = Tile["HDirtCorner"]
-                if (
-                    dungeon[i][j] == Tile["DWall"]
-                    and dungeon[i + 1][j] == Tile["VCorner"]
-                ):
-                    dungeon[i + 1][j] = Tile["HCorner"]
-                if (
-                    dungeon[i][j] == Tile["HWallEnd"]
-                    and dungeon[i + 1][j] == Tile["Floor"]
-                ):
-                    dungeon[i + 1][j] = Tile["HCorner"]
-                if (
-                    dungeon[i][j] == Tile["HWall"]
-                    and dungeon[i + 1][j] == Tile["DirtVwallEnd"]
-                ):
-                    dungeon[i + 1][j] = Tile["HDirtCorner"]
-                if (
-                    dungeon[i][j] == Tile["HWall"]
-                    and dungeon[i + 1][j] == Tile["Floor"]
-                ):
-                    dungeon[i + 1][j] = Tile["HCorner"]
-            if i > 0:
-                if (
-                    dungeon[i][j] == Tile["DirtHwallEnd"]
-                    and dungeon[i - 1][j] == Tile["Dirt"]
-                ):
-                    dungeon[i - 1][j] = Tile["DirtVwall"]
-                if dungeon[i][j] == ["DirtVwall"] and dungeon[i - 1][j] == [
-                    "DirtHwallEnd"
-                ]:
-                    dungeon[i - 1][j] = ["HDirtCorner"]
-                if dungeon[i][j] == ["VWallEnd"] and dungeon[i - 1][j] == ["Dirt"]:
-                    dungeon[i - 1][j] = ["DirtVwallEnd"]
-                if dungeon[i][j] == ["VWallEnd"] and dungeon[i - 1][j] == [
-                    "DirtHwallEnd"
-                ]:
-                    dungeon[i - 1][j] = ["HDirtCorner"]
-            if j + 1 < DMAXY:
-                if (
-                    dungeon[i][j] == Tile["VWall"]
-                    and dungeon[i][j + 1] == Tile["HWall"]
-                ):
-                    dungeon[i][j + 1] = Tile["HWallEnd"]
-                if (
-                    dungeon[i][j] == Tile["VWallEnd"]
-                    and dungeon[i][j + 1] == Tile["DirtHwall"]
-                ):
-                    dungeon[i][j + 1] = Tile["HDirtCorner"]
-                if (
-                    dungeon[i][j] == Tile["DirtHwall"]
-                    and dungeon[i][j + 1] == Tile["HWall"]
-                ):
-                    dungeon[i][j + 1] = Tile["HWallEnd"]
-                if (
-                    dungeon[i][j] == Tile["VWallEnd"]
-                    and dungeon[i][j + 1] == Tile["HWall"]
-                ):
-                    dungeon[i][j + 1] = Tile["HWallEnd"]
-                if (
-                    dungeon[i][j] == Tile["HDirtCorner"]
-                    and dungeon[i][j + 1] == Tile["HWall"]
-                ):
-                    dungeon[i][j + 1] = Tile["HWallEnd"]
-                if (
-                    dungeon[i][j] == Tile["VWallEnd"]
-                    and dungeon[i][j + 1] == Tile["Dirt"]
-                ):
-                    dungeon[i][j + 1] = Tile["DirtVwallEnd"]
-                if (
-                    dungeon[i][j] == Tile["VWallEnd"]
-                    and dungeon[i][j + 1] == Tile["Floor"]
-                ):
-                    dungeon[i][j + 1] = Tile["VCorner"]
-                if (
-                    dungeon[i][j] == Tile["VWall"]
-                    and dungeon[i][j + 1] == Tile["Floor"]
-                ):
-                    dungeon[i][j + 1] = Tile["VCorner"]
-                if (
-                    dungeon[i][j] == Tile["Floor"]
-                    and dungeon[i][j + 1] == Tile["VCorner"]
-                ):
-                    dungeon[i][j + 1] = Tile["HCorner"]
-            if j > 0:
-                if (
-                    dungeon[i][j] == Tile["VWallEnd"]
-                    and dungeon[i][j - 1] == Tile["Dirt"]
-                ):
-                    dungeon[i][j - 1] = Tile["HWallEnd"]
-                if (
-                    dungeon[i][j] == Tile["VWallEnd"]
-                    and dungeon[i][j - 1] == Tile["Dirt"]
-                ):
-                    dungeon[i][j - 1] = Tile["DirtVwallEnd"]
-                if (
-                    dungeon[i][j] == Tile["HWallEnd"]
-                    and dungeon[i][j - 1] == Tile["DirtVwallEnd"]
-                ):
-                    dungeon[i][j - 1] = Tile["HDirtCorner"]
-                if (
-                    dungeon[i][j] == Tile["DirtHwall"]
-                    and dungeon[i][j - 1] == Tile["DirtVwallEnd"]
-                ):
-                    dungeon[i][j - 1] = Tile["HDirtCorner"]
-
-    for j in range(DMAXY):
-        for i in range(DMAXX):
-            if (
-                j + 1 < DMAXY
-                and dungeon[i][j] == Tile["DWall"]
-                and dungeon[i][j + 1] == Tile["HWall"]
-            ):
-                dungeon[i][j + 1] = Tile["HWallEnd"]
-            if (
-                i + 1 < DMAXX
-                and dungeon[i][j] == Tile["HWall"]
-                and dungeon[i + 1][j] == Tile["DirtVWall"]
-            ):
-                dungeon[i + 1][j] = Tile["HDirtCorner"]
-            if (
-                j + 1 < DMAXY
-                and dungeon[i][j] == Tile["DirtHWall"]
-                and dungeon[i][j + 1] == Tile["Dirt"]
-            ):
-                dungeon[i + 1][j] = Tile["VDirtCorner"]
-
-
-def make_dmt():
-    global dungeon
-    global dungeon_mask
-
-    for j in range(DMAXY - 1):
-        for i in range(DMAXX - 1):
-            if dungeon_mask[i][j]:
-                dungeon[i][j] = Tile["Floor"]
-            elif (
-                not dungeon_mask[i - 1][j + 1]
-                and dungeon_mask[i][j + 1]
-                and dungeon_mask[i - 1, j]
-            ):
-                dungeon[i][j] = Tile["Floor"]
-            elif (
-                dungeon_mask[i + 1][j + 1]
-                and dungeon_mask[i][j + 1]
-                and dungeon_mask[i + 1][j]
-            ):
-                dungeon[i][j] = Tile["VCorner"]
-            elif dungeon_mask[i][j + 1]:
-                dungeon[i][j] = Tile["HWall"]
-            elif dungeon_mask[i + 1][j]:
-                dungeon[i][j] = Tile["VWall"]
-            elif dungeon_mask[i + 1][j + 1]:
-                dungeon[i][j] = Tile["DWall"]
-            else:
-                dungeon[i][j] = Tile["Dirt"]
-
+        while True:
+            while True:
+                self.first_room(map)
+                if self.find_area() > get_min_area(floor):
+                    break
+                map.generation_retries += 1
+
+            self.init_dungeon_flags(map)
+            self.make_dmt()
+            self.fill_chambers()
+            self.fix_tiles_patterns()
+            self.add_wall()
+
+            self.map_dungeon(map)
+            if self.place_all_stairs(map):
+                break
+            map.generation_retries += 1
 
-def generate_hall(start, length, verticalLayout):
-    if verticalLayout:
-        for i in range(start[1], start[1] + length):
-            dungeon[start[0]][i] = Tile["Arch"]
-            dungeon[start[0] + 3][i] = Tile["Arch"]
-    else:
-        for i in range(start[0], start[0] + length):
-            dungeon[i][start[1]] = Tile["Arch"]
-            dungeon[i][start[1] + 3] = Tile["Arch"]
+        if player is not None:
+            place_level_entities(map, floor, self.rng)
+            place_level_torches(map, 4, 10, self.rng)
+            player.place(*map.downstairs_location, map)
 
+        find_theme_rooms(4, 8, Tile["Floor"], map, self.dungeon, rng=self.rng)
+        create_theme_rooms(map, self.rng)
 
-def generate_chamber(
-    position: Tuple[int, int],
-    connectPrevious: bool,
-    connectNext: bool,
-    verticalLayout: bool,
-):
-    global dungeon, chamber
-    x, y = position
-    if connectPrevious:
-        if verticalLayout:
-            dungeon[x + 2][y] = Tile["HWall"]
-            dungeon[x + 3][y] = Tile["HArch"]
-            dungeon[x + 4][y] = Tile["Pillar"]
-            dungeon[x + 7][y] = Tile["Pillar"]
-            dungeon[x + 8][y] = Tile["HArch"]
-            dungeon[x + 9][y] = Tile["HWall"]
-        else:
-            dungeon[x][y + 2] = Tile["VWall"]
-            dungeon[x][y + 3] = Tile["VArch"]
-            dungeon[x][y + 4] = Tile["Pillar"]
-            dungeon[x][y + 7] = Tile["Pillar"]
-            dungeon[x][y + 8] = Tile["VArch"]
-            dungeon[x][y + 9] = Tile["VWall"]
-
-    if connectNext:
-        if verticalLayout:
-            y += 11
-            dungeon[x + 2][y] = Tile["HWall"]
-            dungeon[x + 3][y] = Tile["HArch"]
-            dungeon[x + 4][y] = Tile["Pillar"]
-            dungeon[x + 7][y] = Tile["Pillar"]
-            dungeon[x + 8][y] = Tile["HArch"]
-
-            if dungeon[x + 9][y] != Tile["DWall"]:
-                dungeon[x + 9][y] = Tile["HDirtCorner"]
-            y -= 11
-        else:
-            x += 11
-            dungeon[x][y + 2] = Tile["HWallVArch"]
-            dungeon[x][y + 3] = Tile["VArch"]
-            dungeon[x][y + 4] = Tile["Pillar"]
-            dungeon[x][y + 7] = Tile["Pillar"]
-            dungeon[x][y + 8] = Tile["VArch"]
-
-            if dungeon[x][y + 9] != Tile["DWall"]:
-                dungeon[x][y + 9] = Tile["HDirtCorner"]
-            x -= 11
-
-    for i in range(1, 11):
-        for j in range(1, 11):
-            dungeon[j + x][i + y] = Tile["Floor"]
-            chamber[j + x][i + y] = True
-
-    dungeon[x + 4][y + 4] = Tile["Pillar"]
-    dungeon[x + 7][y + 4] = Tile["Pillar"]
-    dungeon[x + 4][y + 7] = Tile["Pillar"]
-    dungeon[x + 7][y + 7] = Tile["Pillar"]
-
-
-def HorizontalWallOk(position: Tuple[int, int]):
-    global protected
-    global chamber
-    length = 1
-    x, y = position
-    while dungeon[x + length][y] == Tile["Floor"]:
-        if (
-            dungeon[x + length][y - 1] != Tile["Floor"]
-            or dungeon[x + length][y + 1] != Tile["Floor"]
-            or protected[x + length][y]
-            or chamber[x + length][y]
-        ):
-            break
-        length += 1
-
-    if length == 1:
-        return -1
-
-    tileId = dungeon[x + length][y]
-
-    if tileId not in (
-        Tile["Corner"],
-        Tile["Wall"],
-        Tile["Arch"],
-        Tile["VWallEnd"],
-        Tile["HWallEnd"],
-        Tile["VCorner"],
-        Tile["HCorner"],
-        Tile["DirtHwall"],
-        Tile["DirtVwall"],
-        Tile["VDirtCorner"],
-        Tile["HDirtCorner"],
-        Tile["DirtHwallEnd"],
-        Tile["DirtVwallEnd"],
-    ):
-        return -1
+        return map
 
-    return length
+    def init_dungeon_flags(self, map: GameMap):
+        self.DMAXX = map.width
+        self.DMAXY = map.height
+        self.dungeon = np.full(
+            (self.DMAXX, self.DMAXY), fill_value=Tile["Dirt"], dtype=np.uint8, order="F"
+        )
+        self.protected = np.full((self.DMAXX, self.DMAXY), fill_value=False, order="F")
+        self.chamber = np.full((self.DMAXX, self.DMAXY), fill_value=False, order="F")
+
+    def map_room(self, room: RectRoom, map: GameMap):
+        self.rooms.append(room)
+        self.dungeon_mask[room.x1 : room.x2, room.y1 : room.y2] = True
+
+    def place_stairs(self, map: GameMap, tile_type, location_name: str) -> bool:
+        x = generate_rnd(map.width - 1, self.rng)
+        y = generate_rnd(map.height - 1, self.rng)
+        j = y
+        for i in range(x, map.width - 1):
+            if i == map.width - 1:
+                i = 0
+                j += 1
+                if j == map.height - 1:
+                    j = 0
+            if self.dungeon[i][j] == Tile["Floor"]:
+                map.tiles[i][j] = tile_type
+                setattr(map, location_name, (i, j))
+                return True
+        return False
 
+    def place_all_stairs(self, map: GameMap) -> bool:
+        stairs_down = self.place_stairs(
+            map, tile_types.down_stairs, "downstairs_location"
+        )
+        stairs_up = self.place_stairs(map, tile_types.up_stairs, "upstairs_location")
+        return stairs_down and stairs_up
 
-def VerticalWallOk(position: Tuple[int, int]):
-    global protected, chamber
-    x, y = position
-    length = 1
-    while dungeon[x][y + length] == Tile["Floor"]:
+    def check_room(self, room: RectRoom, map: GameMap):
         if (
-            dungeon[x - 1][y + length] != Tile["Floor"]
-            or dungeon[x + 1][y + length] != Tile["Floor"]
-            or protected[x][y + length]
-            or chamber[x][y + length]
+            room.x < 0
+            or room.y < 0
+            or room.x2 >= map.width
+            or room.y2 >= map.height
         ):
-            break
-        length += 1
-
-    if length == 1:
-        return -1
-
-    tile_id = dungeon[x][y + length]
-
-    if tile_id not in (
-        Tile["Corner"],
-        Tile["Wall"],
-        Tile["Arch"],
-        Tile["VWallEnd"],
-        Tile["HWallEnd"],
-        Tile["VCorner"],
-        Tile["HCorner"],
-        Tile["DirtHwall"],
-        Tile["DirtVwall"],
-        Tile["VDirtCorner"],
-        Tile["HDirtCorner"],
-        Tile["DirtHwallEnd"],
-        Tile["DirtVwallEnd"],
-    ):
-        return -1
-
-    return length
-
-
-def HorizontalWall(position: Tuple[int, int], start: int, maxX: int):
-    global protected
-    x, y = position
-    wallTile = Tile["HWall"]
-    doorTile = Tile["HDoor"]
-
-    rnd = generate_rnd(4)
-    if rnd == 2:  # Add arch
-        wallTile = Tile["HArch"]
-        doorTile = Tile["HArch"]
-        if start == Tile["HWall"]:
-            start = Tile["HArch"]
-        elif start == Tile["DWall"]:
-            start = Tile["HArchVWall"]
-    elif rnd == 3:  # Add Fence
-        wallTile = Tile["HFence"]
-        if start == Tile["HWall"]:
-            start = Tile["HFence"]
-        elif start == Tile["DWall"]:
-            start = Tile["HFenceVWall"]
-
-    if generate_rnd(6) == 5:
-        doorTile = Tile["HArch"]
+            return False
 
-    dungeon[x][y] = start
+        return not self.dungeon_mask[room.x1 : room.x2, room.y1 : room.y2].any()
 
-    for i in range(1, maxX):
-        dungeon[x + i][y] = wallTile
+    def generate_room(self, area: RectRoom, map: GameMap, vertical_layout: bool):
+        place_room1 = False
 
-    i = generate_rnd(maxX - 1) + 1
+        rotate = flip_coin(4, self.rng)
+        vertical_layout = (not vertical_layout and rotate) or (
+            vertical_layout and not rotate
+        )
 
-    dungeon[x + i][y] = doorTile
+        room1 = RectRoom(0, 0, 0, 0)
+
+        for _ in range(20):
+            random_width = (self.rng.randint(0, 4) + 2) & ~1
+            random_height = (self.rng.randint(0, 4) + 2) & ~1
+            room1.x = area.x
+            room1.y = area.y
+            room1.width = random_width
+            room1.height = random_height
+
+            if vertical_layout:
+                room1.x += -room1.width
+                room1.y += int(area.height / 2 - room1.height / 2)
+                place_room1 = self.check_room(
+                    RectRoom(
+                        room1.x - 1, room1.y - 1, room1.width + 1, room1.height + 2
+                    ),
+                    map,
+                )
+            else:
+                room1.x += int(area.width / 2 - random_width / 2)
+                room1.y += -room1.height
+                place_room1 = self.check_room(
+                    RectRoom(
+                        room1.x - 1, room1.y - 1, room1.width + 2, room1.height + 1
+                    ),
+                    map,
+                )
+
+            if place_room1:
+                break
 
-    if doorTile == Tile["HDoor"]:
-        protected[x + i][y] = True
+        if place_room1:
+            self.map_room(room1, map)
 
+        place_room2 = False
+        room2 = copy.deepcopy(room1)
 
-def VerticalWall(position: Tuple[int, int], start: int, max_y: int):
-    x, y = position
-    wall_tile = Tile["VWall"]
-    door_tile = Tile["VDoor"]
+        if vertical_layout:
+            room2.x = area.x + area.width
 
-    rnd = generate_rnd(4)
-    if rnd == 2:  # Add arch
-        wall_tile = Tile["VArch"]
-        door_tile = Tile["VArch"]
-        if start == Tile["VWall"]:
-            start = Tile["VArch"]
-        elif start == Tile["DWall"]:
-            start = Tile["HWallVArch"]
-    elif rnd == 3:  # Add Fence
-        wall_tile = Tile["VFence"]
-        if start == Tile["VWall"]:
-            start = Tile["VFence"]
-        elif start == Tile["DWall"]:
-            start = Tile["HWallVFence"]
+            place_room2 = self.check_room(
+                RectRoom(room2.x1, room2.y1 - 1, room2.width + 1, room2.height + 2),
+                map,
+            )
+        else:
+            room2.y = area.y + area.height
 
-    if generate_rnd(6) == 5:
-        door_tile = Tile["VArch"]
+            place_room2 = self.check_room(
+                RectRoom(room2.x1 - 1, room2.y1, room2.width + 2, room2.height + 1),
+                map,
+            )
 
-    dungeon[x][y] = start
+        if place_room2:
+            self.map_room(room2, map)
+        if place_room1:
+            self.generate_room(room1, map, not vertical_layout)
+        if place_room2:
+            self.generate_room(room2, map, not vertical_layout)
 
-    for j in range(1, max_y):
-        dungeon[x][y + j] = wall_tile
+    def first_room(self, map: GameMap):
+        self.dungeon_mask = np.full(
+            (map.width, map.height), fill_value=False, order="F"
+        )
+        self.rooms = []
+        self.vertical_layout = flip_coin(rng=self.rng)
+        self.has_chamber1 = not flip_coin(rng=self.rng)
+        self.has_chamber2 = not flip_coin(rng=self.rng)
+        self.has_chamber3 = not flip_coin(rng=self.rng)
+        self.chamber_offset = generate_rnd(24, self.rng)
+
+        if not self.has_chamber1 or not self.has_chamber3:
+            self.has_chamber2 = True
+
+        chamber1 = RectRoom(1, 15, 10, 10)
+        chamber2 = RectRoom(15, 15, 10, 10)
+        chamber3 = RectRoom(29, 15, 10, 10)
+        hallway_x1 = 1
+        hallway_width = 38
+        if not self.has_chamber1:
+            hallway_x1 += 17
+            hallway_width -= 17
+        if not self.has_chamber3:
+            hallway_width -= 16
+
+        hallway = RectRoom(hallway_x1, 17, hallway_width, 6)
+
+        if self.vertical_layout:
+            chamber1.x, chamber1.y = chamber1.y, chamber1.x
+            chamber3.x, chamber3.y = chamber3.y, chamber3.x
+            hallway.x, hallway.y = hallway.y, hallway.x
+            hallway.width, hallway.height = hallway.height, hallway.width
+
+        chamber1.x += self.chamber_offset
+        chamber2.x += self.chamber_offset
+        chamber3.x += self.chamber_offset
+        hallway.x += self.chamber_offset
+
+        if self.has_chamber1:
+            self.map_room(chamber1, map)
+        if self.has_chamber2:
+            self.map_room(chamber2, map)
+        if self.has_chamber3:
+            self.map_room(chamber3, map)
+
+        self.map_room(hallway, map)
+
+        if self.has_chamber1:
+            self.generate_room(chamber1, map, self.vertical_layout)
+        if self.has_chamber2:
+            self.generate_room(chamber2, map, self.vertical_layout)
+        if self.has_chamber3:
+            self.generate_room(chamber3, map, self.vertical_layout)
+
+    def find_area(self):
+        total_count = 0
+        for room in self.rooms:
+            total_count += room.outer_size
+
+        return total_count
+
+    def fill_chambers(self):
+        chamber1 = (0, 14)
+        chamber2 = (14, 14)
+        chamber3 = (28, 14)
+        hall1 = (12, 18)
+        hall2 = (26, 18)
+
+        if self.vertical_layout:
+            chamber1 = (chamber1[1], chamber1[0])
+            chamber3 = (chamber3[1], chamber3[0])
+            hall1 = (hall1[1], hall1[0])
+            hall2 = (hall2[1], hall2[0])
+
+        # Apply offset values
+        chamber1 = chamber1[0] + self.chamber_offset, chamber1[1]
+        chamber2 = chamber2[0] + self.chamber_offset, chamber2[1]
+        chamber3 = chamber3[0] + self.chamber_offset, chamber3[1]
+        hall1 = hall1[0] + self.chamber_offset, hall1[1]
+        hall2 = hall2[0] + self.chamber_offset, hall2[1]
+
+        if self.has_chamber1:
+            self.generate_chamber(chamber1, False, True, self.vertical_layout)
+        if self.has_chamber2:
+            self.generate_chamber(
+                chamber2, self.has_chamber1, self.has_chamber3, self.vertical_layout
+            )
+        if self.has_chamber3:
+            self.generate_chamber(chamber3, True, False, self.vertical_layout)
+
+        if self.has_chamber2:
+            if self.has_chamber1:
+                self.generate_hall(hall1, 2, self.vertical_layout)
+            if self.has_chamber3:
+                self.generate_hall(hall2, 2, self.vertical_layout)
+        else:
+            self.generate_hall(hall1, 16, self.vertical_layout)
+
+            # InitSetPiece()
+            # Set a set piece in one of the chambers
+
+    def fix_tiles_patterns(self):
+        for rules in PATTERN_PASSES:
+            self.dungeon[:, :] = fix_tiles_pattern_pass(self.dungeon, rules)
+
+    def make_dmt(self):
+        mask = self.dungeon_mask
+        # The neighbours of each cell, left of the first column is the last one.
+        left = np.roll(mask, 1, axis=0)[:-1, :-1]
+        below = mask[:-1, 1:]
+        below_left = np.roll(mask, 1, axis=0)[:-1, 1:]
+        right = mask[1:, :-1]
+        below_right = mask[1:, 1:]
+        self.dungeon[:-1, :-1] = np.select(
+            [
+                mask[:-1, :-1],
+                ~below_left & below & left,
+                below_right & below & right,
+                below,
+                right,
+                below_right,
+            ],
+            [
+                Tile["Floor"],
+                Tile["Floor"],
+                Tile["VCorner"],
+                Tile["HWall"],
+                Tile["VWall"],
+                Tile["DWall"],
+            ],
+            Tile["Dirt"],
+        )
 
-    j = generate_rnd(max_y - 1) + 1
+    def generate_hall(self, start, length, verticalLayout):
+        if verticalLayout:
+            for i in range(start[1], start[1] + length):
+                self.dungeon[start[0]][i] = Tile["Arch"]
+                self.dungeon[start[0] + 3][i] = Tile["Arch"]
+        else:
+            for i in range(start[0], start[0] + length):
+                self.dungeon[i][start[1]] = Tile["Arch"]
+                self.dungeon[i][start[1] + 3] = Tile["Arch"]
+
+    def generate_chamber(
+        self,
+        position: Tuple[int, int],
+        connectPrevious: bool,
+        connectNext: bool,
+        verticalLayout: bool,
+    ):
+        x, y = position
+        if connectPrevious:
+            if verticalLayout:
+                self.dungeon[x + 2][y] = Tile["HWall"]
+                self.dungeon[x + 3][y] = Tile["HArch"]
+                self.dungeon[x + 4][y] = Tile["Pillar"]
+                self.dungeon[x + 7][y] = Tile["Pillar"]
+                self.dungeon[x + 8][y] = Tile["HArch"]
+                self.dungeon[x + 9][y] = Tile["HWall"]
+            else:
+                self.dungeon[x][y + 2] = Tile["VWall"]
+                self.dungeon[x][y + 3] = Tile["VArch"]
+                self.dungeon[x][y + 4] = Tile["Pillar"]
+                self.dungeon[x][y + 7] = Tile["Pillar"]
+                self.dungeon[x][y + 8] = Tile["VArch"]
+                self.dungeon[x][y + 9] = Tile["VWall"]
+
+        if connectNext:
+            if verticalLayout:
+                y += 11
+                self.dungeon[x + 2][y] = Tile["HWall"]
+                self.dungeon[x + 3][y] = Tile["HArch"]
+                self.dungeon[x + 4][y] = Tile["Pillar"]
+                self.dungeon[x + 7][y] = Tile["Pillar"]
+                self.dungeon[x + 8][y] = Tile["HArch"]
+
+                if self.dungeon[x + 9][y] != Tile["DWall"]:
+                    self.dungeon[x + 9][y] = Tile["HDirtCorner"]
+                y -= 11
+            else:
+                x += 11
+                self.dungeon[x][y + 2] = Tile["HWallVArch"]
+                self.dungeon[x][y + 3] = Tile["VArch"]
+                self.dungeon[x][y + 4] = Tile["Pillar"]
+                self.dungeon[x][y + 7] = Tile["Pillar"]
+                self.dungeon[x][y + 8] = Tile["VArch"]
+
+                if self.dungeon[x][y + 9] != Tile["DWall"]:
+                    self.dungeon[x][y + 9] = Tile["HDirtCorner"]
+                x -= 11
+
+        for i in range(1, 11):
+            for j in range(1, 11):
+                self.dungeon[j + x][i + y] = Tile["Floor"]
+                self.chamber[j + x][i + y] = True
+
+        self.dungeon[x + 4][y + 4] = Tile["Pillar"]
+        self.dungeon[x + 7][y + 4] = Tile["Pillar"]
+        self.dungeon[x + 4][y + 7] = Tile["Pillar"]
+        self.dungeon[x + 7][y + 7] = Tile["Pillar"]
+
+    def horizontal_wall_ok(self, position: Tuple[int, int]):
+        length = 1
+        x, y = position
+        while self.dungeon[x + length][y] == Tile["Floor"]:
+            if (
+                self.dungeon[x + length][y - 1] != Tile["Floor"]
+                or self.dungeon[x + length][y + 1] != Tile["Floor"]
+                or self.protected[x + length][y]
+                or self.chamber[x + length][y]
+            ):
+                break
+            length += 1
 
-    dungeon[x][y + j] = door_tile
-    if door_tile == Tile["VDoor"]:
-        protected[x][y + j] = True
+        if length == 1:
+            return -1
 
+        tileId = self.dungeon[x + length][y]
 
-def add_wall():
-    global protected
-    global chamber
-    global dungeon
+        if tileId not in WALL_END_TILES:
+            return -1
 
-    for j in range(DMAXY):
-        for i in range(DMAXX):
-            if protected[i][j] or chamber[i][j]:
-                continue
+        return length
 
-            if dungeon[i][j] == Tile["Corner"]:
-                max_x = HorizontalWallOk((i, j))
+    def vertical_wall_ok(self, position: Tuple[int, int]):
+        x, y = position
+        length = 1
+        while self.dungeon[x][y + length] == Tile["Floor"]:
+            if (
+                self.dungeon[x - 1][y + length] != Tile["Floor"]
+                or self.dungeon[x + 1][y + length] != Tile["Floor"]
+                or self.protected[x][y + length]
+                or self.chamber[x][y + length]
+            ):
+                break
+            length += 1
+
+        if length == 1:
+            return -1
+
+        tile_id = self.dungeon[x][y + length]
+
+        if tile_id not in WALL_END_TILES:
+            return -1
+
+        return length
+
+    def horizontal_wall(self, position: Tuple[int, int], start: int, maxX: int):
+        x, y = position
+        wallTile = Tile["HWall"]
+        doorTile = Tile["HDoor"]
+
+        rnd = generate_rnd(4, self.rng)
+        if rnd == 2:  # Add arch
+            wallTile = Tile["HArch"]
+            doorTile = Tile["HArch"]
+            if start == Tile["HWall"]:
+                start = Tile["HArch"]
+            elif start == Tile["DWall"]:
+                start = Tile["HArchVWall"]
+        elif rnd == 3:  # Add Fence
+            wallTile = Tile["HFence"]
+            if start == Tile["HWall"]:
+                start = Tile["HFence"]
+            elif start == Tile["DWall"]:
+                start = Tile["HFenceVWall"]
+
+        if generate_rnd(6, self.rng) == 5:
+            doorTile = Tile["HArch"]
+
+        self.dungeon[x][y] = start
+
+        for i in range(1, maxX):
+            self.dungeon[x + i][y] = wallTile
+
+        i = generate_rnd(maxX - 1, self.rng) + 1
+
+        self.dungeon[x + i][y] = doorTile
+
+        if doorTile == Tile["HDoor"]:
+            self.protected[x + i][y] = True
+
+    def vertical_wall(self, position: Tuple[int, int], start: int, max_y: int):
+        x, y = position
+        wall_tile = Tile["VWall"]
+        door_tile = Tile["VDoor"]
+
+        rnd = generate_rnd(4, self.rng)
+        if rnd == 2:  # Add arch
+            wall_tile = Tile["VArch"]
+            door_tile = Tile["VArch"]
+            if start == Tile["VWall"]:
+                start = Tile["VArch"]
+            elif start == Tile["DWall"]:
+                start = Tile["HWallVArch"]
+        elif rnd == 3:  # Add Fence
+            wall_tile = Tile["VFence"]
+            if start == Tile["VWall"]:
+                start = Tile["VFence"]
+            elif start == Tile["DWall"]:
+                start = Tile["HWallVFence"]
+
+        if generate_rnd(6, self.rng) == 5:
+            door_tile = Tile["VArch"]
+
+        self.dungeon[x][y] = start
+
+        for j in range(1, max_y):
+            self.dungeon[x][y + j] = wall_tile
+
+        j = generate_rnd(max_y - 1, self.rng) + 1
+
+        self.dungeon[x][y + j] = door_tile
+        if door_tile == Tile["VDoor"]:
+            self.protected[x][y + j] = True
+
+    def add_wall(self):
+        # The walls added on the way never start new ones, so only the cells with one
+        # of the start tiles from the beginning are visited, row by row.
+        starts = np.isin(self.dungeon, WALL_START_TILES)
+        starts &= ~self.protected & ~self.chamber
+        rows, columns = np.nonzero(starts.T)
+        for j, i in zip(rows.tolist(), columns.tolist()):
+            if self.dungeon[i, j] == Tile["Corner"]:
+                max_x = self.horizontal_wall_ok((i, j))
                 if max_x != -1:
-                    HorizontalWall((i, j), Tile["HWall"], max_x)
+                    self.horizontal_wall((i, j), Tile["HWall"], max_x)
 
-            if dungeon[i][j] == Tile["Corner"]:
-                max_y = VerticalWallOk((i, j))
+            if self.dungeon[i, j] == Tile["Corner"]:
+                max_y = self.vertical_wall_ok((i, j))
                 if max_y != -1:
-                    VerticalWall((i, j), Tile["VWall"], max_y)
+                    self.vertical_wall((i, j), Tile["VWall"], max_y)
 
-            if dungeon[i][j] == Tile["VWallEnd"]:
-                max_x = HorizontalWallOk((i, j))
+            if self.dungeon[i, j] == Tile["VWallEnd"]:
+                max_x = self.horizontal_wall_ok((i, j))
                 if max_x != -1:
-                    HorizontalWall((i, j), Tile["DWall"], max_x)
+                    self.horizontal_wall((i, j), Tile["DWall"], max_x)
 
-            if dungeon[i][j] == Tile["HWallEnd"]:
-                max_y = VerticalWallOk((i, j))
+            if self.dungeon[i, j] == Tile["HWallEnd"]:
+                max_y = self.vertical_wall_ok((i, j))
                 if max_y != -1:
-                    VerticalWall((i, j), Tile["DWall"], max_y)
+                    self.vertical_wall((i, j), Tile["DWall"], max_y)
 
-            if dungeon[i][j] == Tile["HWall"]:
-                max_x = HorizontalWallOk((i, j))
+            if self.dungeon[i, j] == Tile["HWall"]:
+                max_x = self.horizontal_wall_ok((i, j))
                 if max_x != -1:
-                    HorizontalWall((i, j), Tile["HWall"], max_x)
+                    self.horizontal_wall((i, j), Tile["HWall"], max_x)
 
-            if dungeon[i][j] == Tile["VWall"]:
-                max_y = VerticalWallOk((i, j))
+            if self.dungeon[i, j] == Tile["VWall"]:
+                max_y = self.vertical_wall_ok((i, j))
                 if max_y != -1:
-                    VerticalWall((i, j), Tile["VWall"], max_y)
-
-
-def map_dungeon(map: GameMap):
-    global dungeon
-    # iterate through the dungeon tiles
-    # map the dungeon tiles to the corresponding tile type
-    for j in range(map.height):
-        for i in range(map.width):
-            if dungeon[i][j] == Tile["Floor"]:
-                map.tiles[i][j] = tile_types.floor
-            elif dungeon[i][j] in (
-                Tile["Wall"],
-                Tile["DWall"],
-                Tile["VWall"],
-                Tile["HWall"],
-                Tile["VWallEnd"],
-                Tile["HWallEnd"],
-                Tile["VCorner"],
-                Tile["HCorner"],
-                Tile["VArchHWall"],
-                Tile["HWallVArch"],
-                Tile["DirtHwall"],
-                Tile["DirtVwall"],
-                Tile["VDirtCorner"],
-                Tile["HDirtCorner"],
-                Tile["DirtHwallEnd"],
-                Tile["DirtVwallEnd"],
-                Tile["HWallVFence"],
-                Tile["HFenceVWall"],
-                Tile["HArchVWall"],
-            ):
-                map.tiles[i][j] = tile_types.wall
-            elif dungeon[i][j] in (
-                Tile["Arch"],
-                Tile["VArch"],
-                Tile["HArch"],
-                Tile["DArch"],
-                Tile["Corner"],
-                Tile["VArchEnd"],
-                Tile["HArchEnd"],
-                Tile["DirtVwall"],
-            ):
-                map.tiles[i][j] = tile_types.arch
-            elif dungeon[i][j] in (Tile["HFence"], Tile["VFence"]):
-                map.tiles[i][j] = tile_types.fence
-            elif dungeon[i][j] == Tile["Pillar"]:
-                map.tiles[i][j] = tile_types.pillar
-            elif dungeon[i][j] in (Tile["HDoor"], Tile["VDoor"]):
-                map.tiles[i][j] = tile_types.closed_door
-            elif dungeon[i][j] == Tile["Dirt"]:
-                map.tiles[i][j] = tile_types.wall
-            else:
-                map.tiles[i][j] = tile_types.unknown
+                    self.vertical_wall((i, j), Tile["VWall"], max_y)
+
+    def map_dungeon(self, map: GameMap):
+        map.tiles[:, :] = GAME_TILES[self.dungeon[: map.width, : map.height]]
+
+
+def generate_cathedral(
+    map_width: int,
+    map_height: int,
+    engine: Engine,
+    rng: Optional[random.Random] = None,
+) -> GameMap:
+    """Generate a cathedral map, with an RNG seeded from the global one if not given."""
+    if rng is None:
+        rng = random.Random(random.getrandbits(64))
+    return CathedralGenerator(map_width, map_height, engine, rng).generate()
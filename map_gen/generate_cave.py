@@ -1,7 +1,7 @@
 """Generator of cave type maps."""
 
 from __future__ import annotations
-from typing import List, TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
 import random
 from map_gen import parameters
 from map_gen.cave_room import CaveLikeRoom
@@ -27,8 +27,11 @@ def generate_cave(
     map_width: int,
     map_height: int,
     engine: Engine,
+    rng: Optional[random.Random] = None,
 ) -> GameMap:
-    """Generate a new dungeon map."""
+    """Generate a new cave map, with an RNG seeded from the global one if not given."""
+    if rng is None:
+        rng = random.Random(random.getrandbits(64))
     player = engine.player
     dungeon = GameMap(
         engine,
@@ -45,34 +48,31 @@ def generate_cave(
     current_encounters = 0
 
     for _r in range(max_rooms):
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = rng.randint(0, dungeon.width - room_width - 1)
+        y = rng.randint(0, dungeon.height - room_height - 1)
 
         # "RectangularRoom" class makes rectangles easier to work with
         new_room = CaveLikeRoom(
-            x, y, room_width, room_height, fill_probability=0.55, generations=4
+            x, y, room_width, room_height, fill_probability=0.55, generations=4, rng=rng
         )
 
         # Run through the other rooms and see if they intersect with this one.
         if any(new_room.intersects(other_room) for other_room in rooms):
+            dungeon.generation_retries += 1
             continue  # This room intersects, so go to the next attempt.
         # If there are no intersections then the room is valid.
 
-        # Dig out this rooms inner area.
-
-        for h in range(new_room.height):
-            for w in range(new_room.width):
-                if new_room.inner[h][w] == 1:  # If the cell is filled
-                    # Map the local room coordinates to the GameMap coordinates
-                    game_map_x = new_room.x1 + w
-                    game_map_y = new_room.y1 + h
-
-                    # Check bounds and place the tile if it's within the GameMap
-                    if dungeon.in_bounds(game_map_x, game_map_y):
-                        dungeon.tiles[game_map_x, game_map_y] = tile_types.dirt_floor
+        # Dig out this rooms inner area, only the part within the GameMap bounds.
+        room_tiles = dungeon.tiles[
+            new_room.x1 : new_room.x1 + new_room.width,
+            new_room.y1 : new_room.y1 + new_room.height,
+        ]
+        room_tiles[new_room.inner[: room_tiles.shape[0], : room_tiles.shape[1]]] = (
+            tile_types.dirt_floor
+        )
 
         if len(rooms) == 0:
             # The first room, where the player starts.
@@ -80,7 +80,7 @@ def generate_cave(
                 player.place(*new_room.center, dungeon)
         else:  # All rooms after the first.
             # Dig out a tunnel between this room and the previous one.
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
+            for x, y in tunnel_between(rooms[-1].center, new_room.center, rng):
                 dungeon.tiles[x, y] = tile_types.dirt_floor
 
         # Only place encounters and entities if we have a player
@@ -88,14 +88,14 @@ def generate_cave(
             if (
                 current_encounters <= max_encounters
                 and len(rooms) > 0  # Skip first room
-                and random.random() < DUNGEON_ENCOUNTER_CHANCE
+                and rng.random() < DUNGEON_ENCOUNTER_CHANCE
             ):
-                if place_encounter(new_room, dungeon, floor):
+                if place_encounter(new_room, dungeon, floor, rng):
                     current_encounters += 1
                 else:
-                    place_room_entities(new_room, dungeon, floor)
+                    place_room_entities(new_room, dungeon, floor, rng)
             else:
-                place_room_entities(new_room, dungeon, floor)
+                place_room_entities(new_room, dungeon, floor, rng)
 
         rooms.append(new_room)
 
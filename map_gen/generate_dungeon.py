@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import random
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Optional
 
 from map_gen import parameters
 
@@ -31,8 +31,11 @@ def generate_dungeon(
     map_width: int,
     map_height: int,
     engine: Engine,
+    rng: Optional[random.Random] = None,
 ) -> GameMap:
-    """Generate a new dungeon map."""
+    """Generate a new dungeon map, with an RNG seeded from the global one if not given."""
+    if rng is None:
+        rng = random.Random(random.getrandbits(64))
     DUNGEON_ENCOUNTER_CHANCE = 0.1
     player = engine.player
     dungeon = GameMap(engine, map_width, map_height, entities=[player], name="Crypt")
@@ -43,13 +46,13 @@ def generate_dungeon(
     rooms: List[Room] = []
 
     for _r in range(max_rooms):
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = rng.randint(0, dungeon.width - room_width - 1)
+        y = rng.randint(0, dungeon.height - room_height - 1)
 
-        if random.random() > 0.8:
+        if rng.random() > 0.8:
             # Theres a chance of the room being an ellipsis, use only with to keep them as circles.
             new_room = EllipsisRoom(x, y, room_width, room_width)
         else:
@@ -57,6 +60,7 @@ def generate_dungeon(
 
         # Run through the other rooms and see if they intersect with this one.
         if any(new_room.intersects(other_room) for other_room in rooms):
+            dungeon.generation_retries += 1
             continue  # This room intersects, so go to the next attempt.
         # If there are no intersections then the room is valid.
 
@@ -72,7 +76,7 @@ def generate_dungeon(
             has_placed_first_door = False
             has_placed_second_door = False
 
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
+            for x, y in tunnel_between(rooms[-1].center, new_room.center, rng):
                 tile = dungeon.tiles[x, y]
                 is_within_bounds = rooms[-1].is_within_inner_bounds(x, y)
                 walkable_count = len(list(dungeon.get_walkable_adjacent_tiles(x, y)))
@@ -100,14 +104,14 @@ def generate_dungeon(
             if (
                 current_encounters <= max_encounters
                 and len(rooms) > 0  # Skip first room
-                and random.random() < DUNGEON_ENCOUNTER_CHANCE
+                and rng.random() < DUNGEON_ENCOUNTER_CHANCE
             ):
-                if place_encounter(new_room, dungeon, floor):
+                if place_encounter(new_room, dungeon, floor, rng):
                     current_encounters += 1
                 else:
-                    place_room_entities(new_room, dungeon, floor)
+                    place_room_entities(new_room, dungeon, floor, rng)
             else:
-                place_room_entities(new_room, dungeon, floor)
+                place_room_entities(new_room, dungeon, floor, rng)
 
         rooms.append(new_room)
 
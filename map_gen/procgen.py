@@ -1,7 +1,11 @@
-"""Utilities for procedural generation of maps."""
+"""Utilities for procedural generation of maps.
+
+Every random decision takes an optional rng, the map generators pass their own so a
+floor only depends on its seed. Without one the global random state is used.
+"""
 
 from __future__ import annotations
-from typing import Dict, Iterator, List, Set, Tuple, TYPE_CHECKING
+from typing import Dict, Iterator, List, Optional, Set, Tuple, TYPE_CHECKING
 import random
 import numpy as np
 import tcod
@@ -39,6 +43,7 @@ def get_entities_at_random(
     weighted_chances_by_floor: Dict[int, List[Tuple[Entity, int]]],
     number_of_entities: int,
     floor: int,
+    rng: Optional[random.Random] = None,
 ) -> List[Entity]:
     """Get a list of entities from a list based on their weight, with a given number for a specific floor."""
     entity_weighted_chances = {}
@@ -56,7 +61,7 @@ def get_entities_at_random(
     entities = list(entity_weighted_chances.keys())
     entity_weighted_chance_values = list(entity_weighted_chances.values())
 
-    chosen_entities = random.choices(
+    chosen_entities = (rng or random).choices(
         entities, weights=entity_weighted_chance_values, k=number_of_entities
     )
 
@@ -65,6 +70,7 @@ def get_entities_at_random(
 
 def get_encounter_for_level(
     floor: int,
+    rng: Optional[random.Random] = None,
 ) -> Encounter:
     """Get an encounter for a given floor."""
     entity_weighted_chances = {}
@@ -82,20 +88,22 @@ def get_encounter_for_level(
     encounters = list(entity_weighted_chances.keys())
     entity_weighted_chance_values = list(entity_weighted_chances.values())
 
-    chose_encounter = random.choices(encounters, weights=entity_weighted_chance_values)[
-        0
-    ]
+    chose_encounter = (rng or random).choices(
+        encounters, weights=entity_weighted_chance_values
+    )[0]
 
     return chose_encounter
 
 
 def tunnel_between(
-    start: Tuple[int, int], end: Tuple[int, int]
+    start: Tuple[int, int],
+    end: Tuple[int, int],
+    rng: Optional[random.Random] = None,
 ) -> Iterator[Tuple[int, int]]:
     """Return an L-shaped tunnel between these two points."""
     x1, y1 = start
     x2, y2 = end
-    if random.random() < 0.5:  # 50% chance.
+    if (rng or random).random() < 0.5:  # 50% chance.
         # Move horizontally, then vertically.
         corner_x, corner_y = x2, y1
     else:
@@ -115,91 +123,97 @@ def get_fixed_items(floor: int) -> List[Entity]:
     return result
 
 
-def place_room_entities(room: Room, dungeon: GameMap, floor: int):
+def place_entities_in_area(
+    entities: List[Entity],
+    dungeon: GameMap,
+    x1: int,
+    y1: int,
+    x2: int,
+    y2: int,
+    rng: Optional[random.Random] = None,
+):
+    """
+    Spawn the entities on distinct random free tiles of the [x1:x2, y1:y2] area.
+    Entities that don't fit in the area are not placed.
+    """
+    tiles = dungeon.sample_free_tiles(len(entities), x1, y1, x2, y2, rng)
+    for entity, (x, y) in zip(entities, tiles):
+        entity.spawn(x, y, dungeon, rng)
+
+
+def place_room_entities(
+    room: Room, dungeon: GameMap, floor: int, rng: Optional[random.Random] = None
+):
     """
     Place entities in a given room a GameMap.
     """
     max_monsters = get_max_value_for_floor(parameters.max_room_monsters_by_floor, floor)
     max_items = get_max_value_for_floor(parameters.max_room_items_by_floor, floor)
 
-    num_monsters = random.randint(0, max_monsters)
-    num_items = random.randint(0, max_items)
+    num_monsters = (rng or random).randint(0, max_monsters)
+    num_items = (rng or random).randint(0, max_items)
 
-    monsters = get_entities_at_random(parameters.enemy_chances, num_monsters, floor)
-    items = get_entities_at_random(parameters.item_chances, num_items, floor)
-
-    for entity in monsters + items:
-        placed = False
-        while not placed:
-            x = random.randint(room.x1 + 1, room.x2 - 1)
-            y = random.randint(room.y1 + 1, room.y2 - 1)
+    monsters = get_entities_at_random(
+        parameters.enemy_chances, num_monsters, floor, rng
+    )
+    items = get_entities_at_random(parameters.item_chances, num_items, floor, rng)
 
-            if dungeon.tiles[x, y]["walkable"] and not any(
-                e.x == x and e.y == y for e in dungeon.entities
-            ):
-                entity.spawn(x, y, dungeon)
-                placed = True
+    place_entities_in_area(
+        monsters + items, dungeon, room.x1 + 1, room.y1 + 1, room.x2, room.y2, rng
+    )
 
 
-def place_level_entities(dungeon: GameMap, floor: int):
+def place_level_entities(
+    dungeon: GameMap, floor: int, rng: Optional[random.Random] = None
+):
     """
     Place entities in a given room a GameMap.
     """
     max_monsters = get_max_value_for_floor(parameters.max_monsters_by_floor, floor)
     max_items = get_max_value_for_floor(parameters.max_items_by_floor, floor)
 
-    num_monsters = random.randint(0, max_monsters)
-    num_items = random.randint(0, max_items)
-
-    monsters = get_entities_at_random(parameters.enemy_chances, num_monsters, floor)
-    items = get_entities_at_random(parameters.item_chances, num_items, floor)
+    num_monsters = (rng or random).randint(0, max_monsters)
+    num_items = (rng or random).randint(0, max_items)
 
-    for entity in monsters + items:
-        placed = False
-        while not placed:
-            x = generate_rnd(dungeon.width)
-            y = generate_rnd(dungeon.height)
+    monsters = get_entities_at_random(
+        parameters.enemy_chances, num_monsters, floor, rng
+    )
+    items = get_entities_at_random(parameters.item_chances, num_items, floor, rng)
 
-            if dungeon.tiles[x, y]["walkable"] and not any(
-                e.x == x and e.y == y for e in dungeon.entities
-            ):
-                entity.spawn(x, y, dungeon)
-                placed = True
+    place_entities_in_area(
+        monsters + items, dungeon, 0, 0, dungeon.width, dungeon.height, rng
+    )
 
 
-def place_level_torches(map: GameMap, min_torches: int, rand_torches: int):
+def place_level_torches(
+    map: GameMap,
+    min_torches: int,
+    rand_torches: int,
+    rng: Optional[random.Random] = None,
+):
     torch = entity_factories.torch
-    torches = generate_rnd(rand_torches) + min_torches
-    while torches > 0:
-        position = map.get_random_empty_tile(0, 0, map.width, map.height)
-        if position:
-            torch.spawn(*position, map)
-            torches -= 1
+    torches = generate_rnd(rand_torches, rng) + min_torches
+    for position in map.sample_free_tiles(torches, rng=rng):
+        torch.spawn(*position, map, rng)
 
 
-def place_encounter(room: Room, dungeon: GameMap, floor: int) -> bool:
+def place_encounter(
+    room: Room, dungeon: GameMap, floor: int, rng: Optional[random.Random] = None
+) -> bool:
     """
     Place an encounter in a given room of a cave. Return true if the room is suitable.
     """
 
-    encounter = get_encounter_for_level(floor)
+    encounter = get_encounter_for_level(floor, rng)
 
     if not encounter.is_room_suitable(room):
         return False
 
     encounter_entities = encounter.enemies + encounter.items + encounter.decorations
 
-    for entity in encounter_entities:
-        placed = False
-        while not placed:
-            x = random.randint(room.x1 + 1, room.x2 - 1)
-            y = random.randint(room.y1 + 1, room.y2 - 1)
-
-            if dungeon.tiles[x, y]["walkable"] and not any(
-                e.x == x and e.y == y for e in dungeon.entities
-            ):
-                entity.spawn(x, y, dungeon)
-                placed = True
+    place_entities_in_area(
+        encounter_entities, dungeon, room.x1 + 1, room.y1 + 1, room.x2, room.y2, rng
+    )
 
     return True
 
@@ -304,11 +318,12 @@ def find_theme_rooms(
     dungeon: np.ndarray,
     rnd_size: bool = False,
     freq: int = 0,
+    rng: Optional[random.Random] = None,
 ):
     DMAXX = map.width
     DMAXY = map.height
 
-    roll = flip_coin(freq) if freq > 0 else True
+    roll = flip_coin(freq, rng) if freq > 0 else True
 
     for j in range(DMAXY - 1):
         for i in range(DMAXX - 1):
@@ -323,17 +338,17 @@ def find_theme_rooms(
                     min_dim = min_size - 2
                     max_dim = max_size - 2
                     rand_theme_x = min_dim + generate_rnd(
-                        generate_rnd(theme_size[0] - min_dim + 1)
+                        generate_rnd(theme_size[0] - min_dim + 1, rng), rng
                     )
                     if rand_theme_x < min_dim or rand_theme_x > max_dim:
                         rand_theme_x = min_dim
                     new_theme_y = min_dim + generate_rnd(
-                        generate_rnd(theme_size[1] - min_dim + 1)
+                        generate_rnd(theme_size[1] - min_dim + 1, rng), rng
                     )
                     if new_theme_y < min_dim or new_theme_y > max_dim:
                         new_theme_y = min_dim
 
-                map.theme_rooms.add(RectRoom(i, j, theme_size[0], theme_size[1]))
+                map.theme_rooms.append(RectRoom(i, j, theme_size[0], theme_size[1]))
 
 
 def paint_theme_rooms(map: GameMap):
@@ -352,15 +367,15 @@ def paint_theme_rooms(map: GameMap):
                     map.tiles[i][j] = tile_types.blue
 
 
-def create_theme_rooms(map: GameMap):
+def create_theme_rooms(map: GameMap, rng: Optional[random.Random] = None):
     theme_rooms_stack = [theme_factories.shrine]
 
     while theme_rooms_stack:
-        theme_room = theme_rooms_stack.pop(generate_rnd(len(theme_rooms_stack)))
+        theme_room = theme_rooms_stack.pop(generate_rnd(len(theme_rooms_stack), rng))
 
         for room in map.theme_rooms:
 
             if theme_room.enclosed and not room.is_enclosed(map):
                 continue
 
-            theme_room.place(room, map)
+            theme_room.place(room, map, rng)
@@ -1,5 +1,6 @@
 from collections import namedtuple
 import random
+from typing import Optional
 import numpy as np
 from game_map import GameMap
 from map_gen import encounter_factories
@@ -23,11 +24,15 @@ class ThemeRoom:
         self.encounter = encounter
         self.enclosed = enclosed
 
-    def place(self, room: RectRoom, map: GameMap) -> None:
-        self._place_entities(room, map)
-        self._set_decorations(room, map)
+    def place(
+        self, room: RectRoom, map: GameMap, rng: Optional[random.Random] = None
+    ) -> None:
+        self._place_entities(room, map, rng)
+        self._set_decorations(room, map, rng)
 
-    def _place_entities(self, room: RectRoom, map: GameMap) -> None:
+    def _place_entities(
+        self, room: RectRoom, map: GameMap, rng: Optional[random.Random] = None
+    ) -> None:
         "Place the encounter entities randomly in the room."
         items = self.encounter.items
         decorations = self.encounter.decorations
@@ -35,26 +40,28 @@ class ThemeRoom:
 
         for item in items:
             position = map.get_random_empty_tile(
-                room.x, room.y, room.width, room.height
+                room.x, room.y, room.width, room.height, rng
             )
             if position:
-                item.spawn(*position, map)
+                item.spawn(*position, map, rng)
 
         for enemy in enemies:
             position = map.get_random_empty_tile(
-                room.x, room.y, room.width, room.height
+                room.x, room.y, room.width, room.height, rng
             )
             if position:
-                enemy.spawn(*position, map)
+                enemy.spawn(*position, map, rng)
 
         for decoration in decorations:
             position = map.get_random_empty_tile(
-                room.x, room.y, room.width, room.height
+                room.x, room.y, room.width, room.height, rng
             )
             if position:
-                decoration.spawn(*position, map)
+                decoration.spawn(*position, map, rng)
 
-    def _set_decorations(self, room: RectRoom, map: GameMap) -> None:
+    def _set_decorations(
+        self, room: RectRoom, map: GameMap, rng: Optional[random.Random] = None
+    ) -> None:
         "Place the theme specific decorations in the room."
         pass
 
@@ -107,8 +114,10 @@ class ShrineRoom(ThemeRoom):
             suitable_walls.append(Wall(True, room.x2, room.y2, room.height))
         return suitable_walls
 
-    def _pick_wall(self, suitable_walls: list[Wall]) -> Wall:
-        return random.choice(suitable_walls)
+    def _pick_wall(
+        self, suitable_walls: list[Wall], rng: Optional[random.Random] = None
+    ) -> Wall:
+        return (rng or random).choice(suitable_walls)
 
     def _place_decorations(self, wall: Wall, map: GameMap) -> None:
         if wall.is_vertical:
@@ -122,8 +131,10 @@ class ShrineRoom(ThemeRoom):
             for j, decoration in enumerate(self.decorations):
                 decoration.spawn(x + j, y, map)
 
-    def _set_decorations(self, room: RectRoom, map: GameMap) -> None:
+    def _set_decorations(
+        self, room: RectRoom, map: GameMap, rng: Optional[random.Random] = None
+    ) -> None:
         suitable_walls = self._find_suitable_walls(room, map)
         if suitable_walls:
-            chosen_wall = self._pick_wall(suitable_walls)
+            chosen_wall = self._pick_wall(suitable_walls, rng)
             self._place_decorations(chosen_wall, map)
@@ -1,4 +1,3 @@
-from copy import deepcopy
 from game_map import GameMap
 from map_gen.ellipsis_room import EllipsisRoom
 import tile_types
@@ -26,7 +25,7 @@ def create_top_floor(map_width: int, map_height: int, engine: Engine) -> GameMap
 
     player.place(*new_room.center, game_map)
 
-    vampire_lord = deepcopy(actor_factories.vampire_lord)
+    vampire_lord = actor_factories.vampire_lord.clone()
     vampire_lord.place(map_width // 2, 10, game_map)
 
     game_map.tiles[new_room.center] = tile_types.down_stairs
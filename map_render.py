@@ -1,11 +1,43 @@
-import tcod
+"""Show generated maps in a window, or render large batches of them to files.
+
+Run without arguments to browse maps: SPACE generates another map, UP and DOWN switch
+the generator and R toggles a ruler. With --batch N every generator makes N maps with
+seeds from --seed up, spread over a process pool. Each map's light graphics are saved
+as a PNG, or all of them in one .npz with --format npz, and a contact sheet with a
+small image of every map is written next to them.
+
+Usage: python map_render.py [--batch N] [--seed N] [--generators NAME,...]
+                            [--format png|npz] [--out DIR] [--workers N]
+"""
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+import random
+import struct
 import time
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+import tcod
+
+import game_world
+import global_vars
+import mapgen_benchmark
+import tile_types
 from engine import Engine
 from game_world import GameWorld
 from map_gen.generate_cave import generate_cave
 from map_gen.generate_dungeon import generate_dungeon
 from map_gen.generate_cathedral import generate_cathedral
 
+TILESET_FILE = "assets/Alloy_curses_12x12.png"
+MAP_WIDTH = 80
+MAP_HEIGHT = 43
+
 floor_map_generator = [
     lambda **kwargs: generate_cathedral(**kwargs),
     lambda **kwargs: generate_cave(
@@ -27,20 +59,15 @@ def render_ruler(console, map_width, map_height):
         console.print(0, y, str(y), fg=gray)
 
 
-def main():
+def browse():
     screen_width = 80
     screen_height = 50
 
-    tileset = tcod.tileset.load_tilesheet(
-        "assets/Alloy_curses_12x12.png",
-        16,
-        16,
-        tcod.tileset.CHARMAP_CP437,
-    )
+    tileset = load_tileset()
 
     title = "Map Render tool"
-    map_width = 80
-    map_height = 43
+    map_width = MAP_WIDTH
+    map_height = MAP_HEIGHT
 
     generator_index = 0
 
@@ -106,5 +133,188 @@ def main():
             raise
 
 
+# Tileset of a batch worker process, only loaded when it renders PNG files.
+_worker_tileset: Optional[tcod.tileset.Tileset] = None
+
+
+def load_tileset() -> tcod.tileset.Tileset:
+    return tcod.tileset.load_tilesheet(TILESET_FILE, 16, 16, tcod.tileset.CHARMAP_CP437)
+
+
+def init_worker(image_format: str) -> None:
+    global _worker_tileset
+
+    global_vars.HEADLESS = True
+    if image_format == "png":
+        _worker_tileset = load_tileset()
+
+
+def generate_graphics(name: str, seed: int) -> np.ndarray:
+    """Generate a map with a mapgen_benchmark generator and return its light graphics."""
+    floor, generator = mapgen_benchmark.GENERATORS[name]
+    random.seed(seed)
+    np.random.seed(seed)
+    engine = game_world.new_floor_engine(floor, MAP_WIDTH, MAP_HEIGHT)
+    game_map = generator(
+        map_width=MAP_WIDTH,
+        map_height=MAP_HEIGHT,
+        engine=engine,
+        **mapgen_benchmark.rng_argument(name, seed),
+    )
+    return tile_types.LIGHT[game_map.tiles]
+
+
+def render_image(graphics: np.ndarray, tileset: tcod.tileset.Tileset) -> np.ndarray:
+    """Return the (height, width, 3) RGB pixels of the graphics drawn with the tileset."""
+    console = tcod.console.Console(*graphics.shape, order="F")
+    console.rgb[:] = graphics
+    return tileset.render(console)[..., :3]
+
+
+def thumbnail(graphics: np.ndarray) -> np.ndarray:
+    """Return one pixel per tile, the glyph color if it has one, else the background."""
+    blank = np.isin(graphics["ch"], (ord(" "), 0))
+    colors = np.where(blank[..., np.newaxis], graphics["bg"], graphics["fg"])
+    return colors.transpose(1, 0, 2)
+
+
+def write_png(filename: str, pixels: np.ndarray) -> None:
+    """Write (height, width, 3) RGB pixels to a PNG file."""
+    height, width = pixels.shape[:2]
+    # Every row starts with the filter type, 0 for none.
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = pixels.reshape(height, width * 3)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    with open(filename, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def render_batch_map(
+    name: str, seed: int, out_dir: str, image_format: str
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Generate a map in a batch worker. A PNG is written by the worker itself, the
+    graphics are only returned for the .npz, which the main process writes.
+    Returns the thumbnail of the map and its graphics, if needed.
+    """
+    graphics = generate_graphics(name, seed)
+    if image_format == "png":
+        if _worker_tileset is None:
+            raise RuntimeError("The worker has no tileset, it wasn't started by init_worker.")
+        pixels = render_image(graphics, _worker_tileset)
+        write_png(os.path.join(out_dir, f"{name}-{seed}.png"), pixels)
+        return thumbnail(graphics), None
+    return thumbnail(graphics), graphics
+
+
+def contact_sheet(thumbnails: List[np.ndarray], gap: int = 2) -> np.ndarray:
+    """Return the thumbnails laid out in a grid about as wide as it is tall."""
+    height, width = thumbnails[0].shape[:2]
+    columns = max(1, round(math.sqrt(len(thumbnails) * height / width)))
+    rows = math.ceil(len(thumbnails) / columns)
+    sheet = np.zeros(
+        (rows * (height + gap) + gap, columns * (width + gap) + gap, 3), dtype=np.uint8
+    )
+    for index, image in enumerate(thumbnails):
+        row, column = divmod(index, columns)
+        top = gap + row * (height + gap)
+        left = gap + column * (width + gap)
+        sheet[top : top + height, left : left + width] = image
+    return sheet
+
+
+def render_batch(
+    names: List[str],
+    count: int,
+    seed: int,
+    out_dir: str,
+    image_format: str,
+    workers: Optional[int],
+) -> None:
+    """Render count maps of each generator and the contact sheet of all of them."""
+    jobs = [(name, seed + index) for name in names for index in range(count)]
+    os.makedirs(out_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(image_format,)
+    ) as executor:
+        futures = [
+            executor.submit(render_batch_map, name, job_seed, out_dir, image_format)
+            for name, job_seed in jobs
+        ]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    if image_format == "npz":
+        map_graphics = [result[1] for result in results if result[1] is not None]
+        if len(map_graphics) != len(jobs):
+            raise RuntimeError("A batch worker didn't return the graphics of its map.")
+        graphics = np.stack(map_graphics)
+        np.savez_compressed(
+            os.path.join(out_dir, "maps.npz"),
+            ch=graphics["ch"],
+            fg=graphics["fg"],
+            bg=graphics["bg"],
+            generators=np.array([name for name, _ in jobs]),
+            seeds=np.array([job_seed for _, job_seed in jobs]),
+        )
+
+    write_png(
+        os.path.join(out_dir, "contact_sheet.png"),
+        contact_sheet([result[0] for result in results]),
+    )
+    print(
+        f"Rendered {len(jobs)} maps to {out_dir} in {elapsed:.1f}s "
+        f"({len(jobs) / elapsed:.1f} maps/s)."
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show or render generated maps.")
+    parser.add_argument(
+        "--batch",
+        type=int,
+        default=None,
+        help="render this many maps of each generator to files instead of showing them",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first map")
+    parser.add_argument(
+        "--generators",
+        default="cave,dungeon,cathedral",
+        help=f"comma separated, out of {', '.join(mapgen_benchmark.GENERATORS)}",
+    )
+    parser.add_argument("--format", choices=("png", "npz"), default="png")
+    parser.add_argument("--out", default="map_renders", help="output directory")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes, all cores by default"
+    )
+    args = parser.parse_args()
+
+    if args.batch is None:
+        browse()
+        return
+
+    names = args.generators.split(",")
+    for name in names:
+        if name not in mapgen_benchmark.GENERATORS:
+            parser.error(f"unknown generator: {name}")
+    if args.batch < 1:
+        parser.error("--batch needs at least one map")
+
+    render_batch(names, args.batch, args.seed, args.out, args.format, args.workers)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Generate maps of every type with fixed seeds and report how long they take.
+
+Each map is generated like a floor in the background worker, without a window or a
+game session, and measured: generation time, retries, walkable area, whether the
+stairs can be reached from the start and how many entities were placed.
+
+Usage: python mapgen_benchmark.py [--runs N] [--seed N] [--generators NAME,...]
+                                  [--csv FILE] [--json FILE]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import random
+import time
+from typing import Callable, Dict, List, Tuple, TYPE_CHECKING
+
+import numpy as np
+import tcod
+
+import game_world
+import global_vars
+from entity import Actor, Item
+import tile_types
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+
+MAP_WIDTH = 80
+MAP_HEIGHT = 43
+
+# Floor and generator of each map type, on the first floor the game uses it.
+GENERATORS: Dict[str, Tuple[int, Callable[..., GameMap]]] = {
+    "cave": (1, game_world.get_floor_generator(1)),
+    "dungeon": (4, game_world.get_floor_generator(4)),
+    "cathedral": (6, game_world.get_floor_generator(6)),
+    "debug_room": (1, game_world.prefab_maps["debug_room"]),
+    "top_floor": (10, game_world.prefab_maps["top_floor"]),
+}
+
+PERCENTILES = (50, 90, 99)
+
+
+def rng_argument(name: str, seed: int) -> dict:
+    """Return the rng keyword argument of a generator, the prefab maps don't take one."""
+    if name in game_world.prefab_maps:
+        return {}
+    return {"rng": random.Random(seed)}
+
+
+def stairs_connected(game_map: GameMap, start: Tuple[int, int]) -> bool:
+    """Return True if every stairs of the map can be walked to from start."""
+    # Closed doors aren't walkable, but the player opens them on the way.
+    passable = game_map.walkable | np.isin(game_map.tiles, tile_types.door_tiles)
+    distance = tcod.path.maxarray(passable.shape, dtype=np.int32, order="F")
+    distance[start] = 0
+    tcod.path.dijkstra2d(distance, passable.astype(np.int8), 1, 1, out=distance)
+    unreachable = np.iinfo(np.int32).max
+
+    stair_tiles = [
+        location
+        for location in (game_map.upstairs_location, game_map.downstairs_location)
+        if game_map.tiles[location] in tile_types.stair_tiles
+    ]
+    return all(distance[location] != unreachable for location in stair_tiles)
+
+
+def measure(name: str, seed: int) -> dict:
+    """Generate a map of the given type and return its statistics."""
+    floor, generator = GENERATORS[name]
+    random.seed(seed)
+    np.random.seed(seed)
+    engine = game_world.new_floor_engine(floor, MAP_WIDTH, MAP_HEIGHT)
+    rng = rng_argument(name, seed)
+
+    start = time.perf_counter()
+    game_map = generator(map_width=MAP_WIDTH, map_height=MAP_HEIGHT, engine=engine, **rng)
+    elapsed = time.perf_counter() - start
+
+    player = engine.player
+    return {
+        "generator": name,
+        "floor": floor,
+        "seed": seed,
+        "seconds": elapsed,
+        "retries": game_map.generation_retries,
+        "walkable": int(game_map.walkable.sum()),
+        "stairs_connected": stairs_connected(game_map, (player.x, player.y)),
+        "actors": sum(
+            isinstance(entity, Actor) and entity is not player
+            for entity in game_map.entities
+        ),
+        "items": sum(isinstance(entity, Item) for entity in game_map.entities),
+    }
+
+
+def summarize(runs: List[dict]) -> dict:
+    """Return the time percentiles and averages of the runs of a generator."""
+    milliseconds = np.array([run["seconds"] for run in runs]) * 1000
+    summary: Dict[str, float] = {"runs": len(runs)}
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}_ms"] = float(np.percentile(milliseconds, percentile))
+    summary["max_ms"] = float(milliseconds.max())
+    for key in ("retries", "walkable", "actors", "items"):
+        summary[f"mean_{key}"] = float(np.mean([run[key] for run in runs]))
+    summary["disconnected"] = sum(not run["stairs_connected"] for run in runs)
+    return summary
+
+
+def benchmark(names: List[str], runs: int, seed: int) -> Dict[str, List[dict]]:
+    """Generate each map type the given number of times, with seeds from seed up."""
+    return {
+        name: [measure(name, seed + index) for index in range(runs)] for name in names
+    }
+
+
+def write_csv(filename: str, results: Dict[str, List[dict]]) -> None:
+    rows = [run for runs in results.values() for run in runs]
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_json(filename: str, results: Dict[str, List[dict]]) -> None:
+    data = {
+        name: {"summary": summarize(runs), "runs": runs}
+        for name, runs in results.items()
+    }
+    with open(filename, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the map generators.")
+    parser.add_argument("--runs", type=int, default=20, help="maps per generator")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first map")
+    parser.add_argument(
+        "--generators",
+        default=",".join(GENERATORS),
+        help=f"comma separated, out of {', '.join(GENERATORS)}",
+    )
+    parser.add_argument("--csv", default=None, help="write every map's stats here")
+    parser.add_argument(
+        "--json", default=None, help="write the summaries and every map's stats here"
+    )
+    args = parser.parse_args()
+
+    names = args.generators.split(",")
+    for name in names:
+        if name not in GENERATORS:
+            parser.error(f"unknown generator: {name}")
+
+    global_vars.HEADLESS = True
+
+    results = benchmark(names, args.runs, args.seed)
+
+    print(
+        f"{'generator':<12}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        f"{'retries':>9}{'walkable':>10}{'actors':>8}{'items':>7}{'disconn.':>10}"
+    )
+    for name, runs in results.items():
+        summary = summarize(runs)
+        print(
+            f"{name:<12}{summary['p50_ms']:>9.1f}{summary['p90_ms']:>9.1f}"
+            f"{summary['p99_ms']:>9.1f}{summary['max_ms']:>9.1f}"
+            f"{summary['mean_retries']:>9.1f}{summary['mean_walkable']:>10.0f}"
+            f"{summary['mean_actors']:>8.1f}{summary['mean_items']:>7.1f}"
+            f"{summary['disconnected']:>10}"
+        )
+
+    if args.csv:
+        write_csv(args.csv, results)
+    if args.json:
+        write_json(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Time the phases of each turn and frame, and export them as a Chrome trace.
+
+Open the trace file in chrome://tracing or https://ui.perfetto.dev to see where the
+time of a turn goes. The phases are timed only when a profiler is set, otherwise
+`phase` returns a context manager that does nothing.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+
+class TurnProfiler:
+    """Collect timed phases as Chrome trace events."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.start = time.perf_counter_ns()
+        self.events: List[dict] = []
+
+    @contextlib.contextmanager
+    def phase(self, name: str, category: str, **args) -> Iterator[None]:
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            self.events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": (start - self.start) / 1000,
+                    "dur": (end - start) / 1000,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": args,
+                }
+            )
+
+    def summary(self) -> List[dict]:
+        """Return the count, total, mean, 95th percentile and max ms of each phase."""
+        durations: Dict[tuple[str, str], List[float]] = {}
+        for event in self.events:
+            durations.setdefault((event["cat"], event["name"]), []).append(
+                event["dur"] / 1000
+            )
+
+        rows = []
+        for (category, name), values in durations.items():
+            values.sort()
+            rows.append(
+                {
+                    "category": category,
+                    "name": name,
+                    "count": len(values),
+                    "total": sum(values),
+                    "mean": sum(values) / len(values),
+                    "p95": values[int(0.95 * (len(values) - 1))],
+                    "max": values[-1],
+                }
+            )
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def save(self) -> None:
+        """Write the Chrome trace and print the summary of each phase."""
+        with open(self.filename, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+        print(f"Profile saved to {self.filename}.")
+
+        print(
+            f"{'phase':<40} {'count':>7} {'total':>9} {'mean':>8} {'p95':>8} {'max':>8}"
+        )
+        for row in self.summary():
+            print(
+                f"{row['category'] + '/' + row['name']:<40.40} {row['count']:>7} "
+                f"{row['total']:>9.1f} {row['mean']:>8.3f} {row['p95']:>8.3f} "
+                f"{row['max']:>8.3f}"
+            )
+
+
+PROFILER: Optional[TurnProfiler] = None
+
+_NOT_PROFILING = contextlib.nullcontext()
+
+
+def set_profiler(value: Optional[TurnProfiler]):
+    global PROFILER
+    PROFILER = value
+
+
+def get_profiler() -> Optional[TurnProfiler]:
+    return PROFILER
+
+
+def phase(name: str, category: str = "turn", **args):
+    """Time the code in the with block as a phase, if profiling is enabled."""
+    if PROFILER is None:
+        return _NOT_PROFILING
+    return PROFILER.phase(name, category, **args)
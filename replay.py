@@ -0,0 +1,314 @@
+"""Record the player's actions in a session and play them back without a window.
+
+The recording stores the seed the game was started with, followed by every player
+action and level up choice. Playback starts a new game from the same seed and feeds
+those inputs to the engine as fast as possible, so real sessions can be profiled.
+
+With --check SEEDS, a bot session of each seed is recorded with headless.py and played
+back, each in a new process like a real recording, to verify that they match.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import lzma
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+import actions
+import global_vars
+import profiler
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+REPLAY_FORMAT = 1
+
+# Recorded action attributes, named like the action constructor arguments.
+ACTION_PARAMETERS = ("dx", "dy", "tile_x", "tile_y", "target_xy")
+
+
+def rng_checksum() -> int:
+    """Return a checksum of the random and numpy random states, without using them."""
+    checksum = zlib.crc32(np.array(random.getstate()[1], dtype=np.uint32).tobytes())
+    return zlib.crc32(np.random.get_state()[1].tobytes(), checksum)
+
+
+def encode_action(engine: Engine, action: actions.Action) -> Optional[dict]:
+    """Return the action as a dict of its class name and parameters.
+
+    Items are stored as their index in the player's inventory. Returns None for actions
+    that can't be recorded.
+    """
+    params: dict = {"action": type(action).__name__}
+    for name in ACTION_PARAMETERS:
+        if hasattr(action, name):
+            value = getattr(action, name)
+            params[name] = list(value) if isinstance(value, tuple) else value
+    item = getattr(action, "item", None)
+    if item is not None:
+        if item not in engine.player.inventory.items:
+            return None
+        params["item"] = engine.player.inventory.items.index(item)
+    return params
+
+
+def decode_action(engine: Engine, params: dict) -> actions.Action:
+    """Create the player action described by encode_action."""
+    params = dict(params)
+    action_class = getattr(actions, params.pop("action"))
+    if "item" in params:
+        params["item"] = engine.player.inventory.items[params["item"]]
+    if "target_xy" in params:
+        params["target_xy"] = tuple(params["target_xy"])
+    return action_class(engine.player, **params)
+
+
+class ReplayRecorder:
+    """Collect the inputs of a game session and write them to a replay file."""
+
+    def __init__(self, filename: str, seed: Optional[int] = None):
+        self.filename = filename
+        self.fixed_seed = seed
+        self.seed: Optional[int] = None
+        self.events: List[list] = []
+
+    def start_game(self) -> None:
+        """Seed the random generators for a new game and start a new recording."""
+        if self.events:
+            self.save()
+        self.seed = (
+            self.fixed_seed if self.fixed_seed is not None else random.getrandbits(32)
+        )
+        random.seed(self.seed)
+        np.random.seed(self.seed)
+        self.events = []
+
+    def record_action(self, engine: Engine, action: actions.Action) -> None:
+        params = encode_action(engine, action)
+        if params is None:
+            print(f"Replay: can't record {action}.")
+            return
+        self.events.append([engine.current_turn, "action", params, rng_checksum()])
+
+    def record_level_up(self, engine: Engine, attribute: str) -> None:
+        """Record a level up choice, attribute is one of max_hp, power or defense."""
+        self.events.append([engine.current_turn, "level_up", attribute, rng_checksum()])
+
+    def save(self) -> None:
+        if self.seed is None:
+            return
+        data = {
+            "format": REPLAY_FORMAT,
+            "version": global_vars.VERSION,
+            "seed": self.seed,
+            "events": self.events,
+        }
+        with open(self.filename, "wb") as f:
+            f.write(lzma.compress(json.dumps(data, separators=(",", ":")).encode()))
+        print(f"Replay saved to {self.filename}.")
+
+
+RECORDER: Optional[ReplayRecorder] = None
+
+
+def set_recorder(value: Optional[ReplayRecorder]):
+    global RECORDER
+    RECORDER = value
+
+
+def get_recorder() -> Optional[ReplayRecorder]:
+    return RECORDER
+
+
+def load_replay(filename: str) -> dict:
+    with open(filename, "rb") as f:
+        data = json.loads(lzma.decompress(f.read()))
+    if data.get("format") != REPLAY_FORMAT:
+        raise ValueError(f"Unsupported replay format {data.get('format')}.")
+    return data
+
+
+def play(data: dict, verify: bool = True) -> dict:
+    """Play a loaded replay headlessly as fast as possible.
+
+    Returns a summary of the session, with the time each event took. If verify is set
+    the playback stops at the first event where the random state doesn't match the
+    recording, since the game would no longer follow the recorded session.
+    """
+    import setup_game
+    from event_handlers.event_handler import EventHandler
+
+    # Seeded right before the new game, like ReplayRecorder.start_game does when
+    # recording, after anything the imports rolled.
+    global_vars.HEADLESS = True
+    random.seed(data["seed"])
+    np.random.seed(data["seed"])
+
+    start = time.perf_counter()
+    engine = setup_game.new_game()
+    handler = EventHandler(engine)
+    setup_seconds = time.perf_counter() - start
+
+    timings = []
+    diverged_at = None
+    # Names of the AIs on each floor when the player first got there.
+    floor_ais: Dict[int, List[str]] = {}
+    for index, (turn, kind, params, checksum) in enumerate(data["events"]):
+        floor = engine.game_world.current_floor
+        if floor not in floor_ais:
+            floor_ais[floor] = sorted(
+                {type(actor.ai).__name__ for actor in engine.game_map.actors if actor.ai}
+            )
+
+        if verify and (engine.current_turn != turn or rng_checksum() != checksum):
+            diverged_at = index
+            break
+
+        event_start = time.perf_counter()
+        if kind == "action":
+            handler.handle_action(decode_action(engine, params))
+        elif kind == "level_up":
+            getattr(engine.player.level, f"increase_{params}")()
+        timings.append(time.perf_counter() - event_start)
+
+    return {
+        "events": len(timings),
+        "setup_seconds": setup_seconds,
+        "seconds": sum(timings),
+        "timings": timings,
+        "diverged_at": diverged_at,
+        "turn": engine.current_turn,
+        "floor": engine.game_world.current_floor,
+        "alive": engine.player.is_alive,
+        "victory": engine.victory,
+        "floor_ais": floor_ais,
+    }
+
+
+def check(seeds: List[int], turns: int) -> bool:
+    """
+    Record a headless bot session for each seed and play it back, each in a new
+    process. Returns True if every replay matched its recording and at least one of
+    them went through a floor with bats, whose AI rolls random state when spawned.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    ok = True
+    met_bats = False
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for seed in seeds:
+            replay_file = os.path.join(temp_dir, f"{seed}.replay")
+            summary_file = os.path.join(temp_dir, f"{seed}.json")
+            subprocess.run(
+                [sys.executable, "headless.py", "--seed", str(seed)]
+                + ["--turns", str(turns), "--record", replay_file],
+                cwd=directory,
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+            subprocess.run(
+                # Exits with 1 if the replay diverges, the summary tells where.
+                [sys.executable, "replay.py", replay_file, "--summary", summary_file],
+                cwd=directory,
+                stdout=subprocess.DEVNULL,
+            )
+            with open(summary_file) as f:
+                summary = json.load(f)
+
+            bat_floors = [
+                int(floor)
+                for floor, ais in summary["floor_ais"].items()
+                if "BatAI" in ais
+            ]
+            met_bats = met_bats or bool(bat_floors)
+            if summary["diverged_at"] is None:
+                result = f"matched {summary['events']} events"
+            else:
+                result = f"diverged at event {summary['diverged_at']}"
+                ok = False
+            print(f"Seed {seed}: {result}, bats on floors {bat_floors or 'none'}.")
+
+    if not met_bats:
+        print("No session went through a floor with bats, play more turns or seeds.")
+    return ok and met_bats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Play a recorded session without a window."
+    )
+    parser.add_argument(
+        "replay", nargs="?", default=None, help="replay file recorded with -record"
+    )
+    parser.add_argument(
+        "--no-verify", action="store_true", help="keep going if the game diverges"
+    )
+    parser.add_argument("--slowest", type=int, default=5, help="slow events to list")
+    parser.add_argument("--profile", default=None, help="save a Chrome trace here")
+    parser.add_argument(
+        "--summary", default=None, help="save the summary of the playback as JSON"
+    )
+    parser.add_argument(
+        "--check",
+        default=None,
+        help="comma separated seeds to record and play back instead of a replay file",
+    )
+    parser.add_argument(
+        "--turns", type=int, default=500, help="turns of each --check session"
+    )
+    args = parser.parse_args()
+
+    if args.check:
+        seeds = [int(seed) for seed in args.check.split(",")]
+        sys.exit(0 if check(seeds, args.turns) else 1)
+    if args.replay is None:
+        parser.error("a replay file or --check is needed")
+
+    data = load_replay(args.replay)
+    if data["version"] != global_vars.VERSION:
+        print(f"Replay recorded with version {data['version']}, it may not match.")
+
+    if args.profile:
+        profiler.set_profiler(profiler.TurnProfiler(args.profile))
+
+    summary = play(data, verify=not args.no_verify)
+
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump({**summary, "timings": None}, f)
+
+    print(
+        f"Played {summary['events']} events in {summary['seconds']:.2f}s "
+        f"(new game {summary['setup_seconds']:.2f}s), turn {summary['turn']}, "
+        f"floor {summary['floor']}, "
+        f"{'won' if summary['victory'] else 'alive' if summary['alive'] else 'died'}."
+    )
+    if summary["diverged_at"] is not None:
+        print(f"The game diverged from the recording at event {summary['diverged_at']}")
+
+    timings = summary["timings"]
+    slowest = sorted(range(len(timings)), key=lambda i: timings[i], reverse=True)
+    for index in slowest[: args.slowest]:
+        turn, kind, params, _ = data["events"][index]
+        milliseconds = timings[index] * 1000
+        print(f"  event {index} (turn {turn}): {milliseconds:.1f}ms {kind} {params}")
+
+    turn_profiler = profiler.get_profiler()
+    if turn_profiler:
+        turn_profiler.save()
+
+    if summary["diverged_at"] is not None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Save files with a section for each floor, so floors are only loaded when visited.
+
+A save file starts with MAGIC and the length of a JSON header, followed by the header
+and the lzma compressed sections it lists. The "engine" section has the engine with
+the player and the current floor, every other floor has its own "floor-N" section.
+References between sections, e.g. a floor pointing back to the engine, are pickled as
+persistent ids and resolved to the live objects when the section is loaded.
+
+The sections of the floors the player isn't on are kept in a FloorCache file rather
+than in memory, they are used by the next saves and to load those floors again.
+"""
+
+from __future__ import annotations
+
+from collections.abc import MutableMapping
+from concurrent.futures import Future, ThreadPoolExecutor
+import io
+import json
+import lzma
+import os
+import pickle
+import struct
+import tempfile
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Tuple
+
+import global_vars
+from entity import Actor
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+MAGIC = b"COTENSAV"
+SAVE_FORMAT = 1
+HEADER_LENGTH = struct.Struct("<I")
+
+
+class SectionPickler(pickle.Pickler):
+    """Pickle an object, replacing the objects in references with their ids."""
+
+    def __init__(self, file, references: Dict[int, Any]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.references = references
+
+    def persistent_id(self, obj: Any) -> Any:
+        return self.references.get(id(obj))
+
+
+class SectionUnpickler(pickle.Unpickler):
+    """Unpickle a section, resolving the persistent ids to objects of the engine."""
+
+    def __init__(self, file, engine: Optional[Engine]):
+        super().__init__(file)
+        self.engine = engine
+
+    def persistent_load(self, pid: Any) -> Any:
+        if pid[0] == "floor":
+            # While loading the engine the other floors aren't loaded yet.
+            if self.engine is None:
+                return None
+            return self.engine.game_world.get_floor(pid[1])
+        if self.engine is None:
+            raise pickle.UnpicklingError(f"No engine to resolve persistent id {pid}")
+        if pid == "engine":
+            return self.engine
+        if pid == "player":
+            return self.engine.player
+        raise pickle.UnpicklingError(f"Unknown persistent id {pid}")
+
+
+def dump_section(obj: Any, references: Dict[int, Any]) -> bytes:
+    """Return the uncompressed pickle of a section."""
+    buffer = io.BytesIO()
+    SectionPickler(buffer, references).dump(obj)
+    return buffer.getvalue()
+
+
+def load_section(data: bytes, engine: Optional[Engine], compressed: bool = True) -> Any:
+    if compressed:
+        data = lzma.decompress(data)
+    return SectionUnpickler(io.BytesIO(data), engine).load()
+
+
+def floor_references(engine: Engine, root: Any) -> Dict[int, Any]:
+    """Return the persistent ids of the objects that live outside the root's section."""
+    references: Dict[int, Any] = {}
+    for number, game_map in enumerate(engine.game_world.floors, 1):
+        if game_map is None or game_map is root:
+            continue
+        # The current floor is saved along with the engine.
+        if root is engine and game_map is engine.game_map:
+            continue
+        references[id(game_map)] = ("floor", number)
+    if root is not engine:
+        references[id(engine)] = "engine"
+        references[id(engine.player)] = "player"
+    return references
+
+
+def load_floor(engine: Engine, data: bytes, compressed: bool = True) -> GameMap:
+    return load_section(data, engine, compressed)
+
+
+def pickle_floor(engine: Engine, game_map: GameMap) -> bytes:
+    """Return the uncompressed section of a floor the player isn't on."""
+    return dump_section(game_map, floor_references(engine, game_map))
+
+
+# Compresses the floors added to a FloorCache as pickles, see FloorCache.add_pickle.
+_compress_executor: Optional[ThreadPoolExecutor] = None
+
+
+class FloorCache(MutableMapping[int, bytes]):
+    """Compressed floor sections by floor number, stored in a temporary file.
+
+    Sections are appended to the file. Replacing or removing one leaves its bytes
+    behind until they outweigh the live sections, then the file is compacted.
+    Pickled sections can be added too, they are compressed on a worker thread and
+    moved to the file on the main thread once they are done.
+    """
+
+    # Dead bytes below this are never worth compacting.
+    COMPACT_MIN_SIZE = 1 << 20
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile(prefix="coten-floors-")
+        # Offset and length in the file of each floor's section.
+        self.index: Dict[int, Tuple[int, int]] = {}
+        self.size = 0
+        self.live_size = 0
+        # Pickle and compression job of the floors that aren't in the file yet.
+        self.pending: Dict[int, Tuple[bytes, Future]] = {}
+
+    def add_pickle(self, floor: int, data: bytes) -> None:
+        """Store the uncompressed section of a floor, compressing it in the background."""
+        global _compress_executor
+
+        if _compress_executor is None:
+            _compress_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="floor-cache"
+            )
+        self.discard(floor)
+        self.pending[floor] = (data, _compress_executor.submit(lzma.compress, data))
+
+    def get_pickle(self, floor: int) -> Optional[bytes]:
+        """Return the uncompressed section of a floor that is still being compressed."""
+        pending = self.pending.get(floor)
+        return pending[0] if pending else None
+
+    def store_compressed(self) -> None:
+        """Move the sections that are done compressing to the file."""
+        for floor, (_, future) in list(self.pending.items()):
+            if future.done():
+                self[floor] = future.result()
+
+    def discard(self, floor: int) -> None:
+        if floor in self:
+            del self[floor]
+
+    def __getitem__(self, floor: int) -> bytes:
+        if floor in self.pending:
+            # Waits for the compression, callers that can use the pickle use get_pickle.
+            self[floor] = self.pending[floor][1].result()
+        offset, length = self.index[floor]
+        self.file.seek(offset)
+        return self.file.read(length)
+
+    def __setitem__(self, floor: int, data: bytes) -> None:
+        self.pending.pop(floor, None)
+        if floor in self.index:
+            del self[floor]
+        self.file.seek(self.size)
+        self.file.write(data)
+        self.index[floor] = (self.size, len(data))
+        self.size += len(data)
+        self.live_size += len(data)
+
+    def __delitem__(self, floor: int) -> None:
+        if self.pending.pop(floor, None) is not None:
+            return
+        _, length = self.index.pop(floor)
+        self.live_size -= length
+        dead_size = self.size - self.live_size
+        if dead_size > max(self.live_size, self.COMPACT_MIN_SIZE):
+            self.compact()
+
+    def __contains__(self, floor: object) -> bool:
+        return floor in self.index or floor in self.pending
+
+    def __iter__(self) -> Iterator[int]:
+        return iter([*self.index, *self.pending])
+
+    def __len__(self) -> int:
+        return len(self.index) + len(self.pending)
+
+    def compact(self) -> None:
+        """Rewrite the file with only the live sections."""
+        sections = {floor: self[floor] for floor in self.index}
+        self.file.seek(0)
+        self.file.truncate()
+        self.index = {}
+        self.size = self.live_size = 0
+        for floor, data in sections.items():
+            self[floor] = data
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class Snapshot:
+    """The pickled state of a game, which can be compressed and written later.
+
+    Taking a snapshot is cheap compared to compressing it, so the compression and
+    the write can happen on another thread while the game goes on.
+    """
+
+    def __init__(self, engine: Engine):
+        game_world = engine.game_world
+        saved_floors = game_world.get_saved_floors()
+
+        # Sections that are already compressed, and pickles that still have to be.
+        self.sections: Dict[str, bytes] = {}
+        self.pickles: Dict[str, bytes] = {}
+        for number, game_map in enumerate(game_world.floors, 1):
+            if game_map is engine.game_map:
+                continue
+            # The player isn't on this floor, so it doesn't change until it is visited.
+            if number in saved_floors:
+                # Floors still being compressed are compressed again with the others.
+                pickled = saved_floors.get_pickle(number)
+                if pickled is None:
+                    self.sections[f"floor-{number}"] = saved_floors[number]
+                else:
+                    self.pickles[f"floor-{number}"] = pickled
+            else:
+                self.pickles[f"floor-{number}"] = dump_section(
+                    game_map, floor_references(engine, game_map)
+                )
+        self.pickles["engine"] = dump_section(engine, floor_references(engine, engine))
+
+        self.header = {
+            "format": SAVE_FORMAT,
+            "version": global_vars.VERSION,
+            "current_floor": game_world.current_floor,
+            "actor_id_counter": Actor._id_counter,
+        }
+
+    def compressed_floors(self) -> Dict[int, bytes]:
+        """Return the compressed sections of the floors, by floor number."""
+        return {
+            int(name.split("-")[1]): data
+            for name, data in self.sections.items()
+            if name.startswith("floor-")
+        }
+
+    def write(self, filename: str) -> int:
+        """Compress the pickles and write the save file, returning its size.
+
+        The file is written next to the old save and then renamed over it, so a crash
+        while saving doesn't leave a broken save behind.
+        """
+        for name, data in self.pickles.items():
+            self.sections[name] = lzma.compress(data)
+        self.pickles = {}
+
+        offset = 0
+        section_index = {}
+        for name, data in self.sections.items():
+            section_index[name] = [offset, len(data)]
+            offset += len(data)
+        header = json.dumps({**self.header, "sections": section_index}).encode()
+
+        temp_filename = filename + ".tmp"
+        with open(temp_filename, "wb") as f:
+            f.write(MAGIC)
+            f.write(HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            for data in self.sections.values():
+                f.write(data)
+        os.replace(temp_filename, filename)
+        return len(MAGIC) + HEADER_LENGTH.size + len(header) + offset
+
+
+def save(engine: Engine, filename: str) -> int:
+    """Save the engine, reusing the sections of floors that didn't change.
+
+    Returns the size of the save file.
+    """
+    snapshot = Snapshot(engine)
+    size = snapshot.write(filename)
+    engine.game_world.get_saved_floors().update(snapshot.compressed_floors())
+    return size
+
+
+def load(filename: str) -> Engine:
+    """Load the engine and its current floor, the other floors are loaded when visited.
+
+    Saves made before the sections were added are a single compressed pickle.
+    """
+    with open(filename, "rb") as f:
+        data = f.read()
+
+    if not data.startswith(MAGIC):
+        engine = pickle.loads(lzma.decompress(data))
+        # Older saves queue the actors of every floor and don't keep the id counter.
+        engine.game_world.schedule_floor_actors()
+        for game_map in engine.game_world.floors:
+            if game_map is not None:
+                for actor in game_map.actors:
+                    Actor._id_counter = max(Actor._id_counter, actor.id + 1)
+        return engine
+
+    start = len(MAGIC) + HEADER_LENGTH.size
+    (header_length,) = HEADER_LENGTH.unpack_from(data, len(MAGIC))
+    header = json.loads(data[start : start + header_length])
+    if header["format"] != SAVE_FORMAT:
+        raise ValueError(f"Unsupported save format {header['format']}.")
+
+    start += header_length
+    sections = {
+        name: data[start + offset : start + offset + length]
+        for name, (offset, length) in header["sections"].items()
+    }
+
+    engine = load_section(sections.pop("engine"), None)
+    engine.game_world.get_saved_floors().update(
+        (int(name.split("-")[1]), section) for name, section in sections.items()
+    )
+    # Actor ids keep increasing over the whole run.
+    Actor._id_counter = max(Actor._id_counter, header["actor_id_counter"])
+    return engine
@@ -1,10 +1,7 @@
 """Handle the loading and initialization of game sessions."""
 from __future__ import annotations
 
-import copy
-import lzma
 import os
-import pickle
 import sys
 import traceback
 from typing import Optional
@@ -23,6 +20,8 @@ from game_world import GameWorld
 from global_vars import VERSION
 
 import global_vars
+import replay
+import savefile
 from turn_manager import TurnManager
 
 
@@ -41,10 +40,14 @@ except NameError:
 
 def new_game() -> Engine:
     """Return a brand new game session as an Engine instance."""
+    recorder = replay.get_recorder()
+    if recorder:
+        recorder.start_game()
+
     map_width = 80
     map_height = 43
 
-    player = copy.deepcopy(actor_factories.player)
+    player = actor_factories.player.clone()
 
     engine = Engine(player=player, debug_mode=global_vars.DEBUG_MODE)
 
@@ -78,7 +81,7 @@ def new_game() -> Engine:
         color.white,
     )
 
-    dagger = copy.deepcopy(item_factories.dagger)
+    dagger = item_factories.dagger.clone()
     dagger.parent = player.inventory
 
     player.inventory.items.append(dagger)
@@ -88,10 +91,10 @@ def new_game() -> Engine:
 
 
 def load_game(filename: str) -> Engine:
-    """Load an Engine instance from a file."""
-    with open(filename, "rb") as f:
-        engine = pickle.loads(lzma.decompress(f.read()))
+    """Load an Engine instance from a file, the floors are loaded when visited."""
+    engine = savefile.load(filename)
     assert isinstance(engine, Engine)
+    engine.game_world.prefetch_next_floor()
     return engine
 
 
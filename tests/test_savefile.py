@@ -0,0 +1,84 @@
+"""Check that saves made by older versions of the game still load."""
+import os
+import tempfile
+import unittest
+
+import global_vars
+import setup_game  # Imports the game modules in an order without import cycles.
+import actions
+import savefile
+import utils
+from engine import Engine
+from entity import Actor
+
+
+SAVES = os.path.join(os.path.dirname(__file__), "saves")
+
+
+class TestOldSaves(unittest.TestCase):
+    """baseline.sav was made before the save sections, turn scheduler and slots.
+
+    It's a game started with random.seed(1) and np.random.seed(1) that waited 3 turns,
+    went up to the second floor and waited 3 more turns, saved with Engine.save_as.
+    """
+
+    def setUp(self):
+        global_vars.HEADLESS = True
+        filename = os.path.join(SAVES, "baseline.sav")
+        with open(filename, "rb") as f:
+            self.assertFalse(f.read().startswith(savefile.MAGIC))
+        self.engine = self.load(filename)
+
+    def load(self, filename: str) -> Engine:
+        engine = savefile.load(filename)
+        self.addCleanup(lambda: engine.game_world.get_saved_floors().close())
+        return engine
+
+    def wait_turns(self, turns: int) -> None:
+        for _ in range(turns):
+            actions.WaitAction(self.engine.player).perform()
+            self.engine.handle_entity_turns()
+
+    def test_load(self):
+        engine = self.engine
+        self.assertIsInstance(engine, Engine)
+        self.assertEqual(engine.game_world.current_floor, 2)
+        self.assertIs(engine.player.gamemap, engine.game_map)
+        self.assertIn(engine.player, engine.game_map.entities)
+        self.assertEqual(engine.player.fighter.hp, 30)
+        self.assertEqual(
+            engine.turn_manager.get_actor_count(),
+            len(set(engine.game_map.actors)),
+        )
+        self.assertIs(engine.turn_manager.get_next_actor(), engine.player)
+        self.assertGreater(Actor._id_counter, max(a.id for a in engine.game_map.actors))
+
+    def test_slots(self):
+        player = self.engine.player
+        for obj in (player, player.fighter, player.inventory, *player.inventory.items):
+            self.assertFalse(hasattr(obj, "__dict__"), type(obj).__name__)
+            for name in utils.slot_names(type(obj)):
+                self.assertTrue(hasattr(obj, name), f"{type(obj).__name__}.{name}")
+
+    def test_play(self):
+        self.wait_turns(5)
+        self.assertIs(self.engine.turn_manager.get_next_actor(), self.engine.player)
+
+        self.engine.game_world.descend()
+        self.assertEqual(self.engine.game_world.current_floor, 1)
+        self.wait_turns(5)
+
+    def test_save_again(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "savegame.sav")
+            self.engine.save_as(filename)
+            engine = self.load(filename)
+
+        self.assertEqual(engine.game_world.current_floor, 2)
+        self.assertEqual(engine.player.fighter.hp, self.engine.player.fighter.hp)
+        engine.game_world.descend()
+        self.assertIs(engine.player.gamemap, engine.game_map)
+
+
+if __name__ == "__main__":
+    unittest.main()
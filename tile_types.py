@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import List, Tuple
 
 import numpy as np  # type: ignore
 
@@ -12,6 +12,7 @@ graphic_dt = np.dtype(
 )
 
 # Tile struct used for statically defined tile data.
+# Maps store a uint8 tile id per cell, the data is looked up in the registry below.
 tile_dt = np.dtype(
     [
         ("walkable", bool),  # True if this tile can be walked over.
@@ -22,15 +23,20 @@ tile_dt = np.dtype(
 )
 
 
+# Data of every tile type, indexed by tile id.
+_tile_data: List[Tuple] = []
+
+
 def new_tile(
     *,  # Enforce the use of keywords, so that parameter order doesn't matter.
     walkable: int,
     transparent: int,
     dark: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
     light: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
-) -> np.ndarray:
-    """Helper function for defining individual tile types"""
-    return np.array((walkable, transparent, dark, light), dtype=tile_dt)
+) -> int:
+    """Helper function for defining individual tile types, returns the new tile id."""
+    _tile_data.append((walkable, transparent, dark, light))
+    return len(_tile_data) - 1
 
 
 # SHROUD represents unexplored, unseen tiles
@@ -137,3 +143,20 @@ blue = new_tile(
 stair_tiles = [down_stairs, up_stairs, cave_down_stairs, cave_up_stairs]
 
 door_tiles = [closed_door, open_door]
+
+
+# Registry arrays, index them with a map's tile ids: WALKABLE[game_map.tiles]
+TILES = np.array(_tile_data, dtype=tile_dt)
+assert len(TILES) <= 256, "Tile ids must fit in a uint8."
+WALKABLE = TILES["walkable"]
+TRANSPARENT = TILES["transparent"]
+DARK = TILES["dark"]
+LIGHT = TILES["light"]
+
+
+def ids_from_struct(tiles: np.ndarray) -> np.ndarray:
+    """Convert an array of tile_dt structs, as stored by older saves, into tile ids."""
+    ids = np.zeros(tiles.shape, dtype=np.uint8, order="F")
+    for tile_id, tile in enumerate(TILES):
+        ids[tiles == tile] = tile_id
+    return ids
@@ -1,102 +1,107 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+
+import heapq
+from typing import Dict, Iterable, List, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from entity import Actor
 
 
+# An action with this cost takes a full turn to an actor with normal speed.
+BASE_COST = 100
+BASE_SPEED = 100
+
+
 class Node:
+    """Node of the circular list of actors that saves made before the scheduler store."""
+
     def __init__(self, actor: Actor):
         self.actor = actor
         self.next: Node | None = None
 
 
 class TurnManager:
-    """Turn Manager is a circular linked list that keeps track of the actors."""
+    """
+    Turn Manager is a priority queue of actors, ordered by the time they are ready to act.
+
+    An action with a given cost delays the next turn of an actor by cost * BASE_SPEED / speed,
+    so faster actors act more often. Removed actors are only marked as such and skipped when
+    they reach the top of the queue.
+    """
 
     def __init__(self):
-        self.head: Node | None = None
-        self.current: Node | None = None
-
-    def add_actor(self, actor: Actor):
-        new_node = Node(actor)
-        if self.head is None:
-            self.head = new_node
-            self.head.next = self.head  # Point to itself, creating a circular list
-        else:
-            # Insert new node before the head and make it the new head
-            new_node.next = self.head
-            # Find the node before head to complete the circle
-            last_node = self.head
-            while last_node and last_node.next != self.head:
-                last_node = last_node.next
-            if last_node:
-                last_node.next = new_node
-            self.head = new_node
+        self.time = 0.0
+        self.queue: List[list] = []  # Heap of [time, order, actor] entries.
+        self.entries: Dict[Actor, list] = {}
+        self.counter = 0  # Keeps the insertion order between actors ready at the same time.
+
+    def __setstate__(self, state: dict) -> None:
+        if "queue" in state:
+            self.__dict__.update(state)
+            return
+
+        # Saves made before the scheduler keep the actors in a circular list. The current
+        # node is the actor taking its turn, so the list is queued from it on.
+        self.__init__()
+        start = state.get("current") or state.get("head")
+        node = start
+        while node is not None:
+            self.add_actor(node.actor)
+            node = node.next
+            if node is start:
+                break
+
+    def add_actor(self, actor: Actor, delay: float = 0) -> None:
+        """Schedule an actor to act after a delay from the current time."""
+        self.remove_actor(actor)
+        self.counter += 1
+        entry = [self.time + delay, self.counter, actor]
+        self.entries[actor] = entry
+        heapq.heappush(self.queue, entry)
+
+    def remove_actor(self, actor: Actor) -> None:
+        entry = self.entries.pop(actor, None)
+        if entry:
+            entry[-1] = None
+
+    def set_actors(self, actors: Iterable[Actor]) -> None:
+        """Keep only the given actors, scheduling the ones that are not queued yet."""
+        actors = set(actors)
+        for actor in list(self.entries):
+            if actor not in actors:
+                self.remove_actor(actor)
+
+        # Sort the new actors so the turn order doesn't depend on the set order.
+        for actor in sorted(actors - self.entries.keys(), key=lambda a: a.id):
+            self.add_actor(actor)
+
+    def _discard_removed(self) -> None:
+        while self.queue and self.queue[0][-1] is None:
+            heapq.heappop(self.queue)
 
     def get_next_actor(self) -> Actor | None:
-        if self.current is None:
-            self.current = self.head
-        else:
-            self.current = self.current.next
-        return self.current.actor if self.current else None
+        """Return the next actor to act and move the current time to its turn."""
+        self._discard_removed()
+        if not self.queue:
+            return None
 
-    def has_actors(self):
-        return self.head is not None
+        self.time = max(self.time, self.queue[0][0])
+        return self.queue[0][-1]
 
-    def remove_actor(self, actor: Actor):
-        if self.head is None:
-            return
+    def end_turn(self, actor: Actor, cost: int = BASE_COST) -> None:
+        """Reschedule an actor after performing an action of the given cost.
 
-        # If the list contains only one node
-        if self.head == self.head.next and self.head.actor == actor:
-            self.head = None
-            self.current = None
+        Actors that were removed while acting, e.g. because they died, stay removed.
+        """
+        entry = self.entries.get(actor)
+        if entry is None:
             return
 
-        # If the head needs to be removed
-        if self.head.actor == actor:
-            # Find the node before head to update its next pointer
-            last_node = self.head
-            while last_node and last_node.next != self.head:
-                last_node = last_node.next
-            if last_node:
-                last_node.next = self.head.next
-            self.head = self.head.next
-            # Adjust current if necessary
-            if self.current and self.current.actor == actor:
-                self.current = self.current.next
-            return
+        speed = actor.fighter.base_speed or BASE_SPEED
+        self.add_actor(actor, entry[0] - self.time + cost * BASE_SPEED / speed)
 
-        # Search for the node with the actor to be removed
-        current_node = self.head
-        while current_node and current_node.next != self.head:
-            if current_node.next and current_node.next.actor == actor:
-                # Remove the node from the list
-                if self.current and self.current.actor == actor:
-                    self.current = (
-                        current_node
-                        if current_node.next.next == self.head
-                        else current_node.next.next
-                    )
-                current_node.next = current_node.next.next
-                return
-            current_node = current_node.next
+    def has_actors(self) -> bool:
+        return len(self.entries) > 0
 
     def get_actor_count(self) -> int:
-        count = 0
-        current_node = self.head
-
-        if current_node is None:
-            return count
-
-        # Loop through the circular linked list and count the nodes
-        while True:
-            count += 1
-            if current_node.next is None:
-                break
-            current_node = current_node.next
-            if current_node == self.head:
-                break
-
-        return count
+        return len(self.entries)
@@ -1,4 +1,62 @@
 import random
+from typing import Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+_UNSET = object()
+
+_slot_names: Dict[type, Tuple[str, ...]] = {}
+
+
+def slot_names(cls: type) -> Tuple[str, ...]:
+    """Return the names of the __slots__ of a class and its bases."""
+    if cls not in _slot_names:
+        _slot_names[cls] = tuple(
+            name
+            for klass in reversed(cls.__mro__)
+            for name in klass.__dict__.get("__slots__", ())
+            if name not in ("__dict__", "__weakref__")
+        )
+    return _slot_names[cls]
+
+
+class Slotted:
+    """Base for classes that keep their attributes in __slots__ instead of a __dict__.
+
+    The attributes are pickled as a dict, the same as before the classes had slots, so
+    old saves still load. Saved attributes a class doesn't have anymore are dropped.
+    """
+
+    __slots__ = ()
+
+    def __getstate__(self) -> dict:
+        state = dict(getattr(self, "__dict__", ()))
+        for name in slot_names(type(self)):
+            try:
+                state[name] = getattr(self, name)
+            except AttributeError:  # Not set yet, e.g. the parent of a template.
+                pass
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        names = slot_names(type(self))
+        has_dict = hasattr(self, "__dict__")
+        for name, value in state.items():
+            if has_dict or name in names:
+                object.__setattr__(self, name, value)
+
+
+def shallow_copy(obj: T) -> T:
+    """Same as copy.copy for plain and Slotted objects, without its overhead."""
+    clone = object.__new__(type(obj))
+    for name in slot_names(type(obj)):
+        value = getattr(obj, name, _UNSET)
+        if value is not _UNSET:
+            setattr(clone, name, value)
+    if hasattr(obj, "__dict__"):
+        clone.__dict__.update(obj.__dict__)
+    return clone
 
 
 def replace_items_in_list(target_list, start_index, items_to_replace):
@@ -41,20 +99,23 @@ def generate_random_rgb():
             return (r, g, b)
 
 
-def flip_coin(times=1):
+def flip_coin(times=1, rng: Optional[random.Random] = None):
     """
     Simulates flipping a coin a specified number of times.
     Calling once is equivalent to flipping a coin once 50% chance.
     Calling twice is equivalent to flipping a coin twice 25% chance. And so on.
+    Uses the global random state unless an rng is given.
     """
+    choice = rng.choice if rng else random.choice
     flip = False
     for _ in range(times):
-        flip = random.choice([True, False])
+        flip = choice([True, False])
     return flip
 
 
-def generate_rnd(upper_bound: int):
+def generate_rnd(upper_bound: int, rng: Optional[random.Random] = None):
     """
     Generate a random number between 0 and upper_bound - 1.
+    Uses the global random state unless an rng is given.
     """
-    return random.randint(0, upper_bound - 1)
+    return (rng or random).randint(0, upper_bound - 1)